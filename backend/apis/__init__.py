@@ -1,13 +1,52 @@
 
-from flask import Blueprint
-from . import auth_api, changelog_api, chores_api, people_api, schedules_api
+from flask import Blueprint, g
+from backend import db, households
+from backend.utils import scope
+from . import admin_api, auth_api, changelog_api, chores_api, metrics_api, people_api, schedules_api
 
 api = Blueprint("api", __name__, url_prefix="/api")
+api.register_blueprint(admin_api.bp)
 api.register_blueprint(auth_api.bp)
 api.register_blueprint(changelog_api.bp)
 api.register_blueprint(chores_api.bp)
+api.register_blueprint(metrics_api.bp)
 api.register_blueprint(people_api.bp)
 api.register_blueprint(schedules_api.bp)
 
-__all__ = ["api"]
+@api.after_request
+def add_snapshot_version(response):
+    if "snapshot_version" in g:
+        response.headers["X-Snapshot-Version"] = str(g.snapshot_version)
+    return response
+
+# The same endpoints for one household, see backend/households.py. Admin
+# and metrics stay on /api: backups of a household go through manage.py.
+household_api = Blueprint("household_api", __name__, url_prefix="/api/<household>")
+household_api.register_blueprint(auth_api.bp)
+household_api.register_blueprint(changelog_api.bp)
+household_api.register_blueprint(chores_api.bp)
+household_api.register_blueprint(people_api.bp)
+household_api.register_blueprint(schedules_api.bp)
+
+@household_api.url_value_preprocessor
+def enter_household(endpoint, values):
+    """
+    Raises:
+        UnknownHouseholdError: If there is no such household.
+        HouseholdsUnavailableError: In worker mode.
+    """
+    if db.WRITER_ADDRESS is not None:
+        raise households.HouseholdsUnavailableError()
+    name = values.pop("household")
+    g.household = households.households.acquire(name)
+    g.household_token = scope.current.set(g.household)
+
+@household_api.teardown_request
+def leave_household(error):
+    if "household_token" in g:
+        scope.current.reset(g.household_token)
+        households.households.release(g.household)
+        del g.household_token
+
+__all__ = ["api", "household_api"]
  
\ No newline at end of file
@@ -0,0 +1,154 @@
+from flask import Blueprint, Response, request, jsonify
+from functools import wraps
+from shutil import rmtree
+import os
+import tempfile
+import zipfile
+
+import duckdb
+
+from backend import db
+from backend.models import backup
+from backend.apis.require_auth import current_user
+from backend.utils.chunk_sink import ChunkSink
+
+bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+ADMINS: set[str] = set() # Names of the people allowed to use these endpoints
+STREAM_CHUNK: int = 1 << 16 # Bytes per chunk of a streamed backup
+MAX_UPLOAD: int = 1 << 30 # Bytes of an uploaded backup, and of its files once extracted
+
+
+def require_admin(fn):
+    """Like `require_auth`, for the people in ADMINS. The view gets no
+    connection, as it decides itself how long to hold one."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = request.cookies.get("session_token")
+        user = current_user(token) if token else None
+        if user is None:
+            return jsonify({"ok": False, "error": "Unauthenticated"}), 401
+        if user[1] not in ADMINS:
+            return jsonify({"ok": False, "error": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+def _copy_limited(source, file, limit: int) -> int:
+    """Copy `source` to `file` like `copyfileobj`, up to `limit` bytes.
+    Returns:
+        int: The number of bytes copied.
+    Raises:
+        UploadTooLargeError: If `source` has more than `limit` bytes.
+    """
+    copied = 0
+    while chunk := source.read(STREAM_CHUNK):
+        copied += len(chunk)
+        if copied > limit:
+            raise UploadTooLargeError()
+        file.write(chunk)
+    return copied
+
+
+def _zip_stream(directory: str, paths: dict[str, str], compress: bool):
+    """Yield a zip archive of `paths` chunk by chunk, then remove `directory`."""
+    try:
+        sink = ChunkSink()
+        compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(sink, 'w', compression=compression) as archive:
+            for path in paths.values():
+                with open(path, 'rb') as file, \
+                     archive.open(os.path.basename(path), 'w', force_zip64=True) as entry:
+                    while chunk := file.read(STREAM_CHUNK):
+                        entry.write(chunk)
+                        yield sink.drain()
+        yield sink.drain()
+    finally:
+        rmtree(directory, ignore_errors=True)
+
+
+@bp.route("/export", methods=["GET"])
+@require_admin
+def export_backup():
+    """
+    GET /admin/export?format=parquet|csv&tables=people,chores,...
+    Streams a zip archive with one file per table, all from the same
+    moment. The tables are written to disk first, so the lock is only
+    held to start the read.
+    """
+    format = request.args.get("format", "parquet")
+    tables = request.args.get("tables")
+    tables = tables.split(",") if tables else backup.TABLES
+    directory = tempfile.mkdtemp(prefix="backup-")
+    try:
+        with db.connect_consistent() as conn_r:
+            paths = backup.export_tables(conn_r, directory, format, tables)
+    except (backup.UnknownFormatError, backup.UnknownTableError) as e:
+        rmtree(directory, ignore_errors=True)
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except BaseException:
+        rmtree(directory, ignore_errors=True)
+        raise
+    return Response(
+        _zip_stream(directory, paths, compress=format == "csv"),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="backup-{format}.zip"'},
+    )
+
+
+@bp.route("/import", methods=["POST"])
+@require_admin
+def import_backup():
+    """
+    POST /admin/import?mode=replace|upsert
+    Body: a zip archive as written by /admin/export.
+    Replaces the tables it contains, or merges them into the current
+    ones with mode=upsert, in one transaction.
+    """
+    mode = request.args.get("mode", "replace")
+    if mode not in backup.MODES:
+        return jsonify({"ok": False, "error": f"Invalid mode. Got {repr(mode)}."}), 400
+    if request.content_length is not None and request.content_length > MAX_UPLOAD:
+        return jsonify({"ok": False, "error": f"The backup is over {MAX_UPLOAD} bytes"}), 413
+    directory = tempfile.mkdtemp(prefix="backup-")
+    try:
+        upload = os.path.join(directory, "upload.zip")
+        try:
+            # Counted as well, as chunked uploads have no Content-Length
+            with open(upload, 'wb') as file:
+                _copy_limited(request.stream, file, MAX_UPLOAD)
+            with zipfile.ZipFile(upload) as archive:
+                # Only the expected names, never paths from the archive
+                names = {f"{table}.{format}" for table in backup.TABLES
+                         for format in backup.FORMATS}
+                left = MAX_UPLOAD
+                for name in set(archive.namelist()) & names:
+                    with archive.open(name) as entry, \
+                         open(os.path.join(directory, name), 'wb') as file:
+                        left -= _copy_limited(entry, file, left)
+        except zipfile.BadZipFile:
+            return jsonify({"ok": False, "error": "Expected a zip archive"}), 400
+        except UploadTooLargeError:
+            return jsonify({"ok": False, "error": f"The backup is over {MAX_UPLOAD} bytes"}), 413
+        with db.connect_w() as conn_w:
+            conn_w.begin()
+            try:
+                rows = backup.import_tables(conn_w, directory, mode)
+                conn_w.commit()
+            except backup.EmptyBackupError:
+                conn_w.rollback()
+                return jsonify({"ok": False, "error": "No table files in the archive"}), 400
+            except (duckdb.ConstraintException, duckdb.ConversionException,
+                    duckdb.InvalidInputException, duckdb.BinderException) as e:
+                conn_w.rollback()
+                return jsonify({"ok": False, "error": str(e)}), 400
+            except BaseException:
+                conn_w.rollback()
+                raise
+    finally:
+        rmtree(directory, ignore_errors=True)
+    return jsonify({"ok": True, "rows": rows})
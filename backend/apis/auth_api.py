@@ -2,12 +2,20 @@ from flask import Blueprint, request, jsonify, make_response
 
 from backend.db import connect_w, connect_r
 from backend.models import auth
+from backend.apis.require_auth import current_user, require_auth
+from backend.utils import hashing, scope
 
 from ..db import DB_FILE
 
 bp = Blueprint("auth_api", __name__, url_prefix="/auth")
 
 
+def _cookie_path() -> str:
+    # A household's session cookie is only sent to that household
+    household = scope.name()
+    return f"/api/{household}" if household is not None else "/"
+
+
 @bp.route("/login", methods=["POST"])
 def login():
     """
@@ -21,13 +29,28 @@ def login():
     if not name or not password:
         return jsonify({"ok": False, "error": "missing credentials"}), 400
     
+    with connect_r() as conn_r:
+        credentials = auth.get_credentials(conn_r, name)
+    if not credentials or not credentials[1]:
+        return jsonify({"ok": False, "error": "invalid credentials"}), 401
+    user_id, pw_hash, _ = credentials
+
+    # Hash without holding the database lock
+    try:
+        valid = hashing.check(name, pw_hash, password)
+    except hashing.HashingBusyError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+    if not valid:
+        return jsonify({"ok": False, "error": "invalid credentials"}), 401
+
     with connect_w() as conn_w:
-        token = auth.get_token(conn_w, name, password)
+        token = auth.issue_token(conn_w, user_id, name, pw_hash)
     if token is None:
         return jsonify({"ok": False, "error": "invalid credentials"}), 401
 
     resp = make_response(jsonify({"ok": True, "name": name}))
-    resp.set_cookie("session_token", token, httponly=True, samesite="Lax")
+    resp.set_cookie("session_token", token, httponly=True, samesite="Lax",
+                    path=_cookie_path())
     return resp
 
 
@@ -45,7 +68,7 @@ def logout():
         auth.remove_token(conn_w, token)
 
     resp = make_response(jsonify({"ok": True}))
-    resp.set_cookie("session_token", "", expires=0)
+    resp.set_cookie("session_token", "", expires=0, path=_cookie_path())
     return resp
 
 
@@ -70,8 +93,17 @@ def change_password():
     if not new_pw or not isinstance(new_pw, str):
         return jsonify({"ok": False, "error": "newPassword is required"}), 400
     
+    user = current_user(token)
+    if user is None:
+        return jsonify({"ok": False, "error": "Unauthenticated"}), 401
+    _, username = user
+    try:
+        new_hash = hashing.generate(username, new_pw)
+    except hashing.HashingBusyError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+
     with connect_w() as conn_w:
-        password_changed = auth.change_password(conn_w, token, new_pw)
+        password_changed = auth.set_password_hash(conn_w, token, new_hash)
 
     if password_changed:
         return jsonify({"ok": True})
@@ -79,6 +111,13 @@ def change_password():
         return jsonify({"ok": False, "error": "Unauthenticated"}), 401
 
 
+@bp.route("/hash-stats", methods=["GET"])
+@require_auth()
+def hash_stats(conn, user):
+    """Queue depth and latency of the password hashing pool."""
+    return jsonify(hashing.hashing_pool.stats())
+
+
 @bp.route("/me", methods=["GET"])
 def whoami():
     """
@@ -88,9 +127,7 @@ def whoami():
     if not token:
         return jsonify({"ok": False, "error": "unauthenticated"}), 401
 
-    with connect_r() as conn_r:
-        person = auth.get_person(conn_r, token)
-        
+    person = current_user(token)
     if person:
         return jsonify({"ok": True, "id": person[0], "name": person[1]})
     else:
@@ -1,8 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime, timezone, timedelta
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from json import dumps
 
+from backend.db import connect_consistent
 from backend.models import changelog
-from backend.db import connect_r
+from backend.apis.snapshot_reads import connect_read
 
 bp = Blueprint("changelog", __name__, url_prefix="/changelog")
 
@@ -12,54 +15,98 @@ def _normalize_iso(s: str) -> str:
     return s.replace("Z", "+00:00") if s.endswith("Z") else s
 
 
-@bp.route("/", methods=["GET"])
-def list_changelog():
+def _encode_cursor(cursor: changelog.Cursor) -> str:
+    created_at, id = cursor
+    return urlsafe_b64encode(f"{created_at.isoformat()}|{id}".encode()).decode()
+
+
+def _decode_cursor(s: str) -> changelog.Cursor:
+    created_at, _, id = urlsafe_b64decode(s.encode()).decode().partition("|")
+    return datetime.fromisoformat(created_at), int(id)
+
+
+def _time_window() -> tuple[datetime, datetime]:
     """
-    GET /changelog?from=<ISO>&to=<ISO>&limit=<n>
-    - from: ISO datetime string (optional, defaults to 30 days ago)
-    - to: ISO datetime string (optional, defaults to now UTC)
-    - limit: integer (optional, will slice the results)
+    Read `from`/`to` from the query string, defaulting to the last 30 days.
 
-    Returns JSON: { ok: True, entries: [{ created_at: ISO, description: str }, ...] }
+    Raises:
+        ValueError: If either is not an ISO datetime.
     """
     q_from: str | None = request.args.get("from")
     q_to: str | None = request.args.get("to")
-    limit = request.args.get("limit", type=int)
-
     now_utc = datetime.now(timezone.utc)
+    to_time = now_utc if q_to is None else datetime.fromisoformat(_normalize_iso(q_to))
+    from_time = (now_utc - timedelta(days=30) if q_from is None
+                 else datetime.fromisoformat(_normalize_iso(q_from)))
+    return from_time, to_time
 
-    # defaults
-    if q_to is None:
-        q_to_iso = now_utc.isoformat()
-    else:
-        q_to_iso = _normalize_iso(q_to)
 
-    if q_from is None:
-        q_from_iso = (now_utc - timedelta(days=30)).isoformat()
+def _entry(created_at: datetime, desc: str) -> dict[str, str]:
+    if isinstance(created_at, datetime):
+        created_str = created_at.isoformat()
     else:
-        q_from_iso = _normalize_iso(q_from)
+        created_str = str(created_at)
+    return {"created_at": created_str, "description": desc}
+
+
+@bp.route("/", methods=["GET"])
+def list_changelog():
+    """
+    GET /changelog?from=<ISO>&to=<ISO>&limit=<n>&cursor=<str>
+    - from: ISO datetime string (optional, defaults to 30 days ago)
+    - to: ISO datetime string (optional, defaults to now UTC)
+    - limit: integer (optional, page size)
+    - cursor: `next_cursor` of the previous page (optional)
+
+    Returns JSON: { ok: True, entries: [{ created_at: ISO, description: str }, ...],
+                    next_cursor: str | null }
+    `next_cursor` is only set when `limit` is given and the page is full.
+    """
+    limit = request.args.get("limit", type=int)
+    q_cursor = request.args.get("cursor")
+    if limit is not None and limit <= 0:
+        limit = None
 
-    # validate ISO strings
     try:
-        # datetime.fromisoformat will raise on invalid formats; accept it as validation
-        datetime.fromisoformat(q_from_iso)
-        datetime.fromisoformat(q_to_iso)
-    except Exception:
+        from_time, to_time = _time_window()
+    except ValueError:
         return jsonify({"ok": False, "error": "invalid ISO datetime in query parameters"}), 400
+    try:
+        after = _decode_cursor(q_cursor) if q_cursor else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid cursor"}), 400
 
-    with connect_r() as conn_r:
-        entries = changelog.get_changelog(conn_r, q_from_iso, q_to_iso)
+    with connect_read() as conn_r:
+        rows = changelog.page_changelog(conn_r, from_time, to_time, limit, after)
 
-    # apply optional limit (entries are already ordered newest-first in model)
-    if isinstance(limit, int) and limit > 0:
-        entries = entries[:limit]
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        last_id, last_created_at, _ = rows[-1]
+        next_cursor = _encode_cursor((last_created_at, last_id))
+
+    return jsonify({"ok": True,
+                    "entries": [_entry(created_at, desc) for _, created_at, desc in rows],
+                    "next_cursor": next_cursor})
+
+
+@bp.route("/export", methods=["GET"])
+def export_changelog():
+    """
+    GET /changelog/export?from=<ISO>&to=<ISO>
+    Streams every entry in the window as NDJSON, newest first, straight
+    from one read transaction. The lock is only held to start it.
+    """
+    try:
+        from_time, to_time = _time_window()
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid ISO datetime in query parameters"}), 400
 
-    out = []
-    for created_at, desc in entries:
-        if isinstance(created_at, datetime):
-            created_str = created_at.isoformat()
-        else:
-            created_str = str(created_at)
-        out.append({"created_at": created_str, "description": desc})
+    def generate():
+        with connect_consistent() as conn_r:
+            yield ""
+            for _, created_at, desc in changelog.iter_changelog(conn_r, from_time, to_time):
+                yield dumps(_entry(created_at, desc)) + "\n"
 
-    return jsonify({"ok": True, "entries": out})
+    chunks = stream_with_context(generate())
+    next(chunks) # Start the read here, so that a busy error is still a 503
+    return Response(chunks, mimetype="application/x-ndjson")
@@ -0,0 +1,41 @@
+from collections.abc import Callable
+
+from flask import Blueprint, Response, jsonify
+
+from backend.households import households
+from backend.utils import metrics
+from backend.utils.hashing import hashing_pool
+from backend.utils.read_snapshot import read_snapshot
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
+from backend.utils.write_behind import write_behind
+
+bp = Blueprint("metrics", __name__, url_prefix="/metrics")
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _collector(stats: Callable[[], dict]) -> Callable[[], dict[metrics.Labels, float]]:
+    def collect():
+        return {(("stat", key),): value for key, value in stats().items()}
+    return collect
+
+metrics.register_gauge("schedule_cache", "Schedule cache counters.",
+                       _collector(schedule_cache.stats))
+metrics.register_gauge("session_cache", "Session cache counters.",
+                       _collector(session_cache.stats))
+metrics.register_gauge("hashing_pool", "Password hashing pool counters.",
+                       _collector(hashing_pool.stats))
+metrics.register_gauge("write_behind", "Write-behind queue counters.",
+                       _collector(write_behind.stats))
+metrics.register_gauge("read_snapshot", "Read snapshot counters.",
+                       _collector(read_snapshot.stats))
+metrics.register_gauge("households", "Open household counters.",
+                       _collector(households.stats))
+
+
+@bp.get("")
+def get_metrics():
+    if not metrics.ENABLED:
+        return jsonify({"ok": False, "error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
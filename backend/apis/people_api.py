@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
-from backend.models import people, auth, changelog
-from backend.db import connect_r, connect_w
+from backend.models import people, auth, stats
+from backend.db import connect_w
 from urllib.parse import unquote_plus
+from backend.utils import write_behind
+from backend.apis.snapshot_reads import connect_read
 
 bp = Blueprint("people_api", __name__, url_prefix="/people")
 
@@ -15,12 +17,35 @@ def get_people():
     if group is not None:
         group = unquote_plus(group)
 
-    with connect_r() as conn_r:
+    with connect_read() as conn_r:
         if person is None:
             return jsonify(people.get_all_people(conn_r))
         else:
             return jsonify(people.get_person(conn_r, person))
 
+@bp.route("/stats", methods=["GET"])
+def get_stats():
+    """
+    GET /people/stats
+    Returns { ok: True, stats: { <name>: { assigned, done, completion_rate,
+              last_done: { year, week } | null, current_streak, longest_streak,
+              chores: { <chore>: { same fields without chores } } } } }
+    Served from the materialized person_stats table.
+    """
+    with connect_read() as conn_r:
+        return jsonify({"ok": True, "stats": stats.get_stats(conn_r)})
+
+@bp.route("/stats/<path:person>", methods=["GET"])
+def get_person_stats(person):
+    """GET /people/stats/<name>, the same as /people/stats for one person."""
+    person = unquote_plus(person)
+    with connect_read() as conn_r:
+        try:
+            person_stats = stats.get_stats(conn_r, person)
+        except people.NameNoFoundError as e:
+            return jsonify({"ok": False, "error": str(e)}), 404
+    return jsonify({"ok": True, "stats": person_stats[person]})
+
 @bp.route("/set-availability", methods=["POST"])
 def set_availability():
     token = request.cookies.get("session_token")
@@ -43,11 +68,10 @@ def set_availability():
             people.enable_person(conn_w, person)
         else:
             people.disable_person(conn_w, person)
-        changelog.add_changelog(
-            conn_w, 
-            f"{username} changed {person} to "
-            f"{"" if availability else "un"}available.",
-        )
+    write_behind.log_change(
+        f"{username} changed {person} to "
+        f"{"" if availability else "un"}available.",
+    )
     return jsonify({"ok": True})
 
 @bp.route("/remove", methods=["DELETE"])
@@ -66,10 +90,7 @@ def remove_person():
         if person is None:
             return jsonify({"ok": False, "error": "person is required."}), 400
         people.remove_person(conn_w, person)
-        changelog.add_changelog(
-            conn_w, 
-            f"{username} removed {person}.",
-        )
+    write_behind.log_change(f"{username} removed {person}.")
     return jsonify({"ok": True})
 
 @bp.route("/add/", methods=["POST"])
@@ -96,5 +117,5 @@ def add_person():
             return jsonify({"ok": False, "error": str(e)}), 409
         except people.InvalidGroupError as e:
             return jsonify({"ok": False, "error": str(e)}), 400
-        changelog.add_changelog(conn_w, f"{username} has added {person}.")
+    write_behind.log_change(f"{username} has added {person}.")
     return jsonify({"ok": True})
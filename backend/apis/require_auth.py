@@ -3,6 +3,15 @@ from functools import wraps
 
 from backend.models import auth
 from backend.db import connect_r, connect_w
+from backend.utils.session_cache import session_cache
+
+def current_user(token: str) -> tuple[int, str] | None:
+    """Resolve a session token, only opening a read connection on a cache miss."""
+    user = session_cache.get(token)
+    if user is None:
+        with connect_r() as conn_r:
+            user = auth.get_person(conn_r, token)
+    return user
 
 def require_auth(write: bool = False):
     """
@@ -22,11 +31,11 @@ def require_auth(write: bool = False):
             if not token:
                 return jsonify({"ok": False, "error": "Unauthenticated"}), 401
 
+            user = current_user(token)
+            if user is None:
+                return jsonify({"ok": False, "error": "Unauthenticated"}), 401
             ctx = connect_w() if write else connect_r()
             with ctx as conn:
-                user = auth.get_person(conn, token)
-                if user is None:
-                    return jsonify({"ok": False, "error": "Unauthenticated"}), 401
                 return fn(conn, user, *args, **kwargs)
         return wrapper
     return decorator
\ No newline at end of file
@@ -1,12 +1,25 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import date, timedelta
 from urllib.parse import unquote_plus
 
-from backend.models import schedules, auth, changelog
-from backend.db import connect_r, connect_w
+from backend.models import schedules, auth, history
+from backend.db import connect_w, connect_consistent
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils import write_behind
+from backend.apis.require_auth import require_auth
+from backend.apis.snapshot_reads import connect_read
 
 bp = Blueprint("schedules_api", __name__, url_prefix="/schedules")
 
+ARROW_STREAM: str = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON: str = "application/vnd.house.columnar+json"
+# ?format= value -> content type, see backend/models/history.py for the columnar ones
+RESPONSE_FORMATS: dict[str, str] = {
+    "json": "application/json",
+    "columnar": COLUMNAR_JSON,
+    "arrow": ARROW_STREAM,
+}
+
 
 @bp.route("/", methods=["GET"])
 def query_schedule():
@@ -23,17 +36,139 @@ def query_schedule():
         if week is None:
             week = w
 
+    payload = schedule_cache.get(year, week)
+    if payload is None:
+        epoch = schedule_cache.epoch()
+        try:
+            with connect_w() as conn_w:
+                schedule = schedules.get_schedule(conn_w, year, week)
+                due_days = schedules.get_due_str_for_chores(
+                    conn_w, schedule.keys(), year, week,
+                )
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+        payload = {"schedule": schedule, "due_days": due_days}
+        schedule_cache.put(year, week, payload, epoch)
+
+    return jsonify({"ok": True, "year": year, "week": week, **payload})
+
+@bp.route("/cache-stats", methods=["GET"])
+@require_auth()
+def query_cache_stats(conn, user):
+    return jsonify(schedule_cache.stats())
+
+def _response_format(default: str = "json") -> str | None:
+    """The format asked for with ?format=, or else the best match of the
+    Accept header. None if an unknown format is asked for."""
+    asked = request.args.get("format")
+    if asked is not None:
+        return asked if asked in RESPONSE_FORMATS else None
+    offered = [RESPONSE_FORMATS[default],
+               *(mimetype for format, mimetype in RESPONSE_FORMATS.items() if format != default)]
+    best = request.accept_mimetypes.best_match(offered, default=offered[0])
+    return next(format for format, mimetype in RESPONSE_FORMATS.items() if mimetype == best)
+
+def _columnar_response(document: str) -> Response:
+    # The document is built by DuckDB; only "ok" is added here
+    return Response('{"ok":true,' + document[1:], content_type=COLUMNAR_JSON)
+
+def _arrow_response(start: tuple[int, int], end: tuple[int, int]):
+    """Stream the stored assignments as Arrow IPC. The read transaction
+    only holds the lock while it starts."""
+    if history.pa is None:
+        return jsonify({"ok": False, "error": str(history.ArrowUnavailableError())}), 406
+
+    def generate():
+        with connect_consistent() as conn_r:
+            yield b""
+            yield from history.arrow_stream(conn_r, start, end)
+
+    chunks = stream_with_context(generate())
+    next(chunks) # Start the read here, so that a busy error is still a 503
+    return Response(chunks, content_type=ARROW_STREAM)
+
+def _parse_year_week(s: str) -> tuple[int, int]:
+    """Accept "YYYY-WW" or ISO "YYYY-Www"."""
+    year, _, week = s.partition("-")
+    return int(year), int(week.removeprefix("W"))
+
+@bp.route("/range", methods=["GET"])
+def query_schedule_range():
+    """
+    GET /schedules/range?from=YYYY-WW&to=YYYY-WW
+    Both ends are inclusive and default to the current ISO year/week.
+    Returns JSON: { ok: True, weeks: [{ year, week, schedule, due_days }, ...] }
+    Missing weeks are only generated from the current week on; missing
+    past weeks are empty.
+    With format=columnar or format=arrow (or the matching Accept header),
+    returns the assignments of the weeks in columnar form instead, without
+    due days. In worker mode the Arrow stream is read from the latest
+    snapshot, which may not have weeks generated by this request yet.
+    """
+    current = tuple(date.today().isocalendar()[:2])
+    q_from = request.args.get("from")
+    q_to = request.args.get("to")
+    try:
+        start = _parse_year_week(q_from) if q_from else current
+        end = _parse_year_week(q_to) if q_to else current
+    except ValueError:
+        return jsonify({"ok": False, "error": "from/to must look like YYYY-WW"}), 400
+
+    format = _response_format()
+    if format is None:
+        return jsonify({"ok": False, "error": "format must be json, columnar or arrow"}), 400
+    if format != "json":
+        try:
+            with connect_w() as conn_w:
+                schedules.check_range(start, end)
+                if end >= current: # Like get_schedules, no past weeks
+                    schedules.backfill(conn_w, max(start, current), end)
+                if format == "columnar":
+                    return _columnar_response(history.columnar_json(conn_w, start, end))
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+        return _arrow_response(start, end)
+
+    epoch = schedule_cache.epoch()
     try:
         with connect_w() as conn_w:
-            schedule = schedules.get_schedule(conn_w, year, week)
-            due_days = schedules.get_due_str_for_chores(
-                conn_w, schedule.keys(), year, week,
-            )
+            weeks = schedules.get_schedules(conn_w, start, end)
     except ValueError as e:
         return jsonify({"ok": False, "error": str(e)}), 400
+    for year, week, schedule, due_days in weeks:
+        # A missing past week is left to be generated by GET /schedules/
+        if schedule or (year, week) >= current:
+            schedule_cache.put(year, week, 
+                               {"schedule": schedule, "due_days": due_days}, epoch)
 
-    return jsonify({"ok": True, "year": year, "week": week, 
-                    "schedule": schedule, "due_days": due_days})
+    return jsonify({"ok": True,
+                    "weeks": [{"year": year, "week": week,
+                               "schedule": schedule, "due_days": due_days}
+                              for year, week, schedule, due_days in weeks]})
+
+@bp.route("/history", methods=["GET"])
+def query_history():
+    """
+    GET /schedules/history?from=YYYY-WW&to=YYYY-WW&format=columnar|arrow
+    The stored assignments of the weeks, for bulk consumers. Nothing is
+    generated, and the range is not limited. `from` defaults to the 
+    beginning and `to` to the current ISO year/week. The default format is
+    columnar JSON.
+    """
+    q_from = request.args.get("from")
+    q_to = request.args.get("to")
+    try:
+        start = _parse_year_week(q_from) if q_from else (0, 1)
+        end = _parse_year_week(q_to) if q_to else tuple(date.today().isocalendar()[:2])
+    except ValueError:
+        return jsonify({"ok": False, "error": "from/to must look like YYYY-WW"}), 400
+    format = _response_format(default="columnar")
+    if format not in ("columnar", "arrow"):
+        return jsonify({"ok": False, "error": "format must be columnar or arrow"}), 400
+    if format == "arrow":
+        return _arrow_response(start, end)
+    with connect_read() as conn_r:
+        return _columnar_response(history.columnar_json(conn_r, start, end))
 
 @bp.route("/max-weeks-from-now", methods=["GET"])
 def query_max_weeks_from_now():
@@ -49,7 +184,7 @@ def next_week():
             year = y
         if week is None:
             week = w
-    with connect_r() as conn_r:
+    with connect_read() as conn_r:
         next_week = schedules.next_week(conn_r, year, week)
         return jsonify({"year": next_week[0], "week": next_week[1]}
                        if next_week else None)
@@ -64,12 +199,22 @@ def last_week():
             year = y
         if week is None:
             week = w
-    with connect_r() as conn_r:
+    with connect_read() as conn_r:
         last_week = schedules.last_week(conn_r, year, week)
         return jsonify({"year": last_week[0], "week": last_week[1]}
                        if last_week else None)
     
 
+def _queue_status(assignment_id: int, status: bool):
+    """Hand the toggle to the write-behind queue. Whether it changes anything
+    is not known yet, so this answers 202 rather than 404 for no change."""
+    try:
+        write_behind.write_behind.set_status(assignment_id, status)
+    except write_behind.WriteBehindFullError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+    return jsonify({"ok": True, "queued": True}), 202
+
+
 @bp.route("/mark-done", methods=["POST"])
 def mark_done():
     """
@@ -81,8 +226,16 @@ def mark_done():
     if assignment_id is None:
         return jsonify({"ok": False, "error": "assignment_id (int) required as query parameter"}), 400
 
+    if write_behind.active():
+        return _queue_status(assignment_id, True)
     with connect_w() as conn_w:
-        changed = schedules.mark_done(conn_w, assignment_id)
+        conn_w.begin()
+        try:
+            changed = schedules.mark_done(conn_w, assignment_id)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
     if not changed:
         return jsonify({"ok": False, "error": "no change (assignment not found or already done)"}), 404
 
@@ -99,14 +252,66 @@ def mark_not_done():
     if assignment_id is None:
         return jsonify({"ok": False, "error": "assignment_id (int) required as query parameter"}), 400
 
+    if write_behind.active():
+        return _queue_status(assignment_id, False)
     with connect_w() as conn_w:
-        changed = schedules.mark_not_done(conn_w, assignment_id)
+        conn_w.begin()
+        try:
+            changed = schedules.mark_not_done(conn_w, assignment_id)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
     if not changed:
         return jsonify({"ok": False, "error": "no change (assignment not found or already not-done)"}), 404
 
     return jsonify({"ok": True})
 
 
+@bp.route("/set-status", methods=["POST"])
+def set_status():
+    """
+    POST JSON { "status": bool, "assignment_ids": [int, ...] }
+           or { "status": bool, "year": int, "week": int, "chore": str }
+    Sets the status of every listed assignment, or of every assignment of
+    the chore in that week, in one transaction.
+    Returns { ok: True, results: { "<assignment_id>": bool, ... } } where 
+    false means the assignment does not exist.
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    if not isinstance(status, bool):
+        return jsonify({"ok": False, "error": "status (bool) is required"}), 400
+    assignment_ids = data.get("assignment_ids")
+    year, week, chore = data.get("year"), data.get("week"), data.get("chore")
+    if assignment_ids is not None:
+        if (not isinstance(assignment_ids, list) 
+            or not all(type(i) is int for i in assignment_ids)):
+            return jsonify({"ok": False, "error": "assignment_ids must be a list of int"}), 400
+    elif not (type(year) is int and type(week) is int and isinstance(chore, str)):
+        return jsonify({"ok": False, 
+                        "error": "assignment_ids or year, week and chore are required"}), 400
+
+    if write_behind.active():
+        # Keep the order of writes per assignment
+        try:
+            write_behind.write_behind.flush()
+        except write_behind.WriteBehindTimeoutError as e:
+            return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+    with connect_w() as conn_w:
+        conn_w.begin()
+        try:
+            if assignment_ids is not None:
+                results = schedules.set_status(conn_w, assignment_ids, status)
+            else:
+                results = schedules.set_chore_status(conn_w, year, week, chore, status)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
+    return jsonify({"ok": True, "results": results})
+
+
 @bp.route("/reset-future-schedules", methods=["POST"])
 def reset_future_schedules():
     """
@@ -128,11 +333,16 @@ def reset_future_schedules():
             reason = f"because: \"{unquote_plus(reason)}\""
         else:
             reason = "for no reason"
-        schedules.remove_future_schedules(conn_w)
-        year, week, _ = (date.today() + timedelta(7)).isocalendar()
-        changelog.add_changelog(
-            conn_w,
-            f"{username} has reset the schedule "
-            f"from week {week}, {year} onward {reason}."
-        )
+        conn_w.begin()
+        try:
+            schedules.remove_future_schedules(conn_w)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
+    year, week, _ = (date.today() + timedelta(7)).isocalendar()
+    write_behind.log_change(
+        f"{username} has reset the schedule "
+        f"from week {week}, {year} onward {reason}."
+    )
     return jsonify({"ok": True})
@@ -0,0 +1,16 @@
+from flask import g
+from contextlib import contextmanager
+from collections.abc import Generator
+from duckdb import DuckDBPyConnection
+
+from backend.utils import read_snapshot
+
+@contextmanager
+def connect_read() -> Generator[DuckDBPyConnection, None, None]:
+    """`connect_r` for read-only endpoints, served from the read snapshot 
+    when it is enabled. The snapshot version ends up in the 
+    X-Snapshot-Version response header."""
+    with read_snapshot.connect() as (conn, version):
+        if version is not None:
+            g.snapshot_version = version
+        yield conn
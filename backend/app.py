@@ -1,11 +1,70 @@
-from flask import Flask, send_from_directory
-from backend.apis import api
+from time import perf_counter
 
-app = Flask(__name__, static_folder="../frontend/dist", static_url_path="")
+import os
+
+from flask import Flask, g, request, jsonify
+from backend.apis import api, household_api
+from backend import db, households
+from backend.utils import metrics, write_behind
+from backend.utils.static_files import StaticFiles
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
+
+# The built frontend is served by `static_files`, not by Flask's static route
+app = Flask(__name__, static_folder=None)
+static_files = StaticFiles(os.path.join(os.path.dirname(__file__), "..", "frontend", "dist"))
+if os.path.isdir(static_files.root):
+    static_files.precompress()
 
 app.register_blueprint(api)
+app.register_blueprint(household_api)
+
+@app.before_request
+def follow_snapshot():
+    # In worker mode reads come from the writer's snapshots; drop whatever 
+    # was cached from an older one
+    if db.WRITER_ADDRESS is not None and db.snapshot_changed():
+        schedule_cache.clear()
+        session_cache.clear()
+
+@app.before_request
+def start_timer():
+    g.request_start = perf_counter()
+
+@app.after_request
+def record_latency(response):
+    # Label by the route template, not the URL, to keep the series few
+    if metrics.ENABLED and "request_start" in g:
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.request_seconds.observe(perf_counter() - g.request_start,
+                                        method=request.method, route=rule,
+                                        status=str(response.status_code))
+    return response
+
+@app.errorhandler(db.WriterUnavailableError)
+def writer_unavailable(e):
+    return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(db.LongReadsBusyError)
+def long_reads_busy(e):
+    return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(write_behind.WriteBehindFullError)
+def write_behind_full(e):
+    return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "1"}
+
+@app.errorhandler(households.UnknownHouseholdError)
+def unknown_household(e):
+    return jsonify({"ok": False, "error": str(e)}), 404
+
+@app.errorhandler(households.HouseholdsUnavailableError)
+def households_unavailable(e):
+    return jsonify({"ok": False, "error": str(e)}), 503
+
 @app.route("/")
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def index_page(path):
-    return send_from_directory(app.static_folder, "index.html")
+    if path == "api" or path.startswith("api/"):
+        return jsonify({"ok": False, "error": "Not found"}), 404
+    return static_files.serve(request, path)
@@ -1,25 +1,417 @@
 import duckdb
 from werkzeug.security import generate_password_hash
+import json
 import os
-from json import load
-from typing import Generator
+import atexit
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from time import monotonic, perf_counter
+from typing import Any, Callable, Generator, override
 from contextlib import contextmanager
-from threading import RLock
+from threading import RLock, Lock, BoundedSemaphore, local
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
+from backend.models import legacy, workload, stats
+from backend.utils import metrics, scope
 
 DB_FILE = os.path.join(os.path.dirname(__file__), "chores.db")
+POOL_SIZE: int = 8
+HEALTH_CHECK_INTERVAL: float = 30.0 # Seconds a cursor may idle before it is probed
+LONG_READS: int = 2 # Long reads at once, such as downloads, on top of POOL_SIZE
+LONG_READ_TIMEOUT: float = 5.0 # Seconds a long read waits for its turn
 lock = RLock()
+write_hooks: list[Callable[[], None]] = [] # Called after each `connect_w` block
+
+# Worker mode, see backend/writer.py. When WRITER_ADDRESS is set, this 
+# process never opens DB_FILE itself: `connect_w` runs statements in the
+# writer process and `connect_r` reads the latest snapshot it published.
+WRITER_ADDRESS: str | None = None
+WRITER_AUTHKEY: bytes | None = None # Random per run, set by serve.py
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "snapshots")
+
+class WriterUnavailableError(Exception):
+    @override
+    def __init__(self, *args):
+        super().__init__("The database writer is unavailable. Try again later.")
+
+class LongReadsBusyError(Exception):
+    @override
+    def __init__(self, *args):
+        super().__init__("Too many downloads in progress. Try again later.")
+
+class ConnectionPool:
+    """
+    Keeps one long-lived DuckDB database instance open and hands out 
+    cursors on it. A thread keeps the same cursor while it is nested 
+    inside `connect_r`/`connect_w`, and cursors are returned to an idle
+    list afterwards instead of being closed. At most `size` cursors 
+    exist at any time, plus `long_reads` from `long_cursor`.
+    """
+    def __init__(self, path: str, size: int = POOL_SIZE, read_only: bool = False,
+                 long_reads: int = LONG_READS):
+        self.path = path
+        self.size = size
+        self.read_only = read_only
+        self._db: duckdb.DuckDBPyConnection | None = None
+        self._idle: list[tuple[duckdb.DuckDBPyConnection, float]] = []
+        self._out = 0 # Cursors currently checked out
+        self._closing = False
+        self._guard = Lock()
+        self._slots = BoundedSemaphore(size)
+        self._long_slots = BoundedSemaphore(long_reads)
+        self._local = local()
+
+    def _database(self) -> duckdb.DuckDBPyConnection:
+        with self._guard:
+            if self._db is None:
+                self._db = duckdb.connect(self.path, self.read_only)
+            return self._db
+
+    def _healthy(self, cursor: duckdb.DuckDBPyConnection) -> bool:
+        try:
+            cursor.execute("SELECT 1").fetchone()
+        except duckdb.Error:
+            return False
+        return True
+
+    def _checkout(self) -> duckdb.DuckDBPyConnection:
+        self._slots.acquire()
+        try:
+            with self._guard:
+                cursor, idle_since = self._idle.pop() if self._idle else (None, 0.0)
+                self._out += 1
+            if (cursor is not None 
+                and monotonic() - idle_since > HEALTH_CHECK_INTERVAL
+                and not self._healthy(cursor)):
+                cursor.close()
+                cursor = None
+            if cursor is None:
+                cursor = self._database().cursor()
+            return cursor
+        except BaseException:
+            with self._guard:
+                self._out -= 1
+            self._slots.release()
+            raise
+
+    def _checkin(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        with self._guard:
+            self._out -= 1
+            if self._closing: # Pool closed while the cursor was out
+                cursor.close()
+                if self._out == 0:
+                    self._close_database()
+            else:
+                self._idle.append((cursor, monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def cursor(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            # Nested use in the same thread shares the outer cursor
+            yield held
+            return
+        start = perf_counter()
+        cursor = self._checkout()
+        if metrics.ENABLED:
+            metrics.connection_open_seconds.observe(perf_counter() - start)
+        self._local.held = cursor
+        try:
+            yield cursor
+        except BaseException:
+            try:
+                cursor.rollback()
+            except duckdb.Error:
+                pass # No transaction was open
+            raise
+        finally:
+            self._local.held = None
+            self._checkin(cursor)
+
+    @contextmanager
+    def long_cursor(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        """A cursor for reads that may last as long as a slow client, such as
+        streamed downloads. It does not take one of the `size` slots, so
+        writers never wait for those reads.
+
+        Raises:
+            LongReadsBusyError: If no long read ends within LONG_READ_TIMEOUT.
+        """
+        if not self._long_slots.acquire(timeout=LONG_READ_TIMEOUT):
+            raise LongReadsBusyError()
+        try:
+            with self._guard:
+                self._out += 1
+            cursor = None
+            try:
+                cursor = self._database().cursor()
+                yield cursor
+            finally:
+                with self._guard:
+                    self._out -= 1
+                    if cursor is not None:
+                        cursor.close()
+                    if self._closing and self._out == 0:
+                        self._close_database()
+        finally:
+            self._long_slots.release()
+
+    def _close_database(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self._closing = False
+
+    def close(self) -> None:
+        """Close every idle cursor and the database instance. Closing the 
+        database would break cursors still in use, so with any checked out 
+        it is closed when the last one is returned. The pool reopens lazily 
+        if it is used again."""
+        with self._guard:
+            for cursor, _ in self._idle:
+                cursor.close()
+            self._idle.clear()
+            if self._out:
+                self._closing = True
+            else:
+                self._close_database()
+
+_pool: ConnectionPool | None = None
+
+def get_pool() -> ConnectionPool:
+    """The pool of the current household, see backend/households.py, or
+    of DB_FILE."""
+    household = scope.current.get()
+    if household is not None:
+        return household.pool
+    global _pool
+    pool = _pool
+    if pool is not None and pool.path == DB_FILE: # Readers skip the lock
+        return pool
+    with lock:
+        if _pool is None or _pool.path != DB_FILE:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_FILE)
+        return _pool
+
+def close_pool() -> None:
+    global _pool, _snapshot_pool
+    with lock:
+        for pool in (_pool, _snapshot_pool):
+            if pool is not None:
+                pool.close()
+        _pool = _snapshot_pool = None
+
+atexit.register(close_pool)
+
+_snapshot_pool: ConnectionPool | None = None
+
+def current_snapshot() -> str | None:
+    """Path of the latest snapshot published by the writer, if any."""
+    try:
+        with open(os.path.join(SNAPSHOT_DIR, "CURRENT"), 'r') as file:
+            return os.path.join(SNAPSHOT_DIR, file.read().strip())
+    except FileNotFoundError:
+        return None
+
+def get_snapshot_pool() -> ConnectionPool:
+    """
+    Raises:
+        WriterUnavailableError: If no snapshot has been published yet.
+    """
+    global _snapshot_pool
+    path = current_snapshot()
+    if path is None:
+        raise WriterUnavailableError()
+    with lock:
+        if _snapshot_pool is None or _snapshot_pool.path != path:
+            if _snapshot_pool is not None:
+                _snapshot_pool.close()
+            _snapshot_pool = ConnectionPool(path, read_only=True)
+        return _snapshot_pool
+
+_seen_snapshot: str | None = None
+
+def snapshot_changed() -> bool:
+    """Whether a new snapshot was published since the last call. Caches 
+    filled from an older snapshot should be cleared when it was."""
+    global _seen_snapshot
+    path = current_snapshot()
+    changed, _seen_snapshot = path != _seen_snapshot, path
+    return changed
+
+class RemoteConnection:
+    """
+    Stands in for a DuckDB connection in worker mode. Every statement is 
+    run by the writer within one session, which holds the writer's lock 
+    until `close()`. Results are fetched eagerly and served locally.
+
+    Raises:
+        WriterUnavailableError: Whenever the writer cannot be reached.
+    """
+    def __init__(self, address: str):
+        if WRITER_AUTHKEY is None: # Client would connect unauthenticated
+            raise WriterUnavailableError()
+        try:
+            self._conn = Client(address, family="AF_UNIX", authkey=WRITER_AUTHKEY)
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise WriterUnavailableError() from e
+        self._rows: deque[tuple] = deque()
+        self._call("open")
+
+    def _call(self, *message) -> Any:
+        try:
+            self._conn.send(message)
+            status, value = self._conn.recv()
+        except (OSError, EOFError) as e:
+            raise WriterUnavailableError() from e
+        if status == "error":
+            name, text = value
+            error = getattr(duckdb, name, duckdb.Error)
+            if not (isinstance(error, type) and issubclass(error, Exception)):
+                error = duckdb.Error
+            raise error(text)
+        return value
+
+    def execute(self, query: str, parameters: Any = None) -> "RemoteConnection":
+        self._rows = deque(self._call("execute", query, parameters))
+        return self
+
+    def fetchone(self) -> tuple | None:
+        return self._rows.popleft() if self._rows else None
+
+    def fetchmany(self, size: int = 1) -> list[tuple]:
+        return [self._rows.popleft() for _ in range(min(size, len(self._rows)))]
+
+    def fetchall(self) -> list[tuple]:
+        rows, self._rows = list(self._rows), deque()
+        return rows
+
+    def begin(self) -> None:
+        self._call("begin")
+
+    def commit(self) -> None:
+        self._call("commit")
+
+    def rollback(self) -> None:
+        self._call("rollback")
+
+    def close(self, abort: bool = False) -> None:
+        """End the session. `abort` rolls back an open transaction."""
+        try:
+            self._call("abort" if abort else "close")
+        finally:
+            self._conn.close()
+
+_remote = local()
+
+@contextmanager
+def _connect_remote() -> Generator[RemoteConnection, None, None]:
+    held = getattr(_remote, "held", None)
+    if held is not None:
+        yield held
+        return
+    conn = RemoteConnection(WRITER_ADDRESS)
+    _remote.held = conn
+    try:
+        yield conn
+    except BaseException:
+        _remote.held = None
+        try:
+            conn.close(abort=True)
+        except WriterUnavailableError:
+            pass # The writer rolls back sessions it loses anyway
+        raise
+    _remote.held = None
+    conn.close()
+
+_lock_depth = local()
+
+@contextmanager
+def _locked(mode: str) -> Generator[None, None, None]:
+    """`with lock`, or the lock of the current household, timing the wait
+    for it and how long the outermost block held it."""
+    household = scope.current.get()
+    held = household.lock if household is not None else lock
+    if not metrics.ENABLED:
+        with held:
+            yield
+        return
+    depth = getattr(_lock_depth, "depth", 0)
+    start = perf_counter()
+    with held:
+        acquired = perf_counter()
+        _lock_depth.depth = depth + 1
+        try:
+            yield
+        finally:
+            _lock_depth.depth = depth
+            if depth == 0:
+                metrics.lock_wait_seconds.observe(acquired - start, mode=mode)
+                metrics.lock_hold_seconds.observe(perf_counter() - acquired, mode=mode)
+
+def instrument(conn: Any) -> Any:
+    """Time the queries of `conn` if metrics are enabled."""
+    return metrics.InstrumentedConnection(conn) if metrics.ENABLED else conn
+
+def _through_writer() -> bool:
+    # Households are always opened by this process
+    return WRITER_ADDRESS is not None and scope.current.get() is None
+
 @contextmanager
 def connect_r() -> Generator[duckdb.DuckDBPyConnection, None, None]:
-    with lock:
-        with duckdb.connect(DB_FILE, True) as conn:
-            yield conn
+    if _through_writer():
+        # Snapshots never change, so no lock is needed
+        with get_snapshot_pool().cursor() as conn:
+            yield instrument(conn)
+        return
+    with _locked("r"):
+        with get_pool().cursor() as conn:
+            yield instrument(conn)
 
 @contextmanager
 def connect_w() -> Generator[duckdb.DuckDBPyConnection, None, None]:
-    with lock:
-        with duckdb.connect(DB_FILE, False) as conn:
-            yield conn
+    if _through_writer():
+        with _connect_remote() as conn:
+            yield instrument(conn)
+        return
+    with _locked("w"):
+        with get_pool().cursor() as conn:
+            yield instrument(conn)
+    if scope.current.get() is None: # The hooks follow DB_FILE
+        for hook in write_hooks:
+            hook()
+
+@contextmanager
+def connect_consistent() -> Generator[duckdb.DuckDBPyConnection, None, None]:
+    """A read-only cursor for long reads such as backups. Its transaction
+    starts under the lock, so it sees every table as of that moment, and is
+    then used without holding the lock. It comes from the pool's long read
+    budget, see `ConnectionPool.long_cursor`.
 
+    Raises:
+        LongReadsBusyError: If too many long reads are running.
+    """
+    if _through_writer():
+        # Snapshots never change
+        with get_snapshot_pool().long_cursor() as conn:
+            yield instrument(conn)
+        return
+    with get_pool().long_cursor() as conn:
+        begin_consistent(conn)
+        yield instrument(conn)
+        conn.rollback()
+
+def begin_consistent(conn: duckdb.DuckDBPyConnection) -> None:
+    """Begin a transaction on the pooled cursor `conn` that sees every
+    table as of now. Only this takes the lock."""
+    with _locked("r"):
+        conn.begin()
+        # DuckDB fixes what a transaction sees at its first read
+        conn.execute("SELECT 1 FROM people LIMIT 0")
 
 def create_tables() -> None:
     with connect_w() as conn:
@@ -62,8 +454,10 @@ def create_tables() -> None:
             chore_id INTEGER NOT NULL REFERENCES chores(id),
             week INTEGER NOT NULL,
             year INTEGER NOT NULL,
+            year_week INTEGER NOT NULL, -- See YEAR_WEEK
             assignee TEXT NOT NULL, -- Doesnt reference table people for flexibility. How much larger can this db be, right
             status BOOLEAN NOT NULL DEFAULT false,
+            CHECK (year_week = year * 100 + week),
         );
         """)
         conn.execute("""
@@ -73,6 +467,138 @@ def create_tables() -> None:
             created_at TIMESTAMP WITH TIME ZONE DEFAULT current_timestamp,
         );
         """)
+        conn.execute(WORKLOAD_TABLE)
+        conn.execute(PERSON_STATS_TABLE)
+        create_indexes(conn)
+
+# Counters kept in step with assignments, see backend/models/workload.py
+WORKLOAD_TABLE = """
+    CREATE TABLE IF NOT EXISTS workload (
+        assignee TEXT NOT NULL,
+        chore_id INTEGER NOT NULL,
+        assigned INTEGER NOT NULL DEFAULT 0,
+        done INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (assignee, chore_id),
+    );
+    """
+# Materialized statistics, see backend/models/stats.py
+PERSON_STATS_TABLE = """
+    CREATE TABLE IF NOT EXISTS person_stats (
+        assignee TEXT NOT NULL,
+        chore_id INTEGER NOT NULL,
+        assigned INTEGER NOT NULL,
+        done INTEGER NOT NULL,
+        last_done INTEGER, -- year * 100 + week
+        current_streak INTEGER NOT NULL,
+        longest_streak INTEGER NOT NULL,
+        run_start INTEGER,
+        longest_before INTEGER NOT NULL,
+        next_miss INTEGER,
+        PRIMARY KEY (assignee, chore_id),
+    );
+    """
+
+# DuckDB only scans an ART index for an equality (or a selective one-sided
+# range) on the indexed column itself, never for `year = ? AND week = ?`, an
+# expression, or a table that is joined. So every assignment stores its week
+# as one key, which ISO weeks of at most 53 keep in order, and week lookups
+# compare that before joining.
+YEAR_WEEK = "year * 100 + week"
+INDEXES: dict[str, tuple[str, str]] = {
+    "idx_assignments_year_week": ("assignments", "year_week"),
+    "idx_assignments_assignee": ("assignments", "assignee"),
+    "idx_people_session_token": ("people", "session_cookie_token"),
+}
+# Dropped by `migrate`. The changelog is only read by time ranges with
+# both ends, which DuckDB never answers from an index.
+OBSOLETE_INDEXES: tuple[str, ...] = ("idx_assignments_year", "idx_changelog_created_at")
+# (description, table, query, sample parameters) checked by `check_indexes`
+HOT_QUERIES: tuple[tuple[str, str, str, tuple], ...] = (
+    ("assignments by week", "assignments",
+     """WITH stored AS MATERIALIZED (SELECT id, chore_id FROM assignments WHERE year_week = ?)
+        SELECT chores.name, stored.id FROM stored JOIN chores ON (stored.chore_id = chores.id)""",
+     (200001,)),
+    ("assignments by assignee", "assignments",
+     "SELECT id FROM assignments WHERE assignee = ?", ("",)),
+    ("people by session token", "people",
+     "SELECT id, name FROM people WHERE session_cookie_token = ?", ("",)),
+    ("people by name", "people",
+     "SELECT id FROM people WHERE name = ?", ("",)),
+    ("chores by name", "chores",
+     "SELECT frequency FROM chores WHERE name = ?", ("",)),
+)
+
+def create_indexes(conn: duckdb.DuckDBPyConnection) -> None:
+    """Create every index in INDEXES whose table exists."""
+    tables = {name for name, in conn.execute(
+        "SELECT table_name FROM duckdb_tables()").fetchall()}
+    for index, (table, column) in INDEXES.items():
+        if table in tables:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table}({column})")
+
+def migrate() -> None:
+    """Bring an existing database up to date. Safe to run at every startup."""
+    with connect_w() as conn:
+        tables = {name for name, in conn.execute(
+            "SELECT table_name FROM duckdb_tables()").fetchall()}
+        columns = set(conn.execute(
+            """SELECT table_name, column_name FROM duckdb_columns()
+               WHERE database_name = current_database()""").fetchall())
+        if "assignments" in tables and ("assignments", "year_week") not in columns:
+            # ALTER TABLE cannot add the NOT NULL and CHECK constraints
+            conn.begin()
+            try:
+                conn.execute("ALTER TABLE assignments ADD COLUMN year_week INTEGER")
+                conn.execute(f"UPDATE assignments SET year_week = {YEAR_WEEK}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        for index in OBSOLETE_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        create_indexes(conn)
+        if "person_stats" in tables and ("person_stats", "next_miss") not in columns:
+            # Written before the runs were stored, it is rebuilt below
+            conn.execute("DROP TABLE person_stats")
+            tables.discard("person_stats")
+        for table, ddl, rebuild in (("workload", WORKLOAD_TABLE, workload.rebuild),
+                                    ("person_stats", PERSON_STATS_TABLE, stats.rebuild)):
+            if "assignments" in tables and table not in tables:
+                conn.begin()
+                try:
+                    conn.execute(ddl)
+                    rebuild(conn)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+
+def _scans(node: dict[str, Any]) -> Generator[dict[str, Any], None, None]:
+    """The table scans of an EXPLAIN (FORMAT json) plan."""
+    if node.get("operator_type") == "TABLE_SCAN":
+        yield node["extra_info"]
+    for child in node.get("children", []):
+        yield from _scans(child)
+
+def check_indexes() -> list[str]:
+    """
+    Returns:
+        list[str]: Descriptions of the hot queries that DuckDB currently 
+            answers with a sequential scan of their table. Small tables 
+            are usually scanned regardless of indexes.
+    """
+    out = []
+    with connect_r() as conn:
+        for description, table, query, params in HOT_QUERIES:
+            try:
+                rows = conn.execute(f"EXPLAIN (ANALYZE, FORMAT json) {query}", params).fetchall()
+            except duckdb.CatalogException: # Table not created yet
+                continue
+            # A sample value outside every row group is answered without a scan
+            if any(scan.get("Table") == table and scan.get("Type") == "Sequential Scan"
+                   for scan in _scans(json.loads(rows[0][1]))):
+                out.append(description)
+    return out
         
 def fill_data() -> None:
     try:
@@ -94,85 +620,30 @@ def fill_data() -> None:
         convert_old_records()
         
 def reset() -> None:
+    close_pool()
+    schedule_cache.clear()
+    session_cache.clear()
     if os.path.exists(DB_FILE):
         os.remove(DB_FILE)
     create_tables()
     fill_data()
 
 def add_chore(json_path: str) -> None:
-    try:
-        with open("chore_descriptions.json", 'r') as file:
-            DESCRIPTION = load(file)
-    except FileNotFoundError:
-        DESCRIPTION = {"Kitchen Cleaning": "Here's the description",
-                       "House Vacuuming": "Here's the description", 
-                       "Basement Cleaning": "Here's the description",
-                       "Glass Garbage": "Here's the description",
-                       "Cardboard Garbage": "Here's the description",
-                       "Organic Garbage": "Here's the description",
-                       "Plastic Garbage":"Here's the description",
-                       "Bathroom & Toilet - Stairs": "Here's the description",
-                       "Bathroom & Toilet - Main Gate": "Here's the description",
-                       "Bathroom & Toilet - Upstairs": "Here's the description"}
-    with open(json_path, 'r') as json_file:
-        chores = load(json_file)
     with connect_w() as conn:
-        for chore in chores:
-            name = chore["name"]
-            if name.endswith("North"):
-                name = "Bathroom & Toilet - Stairs"
-            elif name.endswith("South"):
-                name = "Bathroom & Toilet - Main Gate"
-            elif name.endswith("Second Floor"):
-                name = "Bathroom & Toilet - Upstairs"
-            group = chore["namelist"]
-            if group == "namelist.json":
-                group = "everyone"
-            elif group == "namelist_north.json":
-                group = "stairs"
-            elif group == "namelist_south.json":
-                group = "main_gate"
-            elif group == "namelist_second_floor.json":
-                group = "upstairs"
-            elif group not in {"everyone", "stairs", "main_gate", "upstairs"}:
-                raise ValueError(f"Invalid group. Got {repr(group)}.")
-            conn.execute("""INSERT INTO chores(name, description, image_path, frequency, people_group, assignee_count) VALUES (?, ?, ?, ?, ?, ?)""",
-                         (name, DESCRIPTION[name], f"{name}.png", chore["how_often"], group, chore["num_of_people"]))
-
-def convert_old_records(path: str = "record.json"):
-    NAME_ID_MAPPING = {
-        "Kitchen Cleaning": 1,
-        "House Vacuuming": 2,
-        "Basement Cleaning": 3,
-        "Glass Garbage": 4,
-        "Cardboard Garbage": 5,
-        "Organic Garbage": 6,
-        "Plastic Garbage": 7,
-        "Bathroom & Toilet - Stairs": 8,
-        "Bathroom & Toilet - Main Gate": 9,
-        "Bathroom & Toilet - Upstairs": 10,
-    }
-    with open(path, 'r') as record_file:
-        records = load(record_file)
+        legacy.import_chores(conn, json_path)
+
+def convert_old_records(path: str = "record.json") -> legacy.ImportReport:
+    """Import the legacy record file at `path` in one transaction, see
+    `legacy.import_records`."""
     with connect_w() as conn:
-        for weekyear, schedule in records.items():
-            week, year = map(int, weekyear.split())
-            for info in schedule.values():
-                chore_name: str = info["chore_name"]
-                if chore_name.endswith("North"):
-                    chore_name = "Bathroom & Toilet - Stairs"
-                elif chore_name.endswith("South"):
-                    chore_name = "Bathroom & Toilet - Main Gate"
-                elif chore_name.endswith("Second Floor"):
-                    chore_name = "Bathroom & Toilet - Upstairs"
-                if chore_name == "Nothing scheduled for this weeks":
-                    continue
-                chore_id = NAME_ID_MAPPING[chore_name]
-                for assignee, status in info["people"].items():
-                    conn.execute(
-                        """INSERT INTO assignments(chore_id, week, year, assignee, status)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (chore_id, week, year, assignee, status)
-                    )
+        conn.begin()
+        try:
+            report = legacy.import_records(conn, path)
+            workload.rebuild(conn)
+            stats.rebuild(conn)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return report
 
@@ -0,0 +1,228 @@
+"""
+Several households served by one process, each from its own DuckDB file
+`<DIRECTORY>/<name>.db` with the same tables as `db.DB_FILE`.
+
+Requests to /api/<household>/... run within `use(name)`, which sets the
+household as the current `scope`. `db.connect_r`/`connect_w` then hand
+out cursors of that household's pool under that household's lock, so a
+busy household never waits for another, and the caches keep their
+entries apart. The default database behind /api/... is unaffected.
+
+Open households are kept in `households`, a least recently used cache of
+at most MAX_OPEN. Households that are not in use are closed once it is
+full or after IDLE_TIMEOUT seconds without use, checked whenever one is
+opened or released. Households in use are never closed, so the cache can
+briefly hold more.
+
+Worker mode (see backend/writer.py) only covers the default database.
+"""
+import atexit
+import os
+import re
+from collections import OrderedDict
+from collections.abc import Generator
+from contextlib import contextmanager
+from threading import Lock, RLock
+from time import monotonic
+from typing import override
+
+from werkzeug.security import generate_password_hash
+
+from backend import db
+from backend.models import changelog, legacy, people
+from backend.utils import scope
+
+DIRECTORY = os.path.join(os.path.dirname(__file__), "households")
+NAME = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}")
+# Would read like the endpoints under /api
+RESERVED: tuple[str, ...] = ("admin", "auth", "changelog", "chores", "metrics", "people",
+                             "schedules")
+MAX_OPEN: int = 16 # Households with an open database
+IDLE_TIMEOUT: float = 600.0 # Seconds before an unused household is closed
+POOL_SIZE: int = 4 # Cursors per household
+
+class InvalidHouseholdNameError(Exception):
+    @override
+    def __init__(self, name: str, *args):
+        super().__init__(f"Invalid household name. Expected lowercase letters, digits, "
+                         f"'-' and '_' other than {', '.join(RESERVED)}, got {repr(name)}.")
+
+class UnknownHouseholdError(Exception):
+    @override
+    def __init__(self, name: str, *args):
+        super().__init__(f"No household named {repr(name)}.")
+
+class HouseholdExistsError(Exception):
+    @override
+    def __init__(self, name: str, *args):
+        super().__init__(f"The household {repr(name)} already exists.")
+
+class HouseholdsUnavailableError(Exception):
+    @override
+    def __init__(self, *args):
+        super().__init__("Households are not served in worker mode.")
+
+class Household:
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.pool = db.ConnectionPool(path, POOL_SIZE)
+        self.lock = RLock() # Stands in for `db.lock`
+        self.users = 0 # Requests currently using it
+        self.last_used = monotonic()
+
+def path_of(name: str) -> str:
+    """
+    Raises:
+        InvalidHouseholdNameError: If `name` does not match NAME.
+    """
+    if not NAME.fullmatch(name) or name in RESERVED:
+        raise InvalidHouseholdNameError(name)
+    return os.path.join(DIRECTORY, f"{name}.db")
+
+class HouseholdCache:
+    def __init__(self, size: int = MAX_OPEN, idle_timeout: float = IDLE_TIMEOUT):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._open: OrderedDict[str, Household] = OrderedDict()
+        self._guard = Lock()
+
+    def acquire(self, name: str) -> Household:
+        """Open the household `name` if needed and mark it in use until
+        `release`.
+
+        Raises:
+            UnknownHouseholdError: If there is no such household.
+        """
+        try:
+            path = path_of(name)
+        except InvalidHouseholdNameError:
+            raise UnknownHouseholdError(name)
+        with self._guard:
+            household = self._open.get(name)
+            if household is None:
+                if not os.path.isfile(path):
+                    raise UnknownHouseholdError(name)
+                household = self._open[name] = Household(name, path)
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._open.move_to_end(name)
+            household.users += 1
+            household.last_used = monotonic()
+            self._evict()
+        return household
+
+    def release(self, household: Household) -> None:
+        with self._guard:
+            household.users -= 1
+            household.last_used = monotonic()
+            self._evict()
+
+    def _evict(self) -> None:
+        # Closed under the guard, so a household is never open twice
+        now = monotonic()
+        for name, household in list(self._open.items()): # Least recently used first
+            if household.users:
+                continue
+            if len(self._open) > self.size or now - household.last_used > self.idle_timeout:
+                del self._open[name]
+                household.pool.close()
+                self.evictions += 1
+
+    def close(self) -> None:
+        with self._guard:
+            for household in self._open.values():
+                household.pool.close()
+            self._open.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._guard:
+            return {"open": len(self._open),
+                    "in_use": sum(1 for household in self._open.values() if household.users),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions}
+
+households = HouseholdCache()
+atexit.register(households.close)
+
+@contextmanager
+def use(name: str) -> Generator[Household, None, None]:
+    """Run the block within the household `name`.
+
+    Raises:
+        UnknownHouseholdError: If there is no such household.
+    """
+    household = households.acquire(name)
+    token = scope.current.set(household)
+    try:
+        yield household
+    finally:
+        scope.current.reset(token)
+        households.release(household)
+
+def list_households() -> list[str]:
+    try:
+        files = os.listdir(DIRECTORY)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name, extension in map(os.path.splitext, files)
+                  if extension == ".db" and NAME.fullmatch(name) and name not in RESERVED)
+
+def create(
+    name: str,
+    chores_path: str | None = None,
+    person: str | None = None,
+    password: str | None = None,
+) -> str:
+    """Create the household `name` with empty tables, the chores of the
+    legacy chores file at `chores_path` and `person` as its first member,
+    who logs in with `password`. The file is built aside and only appears
+    once it is complete.
+    Returns:
+        str: The path of the new database.
+    Raises:
+        InvalidHouseholdNameError: If `name` does not match NAME.
+        HouseholdExistsError: If it already exists.
+    """
+    path = path_of(name)
+    if os.path.exists(path):
+        raise HouseholdExistsError(name)
+    os.makedirs(DIRECTORY, exist_ok=True)
+    building = f"{path}.{os.getpid()}.tmp"
+    household = Household(name, building)
+    token = scope.current.set(household)
+    try:
+        db.create_tables()
+        db.migrate()
+        with db.connect_w() as conn_w:
+            conn_w.begin()
+            try:
+                changelog.add_changelog(conn_w, "Initial log")
+                if chores_path is not None:
+                    legacy.import_chores(conn_w, chores_path)
+                if person is not None:
+                    people.add_person(conn_w, person, "everyone")
+                    if password is not None:
+                        conn_w.execute("UPDATE people SET password_hash = ? WHERE name = ?",
+                                       (generate_password_hash(password), person))
+                conn_w.commit()
+            except BaseException:
+                conn_w.rollback()
+                raise
+        household.pool.close()
+        try:
+            os.link(building, path) # Fails instead of replacing a household
+        except FileExistsError:
+            raise HouseholdExistsError(name)
+    finally:
+        scope.current.reset(token)
+        household.pool.close()
+        for leftover in (building, f"{building}.wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return path
@@ -2,30 +2,63 @@ from duckdb import DuckDBPyConnection
 import secrets
 from werkzeug.security import check_password_hash, generate_password_hash
 from ..db import DB_FILE
+from backend.utils.session_cache import session_cache
 
 def get_token(conn_w: DuckDBPyConnection, name: str, password: str) -> str | None:
     """
     Returns the existing token or a newly generated token, which will be 
     stored. Returns None if the credentials are invalid.
-    """
-    row = conn_w.execute(
-        "SELECT id, password_hash, session_cookie_token FROM people WHERE name = ?",
-        (name,),
-    ).fetchone()
 
+    This hashes while the caller holds the connection. The API verifies 
+    with `get_credentials` and `issue_token` around `backend.utils.hashing`
+    instead, so that the slow hash runs without the lock.
+    """
+    row = get_credentials(conn_w, name)
     if not row:
         return None
 
-    user_id, pw_hash, token = row
+    user_id, pw_hash, _ = row
     if not pw_hash or not check_password_hash(pw_hash, password):
         return None
-    
-    if not token:
-        token = secrets.token_urlsafe(32)
-        conn_w.execute(
-            "UPDATE people SET session_cookie_token = ? WHERE id = ?",
-            (token, user_id),
-        )
+    return issue_token(conn_w, user_id, name, pw_hash)
+
+def get_credentials(
+    conn: DuckDBPyConnection, 
+    name: str,
+) -> None | tuple[int, str | None, str | None]:
+    """
+    Returns:
+        None: name not found
+        tuple[int, str | None, str | None]: user id, password hash and 
+            session token
+    """
+    return conn.execute(
+        "SELECT id, password_hash, session_cookie_token FROM people WHERE name = ?",
+        (name,),
+    ).fetchone()
+
+def issue_token(
+    conn_w: DuckDBPyConnection, 
+    user_id: int, 
+    name: str,
+    pw_hash: str,
+) -> str | None:
+    """
+    Returns the existing token or stores a new one for a user whose 
+    password has been verified against `pw_hash`. Returns None if the 
+    password has been changed since it was read.
+    """
+    row = conn_w.execute(
+        """UPDATE people 
+           SET session_cookie_token = COALESCE(session_cookie_token, ?)
+           WHERE id = ? AND password_hash = ?
+           RETURNING session_cookie_token""",
+        (secrets.token_urlsafe(32), user_id, pw_hash),
+    ).fetchone()
+    if row is None:
+        return None
+    token, = row
+    session_cache.put(token, (user_id, name), session_cache.epoch())
     return token
 
 def remove_token(conn_w: DuckDBPyConnection, token: str) -> None:
@@ -35,23 +68,26 @@ def remove_token(conn_w: DuckDBPyConnection, token: str) -> None:
         "UPDATE people SET session_cookie_token = NULL WHERE session_cookie_token = ?",
         (token,),
     )
+    session_cache.discard_token(token)
 
 def change_password(conn_w: DuckDBPyConnection, token: str, new_pw: str) -> bool:
+    return set_password_hash(conn_w, token, generate_password_hash(new_pw))
+
+def set_password_hash(conn_w: DuckDBPyConnection, token: str, new_hash: str) -> bool:
+    """Like `change_password` with the hash computed by the caller."""
     row = conn_w.execute(
-        "SELECT id FROM people WHERE session_cookie_token = ?",
-        (token,),
+        """UPDATE people 
+           SET password_hash = ? 
+           WHERE session_cookie_token = ?
+           RETURNING id""",
+        (new_hash, token),
     ).fetchone()
 
     if not row:
         return False
 
     user_id, = row
-
-    new_hash = generate_password_hash(new_pw)
-    conn_w.execute(
-        "UPDATE people SET password_hash = ? WHERE id = ?",
-        (new_hash, user_id),
-    )
+    session_cache.discard_person(id=user_id)
     return True
 
 def get_person(
@@ -59,12 +95,21 @@ def get_person(
     token: str,
 ) -> None | tuple[int, str]:
     """
+    Served from `session_cache` when possible.
+
     Returns:
         None: token not found
         tuple[int, str]: user id and username
     """
+    person = session_cache.get(token)
+    if person is not None:
+        return person
+    epoch = session_cache.epoch()
     row = conn.execute(
         "SELECT id, name FROM people WHERE session_cookie_token = ?",
         (token,),
     ).fetchone()
+    if row is not None:
+        session_cache.put(token, row, epoch)
     return row
+
@@ -0,0 +1,270 @@
+"""
+Export and import of the household tables as Parquet or CSV files.
+
+A backup is a directory with one `<table>.<format>` file per table.
+Both directions use DuckDB's own COPY and read_parquet/read_csv, so rows
+never pass through Python.
+
+Imports either replace the tables they contain, keeping the ids, or
+upsert them into the current household to merge two households. In
+upsert mode rows are matched by their natural keys: people and chores by
+name, assignments by chore name, week, year and assignee, changelog
+entries by time and description. Matched rows take the imported values,
+and the other rows are inserted with new ids. Passwords and session
+tokens are never merged from another household: matched people keep
+their own, and new people have none until they are set here.
+"""
+import os
+from collections.abc import Iterable
+from typing import Literal, override
+from duckdb import DuckDBPyConnection
+
+from backend.models import stats, workload
+from backend.utils import metrics
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
+
+TABLES: tuple[str, ...] = ("people", "chores", "assignments", "changelog") # In foreign key order
+FORMATS: dict[str, str] = {
+    "parquet": "(FORMAT parquet, COMPRESSION zstd)",
+    "csv": "(FORMAT csv, HEADER)",
+}
+SEQUENCES: dict[str, str] = {table: f"seq_{table}_id" for table in TABLES}
+Mode = Literal["replace", "upsert"]
+MODES: tuple[str, ...] = ("replace", "upsert")
+# Columns left out of exports and computed again on import, so backups
+# keep their layout. Backup files hold every column as text in CSV.
+DERIVED: dict[str, dict[str, str]] = {
+    "assignments": {"year_week": "year::INTEGER * 100 + week::INTEGER"},
+}
+CREDENTIALS: dict[str, tuple[str, ...]] = { # Columns left out of upserts
+    "people": ("password_hash", "session_cookie_token"),
+}
+
+class UnknownFormatError(Exception):
+    @override
+    def __init__(self, format: str, *args):
+        super().__init__(f"Unknown format. Expected one of {', '.join(FORMATS)}, "
+                         f"got {repr(format)}.")
+
+class UnknownTableError(Exception):
+    @override
+    def __init__(self, table: str, *args):
+        super().__init__(f"Unknown table. Expected one of {', '.join(TABLES)}, "
+                         f"got {repr(table)}.")
+
+class EmptyBackupError(Exception):
+    @override
+    def __init__(self, directory: str, *args):
+        super().__init__(f"No table files found in {repr(directory)}.")
+
+def _check_tables(tables: Iterable[str]) -> list[str]:
+    tables = list(tables)
+    for table in tables:
+        if table not in TABLES:
+            raise UnknownTableError(table)
+    return [table for table in TABLES if table in tables]
+
+def export_tables(
+    conn: DuckDBPyConnection,
+    directory: str,
+    format: str = "parquet",
+    tables: Iterable[str] = TABLES,
+) -> dict[str, str]:
+    """Write every table of `tables` to `directory`. Run it in one
+    transaction, e.g. with `db.connect_consistent`, so that the files agree
+    with each other.
+    Returns:
+        dict[str, str]: The path of the file of every table.
+    Raises:
+        UnknownFormatError: If `format` is not one of FORMATS.
+        UnknownTableError: If a table is not one of TABLES.
+    """
+    if format not in FORMATS:
+        raise UnknownFormatError(format)
+    # Statements naming file paths would each be a label of their own
+    conn = metrics.uninstrumented(conn)
+    paths = {}
+    for table in _check_tables(tables):
+        path = os.path.join(directory, f"{table}.{format}")
+        excluded = f" EXCLUDE ({', '.join(DERIVED[table])})" if table in DERIVED else ""
+        conn.execute(f"COPY (SELECT *{excluded} FROM {table} ORDER BY id) TO '{_quote(path)}' "
+                     f"{FORMATS[format]}")
+        paths[table] = path
+    return paths
+
+def _quote(path: str) -> str:
+    # COPY TO does not take parameters
+    return path.replace("'", "''")
+
+def find_tables(directory: str) -> dict[str, str]:
+    """The backup files in `directory` by table.
+    Raises:
+        EmptyBackupError: If there are none.
+    """
+    found = {}
+    for table in TABLES:
+        for format in FORMATS:
+            path = os.path.join(directory, f"{table}.{format}")
+            if os.path.isfile(path):
+                found[table] = path
+                break
+    if not found:
+        raise EmptyBackupError(directory)
+    return found
+
+def _source(path: str) -> str:
+    if path.endswith(".csv"):
+        # Read everything as text and let the insert cast it to the column types
+        return f"read_csv('{_quote(path)}', header = true, all_varchar = true)"
+    return f"read_parquet('{_quote(path)}')"
+
+def _advance_sequence(conn_w: DuckDBPyConnection, table: str) -> None:
+    """Move the id sequence of `table` past its largest id. DuckDB cannot
+    restart a sequence, so it is advanced with nextval."""
+    behind, = conn_w.execute(
+        f"""SELECT coalesce((SELECT max(id) FROM {table}), 0)
+                   - coalesce(last_value, start_value - 1)
+            FROM duckdb_sequences() WHERE sequence_name = ?""",
+        (SEQUENCES[table],),
+    ).fetchone()
+    if behind > 0:
+        conn_w.execute(f"SELECT max(nextval('{SEQUENCES[table]}')) FROM range(?)", (behind,))
+
+def _replace(conn_w: DuckDBPyConnection, files: dict[str, str]) -> None:
+    # DuckDB cannot delete chores whose assignments were deleted in the same
+    # transaction, so the tables are dropped and created again instead.
+    # Replacing chores recreates assignments too, keeping their rows.
+    tables = [table for table in TABLES
+              if table in files or (table == "assignments" and "chores" in files)]
+    placeholders = ", ".join(["?"] * len(tables))
+    ddl = dict(conn_w.execute(
+        f"""SELECT table_name, sql FROM duckdb_tables()
+            WHERE database_name = current_database() AND table_name IN ({placeholders})""",
+        tables,
+    ).fetchall())
+    indexes = [sql for sql, in conn_w.execute(
+        f"""SELECT sql FROM duckdb_indexes()
+            WHERE database_name = current_database() AND table_name IN ({placeholders})""",
+        tables,
+    ).fetchall()]
+    for table in tables:
+        if table not in files:
+            conn_w.execute(f"CREATE TEMP TABLE kept_{table} AS SELECT * FROM {table}")
+    for table in reversed(tables):
+        conn_w.execute(f"DROP TABLE {table}")
+    for table in tables:
+        conn_w.execute(ddl[table])
+    for sql in indexes:
+        conn_w.execute(sql)
+    for table in tables:
+        if table in files:
+            derived = "".join(f", {expression} AS {column}"
+                              for column, expression in DERIVED.get(table, {}).items())
+            conn_w.execute(f"INSERT INTO {table} BY NAME "
+                           f"SELECT *{derived} FROM {_source(files[table])}")
+        else:
+            conn_w.execute(f"INSERT INTO {table} BY NAME SELECT * FROM kept_{table}")
+        if table not in files:
+            conn_w.execute(f"DROP TABLE kept_{table}")
+        _advance_sequence(conn_w, table)
+
+def _columns(conn: DuckDBPyConnection, table: str) -> list[str]:
+    # Without the derived columns, which the backup files do not have
+    return [column for column, in conn.execute(
+        """SELECT column_name FROM duckdb_columns()
+           WHERE table_name = ? AND database_name = current_database()
+                AND schema_name = current_schema()
+           ORDER BY column_index""",
+        (table,),
+    ).fetchall() if column != "id" and column not in DERIVED.get(table, {})]
+
+def _upsert_by_name(conn_w: DuckDBPyConnection, table: str, path: str) -> None:
+    # Not INSERT ... ON CONFLICT, which gives updated rows new ids in DuckDB
+    columns = [column for column in _columns(conn_w, table)
+               if column not in CREDENTIALS.get(table, ())]
+    updates = ", ".join(f"{column} = incoming.{column}" for column in columns if column != "name")
+    conn_w.execute(
+        f"""UPDATE {table} SET {updates}
+            FROM {_source(path)} AS incoming
+            WHERE {table}.name = incoming.name"""
+    )
+    conn_w.execute(
+        f"""INSERT INTO {table} ({", ".join(columns)})
+            SELECT {", ".join(columns)} FROM {_source(path)} AS incoming
+            WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.name = incoming.name)
+            ORDER BY id::INTEGER"""
+    )
+
+def _upsert_assignments(conn_w: DuckDBPyConnection, path: str, chores_path: str | None) -> None:
+    # Chore ids of the other household are mapped through its chore names
+    # when they are part of the import, and kept as they are otherwise
+    chore_id = (f"""(SELECT chores.id FROM {_source(chores_path)} AS theirs
+                     JOIN chores ON (chores.name = theirs.name)
+                     WHERE theirs.id::INTEGER = incoming.chore_id::INTEGER)"""
+                if chores_path is not None else "incoming.chore_id::INTEGER")
+    incoming = f"""(SELECT {chore_id} AS chore_id, week::INTEGER AS week,
+                           year::INTEGER AS year, {DERIVED["assignments"]["year_week"]} AS year_week,
+                           assignee, status::BOOLEAN AS status,
+                           id::INTEGER AS source_id
+                    FROM {_source(path)} AS incoming)"""
+    conn_w.execute(
+        f"""UPDATE assignments SET status = incoming.status
+            FROM {incoming} AS incoming
+            WHERE assignments.chore_id = incoming.chore_id
+                AND assignments.year_week = incoming.year_week
+                AND assignments.assignee = incoming.assignee
+                AND assignments.status != incoming.status"""
+    )
+    conn_w.execute(
+        f"""INSERT INTO assignments (chore_id, week, year, year_week, assignee, status)
+            SELECT chore_id, week, year, year_week, assignee, status FROM {incoming} AS incoming
+            WHERE chore_id IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM assignments
+                WHERE assignments.chore_id = incoming.chore_id
+                    AND assignments.year_week = incoming.year_week
+                    AND assignments.assignee = incoming.assignee)
+            ORDER BY source_id"""
+    )
+
+def _upsert_changelog(conn_w: DuckDBPyConnection, path: str) -> None:
+    conn_w.execute(
+        f"""INSERT INTO changelog (description, created_at)
+            SELECT description, created_at::TIMESTAMPTZ FROM {_source(path)} AS incoming
+            WHERE NOT EXISTS (
+                SELECT 1 FROM changelog
+                WHERE changelog.created_at = incoming.created_at::TIMESTAMPTZ
+                    AND changelog.description = incoming.description)
+            ORDER BY id::INTEGER"""
+    )
+
+def import_tables(conn_w: DuckDBPyConnection, directory: str, mode: Mode = "replace") -> dict[str, int]:
+    """Import the backup in `directory`, then rebuild the derived tables.
+    Run it in a transaction.
+    Returns:
+        dict[str, int]: The number of rows of every imported table afterwards.
+    Raises:
+        EmptyBackupError: If `directory` has no backup files.
+        ValueError: If `mode` is not one of MODES.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode. Got {repr(mode)}.")
+    # Statements naming file paths would each be a label of their own
+    conn_w = metrics.uninstrumented(conn_w)
+    files = find_tables(directory)
+    if mode == "replace":
+        _replace(conn_w, files)
+    else:
+        for table in ("people", "chores"):
+            if table in files:
+                _upsert_by_name(conn_w, table, files[table])
+        if "assignments" in files:
+            _upsert_assignments(conn_w, files["assignments"], files.get("chores"))
+        if "changelog" in files:
+            _upsert_changelog(conn_w, files["changelog"])
+    workload.rebuild(conn_w)
+    stats.rebuild(conn_w)
+    schedule_cache.clear()
+    session_cache.clear()
+    return {table: conn_w.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in files}
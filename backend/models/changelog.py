@@ -1,50 +1,87 @@
 from datetime import datetime, date, timezone
+from collections.abc import Iterator
 from duckdb import DuckDBPyConnection
 
 TimeLike = datetime | date | str
+Cursor = tuple[datetime, int] # (created_at, id) of the last entry seen
+FETCH_SIZE: int = 500
 
-def _to_iso(ts: TimeLike) -> str:
+def _to_datetime(ts: TimeLike) -> datetime:
     if isinstance(ts, datetime):
-        return ts.isoformat()
+        return ts
     if isinstance(ts, date):
-        return datetime(ts.year, ts.month, ts.day).isoformat()
-    return ts  # assume already an ISO string
+        return datetime(ts.year, ts.month, ts.day)
+    return datetime.fromisoformat(ts)
+
+def _page_query(
+    from_time: TimeLike,
+    to_time: TimeLike | None,
+    limit: int | None,
+    after: Cursor | None,
+) -> tuple[str, list]:
+    if to_time is None:
+        to_time = datetime.now(timezone.utc)
+    conditions = ["created_at BETWEEN ? AND ?"]
+    params: list = [_to_datetime(from_time), _to_datetime(to_time)]
+    if after is not None:
+        conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+        params += [after[0], after[0], after[1]]
+    query = f"""
+        SELECT id, created_at, description
+        FROM changelog
+        WHERE {" AND ".join(conditions)}
+        ORDER BY created_at DESC, id DESC
+        """
+    if limit is not None:
+        query += "LIMIT ?"
+        params.append(limit)
+    return query, params
 
 def get_changelog(
     conn: DuckDBPyConnection,
-    from_time: TimeLike, 
+    from_time: TimeLike,
     to_time: TimeLike | None = None,
+    limit: int | None = None,
 ) -> list[tuple[datetime, str]]:
     """
     Return list of (created_at: datetime, description: str) between from_time and to_time (inclusive).
     from_time / to_time may be datetime, date or ISO-format string. If to_time is None, use now (UTC).
     """
-    if to_time is None:
-        to_time = datetime.now(timezone.utc)
-    from_iso = _to_iso(from_time)
-    to_iso = _to_iso(to_time)
-    
-    rows = conn.execute(
-        """
-        SELECT created_at, description
-        FROM changelog
-        WHERE created_at BETWEEN ? AND ?
-        ORDER BY created_at DESC
-        """,
-        (from_iso, to_iso),
-    ).fetchall()
+    return [(created_at, desc)
+            for _, created_at, desc in page_changelog(conn, from_time, to_time, limit)]
 
-    # Ensure created_at is a datetime object
-    result: list[tuple[datetime, str]] = []
-    for created_at, desc in rows:
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at)
-        result.append((created_at, desc))
-    return result
+def page_changelog(
+    conn: DuckDBPyConnection,
+    from_time: TimeLike,
+    to_time: TimeLike | None = None,
+    limit: int | None = None,
+    after: Cursor | None = None,
+) -> list[tuple[int, datetime, str]]:
+    """
+    Return up to `limit` entries as (id, created_at, description), newest
+    first. Pass the (created_at, id) of the last entry of a page as `after`
+    to get the next page.
+    """
+    query, params = _page_query(from_time, to_time, limit, after)
+    return conn.execute(query, params).fetchall()
+
+def iter_changelog(
+    conn: DuckDBPyConnection,
+    from_time: TimeLike,
+    to_time: TimeLike | None = None,
+    limit: int | None = None,
+    after: Cursor | None = None,
+) -> Iterator[tuple[int, datetime, str]]:
+    """Like `page_changelog` but yields rows from the DuckDB cursor
+    FETCH_SIZE at a time. The connection must stay open while iterating."""
+    query, params = _page_query(from_time, to_time, limit, after)
+    result = conn.execute(query, params)
+    while rows := result.fetchmany(FETCH_SIZE):
+        yield from rows
 
 def add_changelog(
-    conn_w: DuckDBPyConnection, 
-    description: str, 
+    conn_w: DuckDBPyConnection,
+    description: str,
     time: TimeLike | None = None,
 ) -> None:
     """
@@ -65,9 +102,7 @@ def add_changelog(
             (description,),
         )
     else:
-        created_iso = _to_iso(time)
         conn_w.execute(
             "INSERT INTO changelog (description, created_at) VALUES (?, ?)",
-            (description, created_iso),
+            (description, _to_datetime(time)),
         )
-
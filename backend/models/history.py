@@ -0,0 +1,138 @@
+"""
+Stored assignments of a range of weeks in columnar form, for bulk
+consumers that would otherwise pay for building and serializing one dict
+per assignment.
+
+Both forms have the columns year, week, id, chore, assignee and status,
+ordered by week, chore and id. Chore and person names are dictionary
+encoded: the column holds indices into the sorted list of the names that
+occur. The values are computed by DuckDB:
+- `columnar_json` returns the whole JSON document as one string.
+- `arrow_batches` yields Arrow record batches straight from DuckDB's
+  Arrow result, with the names as dictionary arrays sharing one
+  dictionary, and `arrow_stream` writes them as an Arrow IPC stream.
+  Both need the optional `pyarrow` package.
+"""
+from collections.abc import Iterator
+from typing import override
+from duckdb import DuckDBPyConnection
+
+from backend.utils.chunk_sink import ChunkSink
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+BATCH_ROWS: int = 65536
+
+class ArrowUnavailableError(Exception):
+    @override
+    def __init__(self, *args):
+        super().__init__("Arrow output needs the pyarrow package.")
+
+def _key(year_week: tuple[int, int]) -> int:
+    # ISO weeks never exceed 53, so year * 100 + week keeps the order
+    return year_week[0] * 100 + year_week[1]
+
+_SELECTED = """
+    SELECT assignments.year, assignments.week, assignments.id,
+           dense_rank() OVER (ORDER BY chores.name) - 1 AS chore,
+           dense_rank() OVER (ORDER BY assignments.assignee) - 1 AS assignee,
+           assignments.status
+    FROM assignments JOIN chores ON (assignments.chore_id = chores.id)
+    WHERE assignments.year_week BETWEEN ? AND ?"""
+
+_DICTIONARIES = """
+    SELECT coalesce(list(DISTINCT chores.name ORDER BY chores.name), []),
+           coalesce(list(DISTINCT assignments.assignee ORDER BY assignments.assignee), [])
+    FROM assignments JOIN chores ON (assignments.chore_id = chores.id)
+    WHERE assignments.year_week BETWEEN ? AND ?"""
+
+def columnar_json(
+    conn: DuckDBPyConnection,
+    start: tuple[int, int],
+    end: tuple[int, int],
+) -> str:
+    """The assignments from `start` to `end` inclusive as a JSON object
+    {"columns": {"year": [...], ..., "chore": [...], ...},
+     "dictionaries": {"chore": [...], "assignee": [...]}}."""
+    order = "ORDER BY year, week, chore, id"
+    document, = conn.execute(
+        f"""SELECT json_object(
+                'columns', json_object(
+                    'year', coalesce(list(year {order}), []),
+                    'week', coalesce(list(week {order}), []),
+                    'id', coalesce(list(id {order}), []),
+                    'chore', coalesce(list(chore {order}), []),
+                    'assignee', coalesce(list(assignee {order}), []),
+                    'status', coalesce(list(status {order}), [])),
+                'dictionaries', (SELECT json_object('chore', chores, 'assignee', people)
+                                 FROM ({_DICTIONARIES}) AS dictionaries(chores, people))
+            )::VARCHAR
+            FROM ({_SELECTED})""",
+        (_key(start), _key(end), _key(start), _key(end)),
+    ).fetchone()
+    return document
+
+def arrow_batches(
+    conn: DuckDBPyConnection,
+    start: tuple[int, int],
+    end: tuple[int, int],
+    batch_rows: int = BATCH_ROWS,
+) -> tuple["pa.Schema", Iterator["pa.RecordBatch"]]:
+    """The schema and the record batches of the assignments from `start`
+    to `end` inclusive. Consume the batches before `conn` is used again.
+
+    Raises:
+        ArrowUnavailableError: If pyarrow is not installed.
+    """
+    if pa is None:
+        raise ArrowUnavailableError()
+    chores, people = conn.execute(_DICTIONARIES, (_key(start), _key(end))).fetchone()
+    dictionaries = {"chore": pa.array(chores, pa.string()),
+                    "assignee": pa.array(people, pa.string())}
+    reader = conn.execute(
+        f"""SELECT year, week, id, chore::INTEGER AS chore,
+                   assignee::INTEGER AS assignee, status
+            FROM ({_SELECTED}) ORDER BY year, week, chore, id""",
+        (_key(start), _key(end)),
+    ).fetch_record_batch(batch_rows)
+    fields = [pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+              if name in dictionaries else reader.schema.field(name)
+              for name in reader.schema.names]
+    schema = pa.schema(fields)
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        for batch in reader:
+            yield pa.RecordBatch.from_arrays(
+                [pa.DictionaryArray.from_arrays(batch.column(name), dictionaries[name])
+                 if name in dictionaries else batch.column(name)
+                 for name in batch.schema.names],
+                schema=schema,
+            )
+    return schema, batches()
+
+def arrow_stream(
+    conn: DuckDBPyConnection,
+    start: tuple[int, int],
+    end: tuple[int, int],
+) -> Iterator[bytes]:
+    """`arrow_batches` as an Arrow IPC stream, one chunk per batch.
+
+    Raises:
+        ArrowUnavailableError: If pyarrow is not installed. Raised by the
+            call, before anything is read.
+    """
+    if pa is None:
+        raise ArrowUnavailableError()
+
+    def chunks() -> Iterator[bytes]:
+        schema, batches = arrow_batches(conn, start, end)
+        sink = ChunkSink()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()
+    return chunks()
@@ -0,0 +1,247 @@
+"""
+Import of the legacy `chores.json` and `record.json` files.
+
+`record.json` maps "<week> <year>" to the chores of that week, each with
+the people assigned and whether they did it. The file covers years, so
+it is never loaded whole: `iter_object` parses one week at a time and
+the flattened rows are spooled to a temporary newline-delimited JSON
+file. DuckDB then reads that file, resolves the chore names through
+CHORE_ALIASES and inserts everything with one statement, so memory stays
+bounded by the largest week.
+
+Rows that cannot be imported are rejected one by one with the reason,
+the rest is still imported.
+"""
+import os
+import tempfile
+from collections.abc import Iterator
+from json import JSONDecodeError, JSONDecoder, dumps, load
+from typing import Any, TextIO, TypedDict
+from duckdb import DuckDBPyConnection
+
+# Suffix of a legacy chore name -> current chore name
+CHORE_ALIASES: dict[str, str] = {
+    "North": "Bathroom & Toilet - Stairs",
+    "South": "Bathroom & Toilet - Main Gate",
+    "Second Floor": "Bathroom & Toilet - Upstairs",
+}
+# Legacy name list file -> people group
+GROUP_ALIASES: dict[str, str] = {
+    "namelist.json": "everyone",
+    "namelist_north.json": "stairs",
+    "namelist_south.json": "main_gate",
+    "namelist_second_floor.json": "upstairs",
+}
+GROUPS: tuple[str, ...] = ("everyone", "stairs", "main_gate", "upstairs")
+SKIPPED_CHORES: tuple[str, ...] = ("Nothing scheduled for this weeks",)
+DEFAULT_DESCRIPTION: str = "Here's the description"
+READ_CHUNK: int = 1 << 16 # Characters read from record.json at a time
+PROGRESS_EVERY: int = 100 # Weeks between progress reports
+
+class ImportReport(TypedDict):
+    weeks: int
+    imported: int
+    rejected: int
+
+def iter_object(file: TextIO, chunk_size: int = READ_CHUNK) -> Iterator[tuple[str, Any]]:
+    """Yield the (key, value) pairs of the JSON object in `file` without
+    reading all of it. Only the current value and one chunk are held.
+
+    Raises:
+        ValueError: If the file is not a JSON object.
+    """
+    decoder = JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def more() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+        return not eof
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not more():
+                raise ValueError("Unexpected end of the JSON object")
+
+    def value() -> Any:
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                result, end = decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                if more():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buffer) and not eof:
+                more()
+                continue
+            pos = end
+            return result
+
+    if peek() != "{":
+        raise ValueError("Expected a JSON object")
+    pos += 1
+    if peek() == "}":
+        return
+    while True:
+        key = value()
+        if peek() != ":":
+            raise ValueError(f"Expected ':' after {key!r}")
+        pos += 1
+        yield key, value()
+        separator = peek()
+        pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' after the value of {key!r}")
+
+def _reject(source: str, reason: str) -> None:
+    print(f"REJECTED {source} due to {reason}")
+
+def _spool_records(path: str, out: TextIO) -> tuple[int, int, int]:
+    """Write one line per (week, chore, person) of the record file at `path`.
+    Returns:
+        tuple[int, int, int]: The number of weeks, rows written and rows
+            rejected.
+    """
+    weeks = rows = rejected = 0
+    with open(path, 'r') as record_file:
+        for weekyear, schedule in iter_object(record_file):
+            weeks += 1
+            try:
+                week, year = map(int, weekyear.split())
+                entries = schedule.items()
+            except (ValueError, AttributeError):
+                _reject(f"week {weekyear!r}", "a malformed week")
+                rejected += 1
+                continue
+            for key, info in entries:
+                source = f"week {weekyear!r} entry {key!r}"
+                try:
+                    chore_name, people = info["chore_name"], info["people"].items()
+                except (TypeError, KeyError, AttributeError):
+                    _reject(source, "a malformed entry")
+                    rejected += 1
+                    continue
+                for assignee, status in people:
+                    if not isinstance(status, bool) or not isinstance(chore_name, str):
+                        _reject(f"{source} for {assignee!r}", "a malformed status")
+                        rejected += 1
+                        continue
+                    out.write(dumps({"row": rows, "source": source, "week": week,
+                                     "year": year, "chore_name": chore_name,
+                                     "assignee": assignee, "status": status}))
+                    out.write("\n")
+                    rows += 1
+            if weeks % PROGRESS_EVERY == 0:
+                print(f"PARSED {weeks} weeks, {rows} assignments")
+    return weeks, rows, rejected
+
+def _resolved(name_column: str) -> str:
+    """SQL for `resolve_chore_name` of `name_column`."""
+    cases = " ".join(f"WHEN ends_with({name_column}, ?) THEN ?" for _ in CHORE_ALIASES)
+    return f"CASE {cases} ELSE {name_column} END" if cases else name_column
+
+def _alias_params() -> list[str]:
+    return [value for pair in CHORE_ALIASES.items() for value in pair]
+
+def import_records(conn_w: DuckDBPyConnection, path: str = "record.json") -> ImportReport:
+    """Import the assignments of the legacy record file at `path`. Run it
+    in a transaction; `workload` and `person_stats` are not updated.
+
+    Raises:
+        ValueError: If the file is not a JSON object.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        spool = os.path.join(directory, "records.ndjson")
+        with open(spool, 'w') as out:
+            weeks, rows, rejected = _spool_records(path, out)
+        if not rows:
+            return ImportReport(weeks=weeks, imported=0, rejected=rejected)
+        records = f"""(SELECT row, source, week, year, chore_name, assignee, status,
+                              {_resolved("chore_name")} AS resolved
+                       FROM read_json(?, format = 'newline_delimited', columns = {{
+                           row: 'BIGINT', source: 'VARCHAR', week: 'INTEGER',
+                           year: 'INTEGER', chore_name: 'VARCHAR',
+                           assignee: 'VARCHAR', status: 'BOOLEAN'}}))
+                      AS records
+                      LEFT JOIN chores ON (chores.name = records.resolved)"""
+        skipped = ", ".join(["?"] * len(SKIPPED_CHORES)) or "NULL"
+        params = [*_alias_params(), spool]
+        unknown = conn_w.execute(
+            f"""SELECT source, assignee, chore_name FROM {records}
+                WHERE chores.id IS NULL AND resolved NOT IN ({skipped})
+                ORDER BY row""",
+            [*params, *SKIPPED_CHORES],
+        )
+        while batch := unknown.fetchmany(1000):
+            for source, assignee, chore_name in batch:
+                _reject(f"{source} for {assignee!r}", f"unknown chore {chore_name!r}")
+                rejected += 1
+        imported, = conn_w.execute(
+            f"""INSERT INTO assignments(chore_id, week, year, year_week, assignee, status)
+                SELECT chores.id, week, year, year * 100 + week, assignee, status
+                FROM {records}
+                WHERE chores.id IS NOT NULL
+                ORDER BY row""",
+            params,
+        ).fetchone()
+    print(f"IMPORTED {imported} assignments of {weeks} weeks, {rejected} rejected")
+    return ImportReport(weeks=weeks, imported=imported, rejected=rejected)
+
+def resolve_chore_name(name: str) -> str:
+    """The current name of the legacy chore `name`, see CHORE_ALIASES."""
+    for suffix, current in CHORE_ALIASES.items():
+        if name.endswith(suffix):
+            return current
+    return name
+
+def import_chores(
+    conn_w: DuckDBPyConnection,
+    path: str = "chores.json",
+    descriptions_path: str = "chore_descriptions.json",
+) -> int:
+    """Insert the chores of the legacy chores file at `path` with one
+    statement, described by `descriptions_path` if it exists.
+    Returns:
+        int: The number of chores inserted.
+    Raises:
+        ValueError: If a chore refers to an unknown group.
+    """
+    try:
+        with open(descriptions_path, 'r') as file:
+            descriptions: dict[str, str] = load(file)
+    except FileNotFoundError:
+        descriptions = {}
+    with open(path, 'r') as file:
+        chores = load(file)
+    rows = []
+    for chore in chores:
+        name = resolve_chore_name(chore["name"])
+        group = GROUP_ALIASES.get(chore["namelist"], chore["namelist"])
+        if group not in GROUPS:
+            raise ValueError(f"Invalid group. Got {repr(group)}.")
+        rows.append((name, descriptions.get(name, DEFAULT_DESCRIPTION), f"{name}.png",
+                     chore["how_often"], group, chore["num_of_people"]))
+    if not rows:
+        return 0
+    conn_w.execute(
+        f"""INSERT INTO chores(name, description, image_path, frequency,
+                               people_group, assignee_count)
+            VALUES {", ".join(["(?, ?, ?, ?, ?, ?)"] * len(rows))}""",
+        [value for row in rows for value in row],
+    )
+    return len(rows)
@@ -1,6 +1,8 @@
 from typing import Literal, override, TypedDict
 from duckdb import DuckDBPyConnection
 from datetime import date, datetime
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
 class InvalidGroupError(Exception):
     @override
     def __init__(self, group: str, *args):
@@ -111,11 +113,13 @@ def enable_person(conn_w: DuckDBPyConnection, name: str):
     conn_w.execute("""UPDATE people 
                       SET is_available=true 
                       WHERE name=?""", (name, ))
+    schedule_cache.clear()
 
 def disable_person(conn_w: DuckDBPyConnection, name: str):
     conn_w.execute("""UPDATE people 
                       SET is_available=false 
                       WHERE name=?""", (name, ))
+    schedule_cache.clear()
     
 def add_person(
     conn_w: DuckDBPyConnection, 
@@ -141,6 +145,7 @@ def add_person(
         """,
         (name, *condition),
     )
+    schedule_cache.clear()
 
 
 def remove_person(
@@ -155,4 +160,6 @@ def remove_person(
             WHERE name = ?
         """,
         (datetime.now(), name)
-    )
\ No newline at end of file
+    )
+    schedule_cache.clear()
+    session_cache.discard_person(name=name)
@@ -1,21 +1,29 @@
 from __future__ import annotations
 
-from .people import get_people
+from .people import get_people, get_all_people, InvalidGroupError
 from .chores import get_all_chores, Chore
+from . import workload, stats
 from backend.utils.shuffled_group import shuffled_group
+from backend.utils import rotation, balancer
+from backend.utils.schedule_cache import schedule_cache
 from duckdb import DuckDBPyConnection
 from re import compile
 from typing import override, ClassVar
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
 from datetime import date, timedelta
-from bisect import bisect_left
+from functools import lru_cache
+from types import MappingProxyType
 from operator import itemgetter
 
 PERIODICALLY = compile(r"^Once per (?:(\d+) )?weeks?\s*(?:on ([a-zA-Z]+day) )?(?:with offset (\d+))?$")
 SPECIFICALLY = compile(r"^Weeks (?:on ([A-Z][a-zA-Z]+day) )?in (\d{4}):((?: \d+)+)$")
 MAX_WEEKS_FROM_NOW: int = 5 # Must be positive
+MAX_RANGE_WEEKS: int = 106 # About two years per `get_schedules` call
+BACKFILL_BATCH_WEEKS: int = 52 # Weeks per INSERT statement in `backfill`
+FREQUENCY_CACHE_SIZE: int = 256
+SOLVER: str = "rotation" # Or "balanced", see backend/utils/balancer.py
 
 class ChoreNoFoundError(Exception): pass
 
@@ -29,24 +37,27 @@ def get_due_str_for_chores(
     Retrieves the due dates for a list of chores and formats them 
     into a dictionary mapping chore names to the due dates.
     """
+    return due_strs(get_frequencies(conn), chores, year, week)
+
+def get_frequencies(conn: DuckDBPyConnection) -> dict[str, str]:
+    """Map every chore name to its frequency string."""
+    return dict(conn.execute("SELECT name, frequency FROM chores").fetchall())
+
+def due_strs(
+    frequencies: dict[str, str],
+    chores: Iterable[str],
+    year: int,
+    week: int,
+) -> dict[str, str]:
     results = {}
     for chore_name in chores:
-        # Fetch the frequency string from the database for the given chore
-        frequency_str = conn.execute(
-            "SELECT frequency FROM chores WHERE name = ?",
-            (chore_name, ),
-        ).fetchone()
+        frequency_str = frequencies.get(chore_name)
         if frequency_str is None:
             raise ValueError(f"Chore {repr(chore_name)} no found")
-        frequency_str = frequency_str[0]
-        # Create a Frequency object from the string
-        frequency_obj = Frequency.from_str(frequency_str)
-        # Get the formatted due date string and add it to the results
-        due_str = frequency_obj.get_due_str(year, week)
-        results[chore_name] = due_str
+        results[chore_name] = Frequency.from_str(frequency_str).get_due_str(year, week)
     return results
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class Frequency(ABC):
     """
     Attributes:
@@ -77,6 +88,12 @@ class Frequency(ABC):
     
     @classmethod
     def from_str(cls, frequency: str) -> Frequency:
+        """Compiled objects are immutable and cached by `parse_frequency`,
+        so the same string always returns the same object."""
+        return parse_frequency(frequency)
+
+    @staticmethod
+    def _parse(frequency: str) -> Frequency:
         matched = PERIODICALLY.match(frequency)
         if matched:
             interval = int(matched.group(1)) if matched.group(1) else 1
@@ -102,7 +119,7 @@ class Frequency(ABC):
         if not self.match(year, week): 
             raise ValueError(f"Invalid year week combination. Got {year=} and {week=}.")
     
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class FreqPeriodical(Frequency):
     """
     Attributes:
@@ -126,46 +143,109 @@ class FreqPeriodical(Frequency):
                              f"Got {year=} and {week=}.")
         return n
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class FreqSpecific(Frequency):
-    week_no: Iterable[int]
+    """
+    Attributes:
+        week_no (frozenset[int]): Any iterable is accepted and frozen.
+        turns (Mapping[int, int]): Derived. Maps each week in `week_no`
+            to its position in the sorted weeks.
+    """
+    week_no: frozenset[int]
     year: int
+    turns: Mapping[int, int] = field(init=False, repr=False, compare=False)
+    def __post_init__(self):
+        week_no = frozenset(self.week_no)
+        object.__setattr__(self, "week_no", week_no)
+        object.__setattr__(self, "turns", MappingProxyType(
+            {week: n for n, week in enumerate(sorted(week_no))}
+        ))
+
     @override
     def match(self, year, week):
         return year == self.year and week in self.week_no
     
     @override
     def nth_turn(self, year, week):
-        week_no = sorted(self.week_no)
-        n = bisect_left(week_no, week)
-        if n >= len(week_no) or week != week_no[n]:
+        n = self.turns.get(week)
+        if n is None:
             raise ValueError("Invalid year week combination."
                              f"Got {year=} and {week=}.")
         return n    
     
+@lru_cache(maxsize=FREQUENCY_CACHE_SIZE)
+def parse_frequency(frequency: str) -> Frequency | None:
+    """Parse a frequency string once. Returns None if it is malformed."""
+    return Frequency._parse(frequency)
+
+
     
-def pick_assignees(conn: DuckDBPyConnection, year: int, week: int, chore: Chore) -> list[str] | None:
-    group = [name 
-             for name, is_available in get_people(conn, chore["people_group"]).items()
-             if is_available]
+def rotate(
+    available: list[str], 
+    year: int, 
+    week: int, 
+    chore: Chore,
+) -> list[str] | None:
+    """Pick the assignees of `chore` from the available people of its group.
+    Returns None if the chore is not due in that week."""
     freq = Frequency.from_str(chore["frequency"])
-    group = shuffled_group(group, chore["name"])
+    group = shuffled_group(available, chore["name"])
     try:
         n = freq.nth_turn(year, week) * chore["assignee_count"] % len(group)
         return [group[i % len(group)] for i in range(n, n+chore["assignee_count"])]
     except ValueError:
         return None
 
+def available_people(all_people: dict[str, dict[str, bool]]) -> dict[str, list[str]]:
+    """Turn the output of `get_all_people` into the available names per group."""
+    return {group: [name for name, is_available in members.items() if is_available]
+            for group, members in all_people.items()}
 
-def generate(conn: DuckDBPyConnection, year: int, week: int) -> dict[str, list[str]]:
+def pick_assignees(conn: DuckDBPyConnection, year: int, week: int, chore: Chore) -> list[str] | None:
+    group = [name 
+             for name, is_available in get_people(conn, chore["people_group"]).items()
+             if is_available]
+    return rotate(group, year, week, chore)
+
+
+def plan(conn: DuckDBPyConnection, year: int, week: int) -> list[tuple[Chore, list[str]]]:
+    """Compute every assignment of a week with one read of the chores and 
+    one read of the people."""
+    return plan_weeks(conn, [(year, week)])[(year, week)]
+
+def plan_weeks(
+    conn: DuckDBPyConnection,
+    weeks: list[tuple[int, int]],
+) -> dict[tuple[int, int], list[tuple[Chore, list[str]]]]:
+    """`plan` for many weeks, in order, with the configured SOLVER."""
     chores = get_all_chores(conn)
-    out = {}
+    groups = available_people(get_all_people(conn))
+    if SOLVER == "balanced":
+        return balancer.plan_weeks(chores, groups, weeks,
+                                   *balancer.loads(chores, workload.get_counters(conn)))
+    if len(weeks) > 1:
+        return rotation.plan_weeks(chores, groups, weeks)
+    return {(year, week): plan_week(chores, groups, year, week) for year, week in weeks}
+
+def plan_week(
+    chores: list[Chore], 
+    groups: dict[str, list[str]], 
+    year: int, 
+    week: int,
+) -> list[tuple[Chore, list[str]]]:
+    out = []
     for chore in chores:
-        assignees = pick_assignees(conn, year, week, chore)
+        group = groups.get(chore["people_group"])
+        if group is None:
+            raise InvalidGroupError(chore["people_group"])
+        assignees = rotate(group, year, week, chore)
         if assignees:
-            out[chore["name"]] = assignees
+            out.append((chore, assignees))
     return out
 
+def generate(conn: DuckDBPyConnection, year: int, week: int) -> dict[str, list[str]]:
+    return {chore["name"]: assignees for chore, assignees in plan(conn, year, week)}
+
 def get_schedule(
     conn_w: DuckDBPyConnection,
     year: int, 
@@ -179,13 +259,16 @@ def get_schedule(
     CHORE_NAME_GETTER = itemgetter(0)
     def read_schedule(conn: DuckDBPyConnection) -> dict:
         """Might be empty. Possible if not generated yet or it is an empty week"""
-        rows = conn.execute("""SELECT chores.name,
-                                      assignments.id,
-                                      assignments.assignee,
-                                      assignments.status,
-                               FROM assignments JOIN chores ON (assignments.chore_id = chores.id)
-                               WHERE assignments.year = ? AND assignments.week = ?
-                            """, (year, week)).fetchall()
+        # Looked up before the join, as DuckDB does not scan the index of a joined table
+        rows = conn.execute("""WITH stored AS MATERIALIZED (
+                                   SELECT id, chore_id, assignee, status
+                                   FROM assignments WHERE year_week = ?)
+                               SELECT chores.name,
+                                      stored.id,
+                                      stored.assignee,
+                                      stored.status,
+                               FROM stored JOIN chores ON (stored.chore_id = chores.id)
+                            """, (year * 100 + week, )).fetchall()
         chore_names = set(map(CHORE_NAME_GETTER, rows))
         out = {chore_name: {} for chore_name in chore_names}
         for chore_name, id, assignee, status in rows:
@@ -199,29 +282,166 @@ def get_schedule(
     schedule = read_schedule(conn_w)
     if schedule:
         return schedule
-    else:
-        generation = generate(conn_w, year, week)
-        if generation:
-            for chore_name, assignees in generation.items():
-                row = conn_w.execute("SELECT id FROM chores WHERE name = ?", (chore_name, )).fetchone()                
-                if row is None:
-                    raise ChoreNoFoundError(
-                        f"Chore {repr(chore_name)} no found."
-                        "This happens possibly because a chore is removed "
-                        "during this function call. "
-                        "If that is the case, a second call is unlikely "
-                        "to encounter the same issue.")
-                chore_id = row[0]
-                for assignee in assignees:
-                    conn_w.execute(
-                        """INSERT INTO assignments(chore_id, week, year, assignee) 
-                           VALUES (?, ?, ?, ?)""",
-                        (chore_id, week, year, assignee),
-                    )
-            return read_schedule(conn_w)
-        else:
-            # It is an empty week
-            return {}
+    conn_w.begin()
+    try:
+        generation = plan(conn_w, year, week)
+        schedule = insert_assignments(conn_w, {(year, week): generation})
+        conn_w.commit()
+    except BaseException:
+        conn_w.rollback()
+        raise
+    # It is an empty week if nothing is generated
+    return schedule.get((year, week), {})
+
+def insert_assignments(
+    conn_w: DuckDBPyConnection,
+    generations: dict[tuple[int, int], list[tuple[Chore, list[str]]]],
+) -> dict[tuple[int, int], dict[str, dict[int, tuple[str, bool]]]]:
+    """Insert generated weeks with a single statement and return each week
+    in the same shape as `get_schedule`. Weeks without any assignment are 
+    left out."""
+    rows = [(chore["id"], week, year, year * 100 + week, assignee) 
+            for (year, week), generation in generations.items()
+            for chore, assignees in generation 
+            for assignee in assignees]
+    if not rows:
+        return {}
+    chore_names = {chore["id"]: chore["name"] 
+                   for generation in generations.values()
+                   for chore, _ in generation}
+    inserted = conn_w.execute(
+        f"""INSERT INTO assignments(chore_id, week, year, year_week, assignee) 
+            VALUES {", ".join(["(?, ?, ?, ?, ?)"] * len(rows))}
+            RETURNING year, week, id, chore_id, assignee, status""",
+        [value for row in rows for value in row],
+    ).fetchall()
+    workload.record_inserted(conn_w, [(assignee, chore_id, status) 
+                                      for _, _, _, chore_id, assignee, status in inserted])
+    stats.refresh(conn_w, [(assignee, chore_id, year * 100 + week) 
+                           for year, week, _, chore_id, assignee, _ in inserted])
+    out = {}
+    for year, week, id, chore_id, assignee, status in inserted:
+        (out.setdefault((year, week), {})
+            .setdefault(chore_names[chore_id], {}))[id] = (assignee, status)
+    return out
+
+def weeks_between(start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+    """Every ISO (year, week) from `start` to `end`, both inclusive."""
+    monday = date.fromisocalendar(*start, 1)
+    last = date.fromisocalendar(*end, 1)
+    out = []
+    while monday <= last:
+        out.append(tuple(monday.isocalendar()[:2]))
+        monday += timedelta(days=7)
+    return out
+
+def check_range(start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+    """The weeks from `start` to `end` inclusive, if `get_schedules` may
+    query them.
+
+    Raises:
+        ValueError: If the range is reversed, longer than MAX_RANGE_WEEKS 
+            or ends too many weeks ahead.
+    """
+    weeks = weeks_between(start, end)
+    if not weeks:
+        raise ValueError(f"Invalid range. Got {start=} and {end=}.")
+    if len(weeks) > MAX_RANGE_WEEKS:
+        raise ValueError(f"Only {MAX_RANGE_WEEKS} weeks can be queried at once.")
+    if (date.fromisocalendar(*end, 1) - date.today()).days // 7 > MAX_WEEKS_FROM_NOW:
+        raise ValueError(f"Only schedules {MAX_WEEKS_FROM_NOW} weeks ahead can be queried.")
+    return weeks
+
+def get_schedules(
+    conn_w: DuckDBPyConnection,
+    start: tuple[int, int],
+    end: tuple[int, int],
+) -> list[tuple[int, int, dict[str, dict[int, tuple[str, bool]]], dict[str, str]]]:
+    """Return (year, week, schedule, due_days) for every week from `start` to
+    `end` inclusive, as `get_schedule` and `get_due_str_for_chores` would.
+    Stored weeks are read with one query. Missing weeks from the current
+    week on are generated and inserted together in one transaction, and
+    missing past weeks are returned empty; see `backfill` for those.
+
+    Raises:
+        ValueError: If the range is reversed, longer than MAX_RANGE_WEEKS 
+            or ends too many weeks ahead.
+    """
+    weeks = check_range(start, end)
+    rows = conn_w.execute("""SELECT assignments.year,
+                                    assignments.week,
+                                    chores.name,
+                                    assignments.id,
+                                    assignments.assignee,
+                                    assignments.status,
+                             FROM assignments JOIN chores ON (assignments.chore_id = chores.id)
+                             WHERE assignments.year_week BETWEEN ? AND ?
+                          """, (start[0] * 100 + start[1], end[0] * 100 + end[1])).fetchall()
+    stored = {}
+    for year, week, chore_name, id, assignee, status in rows:
+        (stored.setdefault((year, week), {})
+            .setdefault(chore_name, {}))[id] = (assignee, status)
+    current = tuple(date.today().isocalendar()[:2])
+    missing = [yw for yw in weeks if yw not in stored and yw >= current]
+    if missing:
+        conn_w.begin()
+        try:
+            stored |= insert_assignments(conn_w, plan_weeks(conn_w, missing))
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
+    frequencies = get_frequencies(conn_w)
+    out = []
+    for year, week in weeks:
+        schedule = stored.get((year, week), {})
+        out.append((year, week, schedule, due_strs(frequencies, schedule.keys(), year, week)))
+    return out
+
+def backfill(
+    conn_w: DuckDBPyConnection,
+    start: tuple[int, int],
+    end: tuple[int, int],
+) -> int:
+    """Generate every week from `start` to `end` inclusive that has no 
+    assignment yet, with the current chores and people. Meant for filling 
+    in history or regenerating many weeks after `remove_future_schedules`,
+    so the range is not limited by MAX_RANGE_WEEKS.
+
+    Returns:
+        int: The number of assignments inserted.
+    Raises:
+        ValueError: If the range is reversed or ends too many weeks ahead.
+    """
+    weeks = weeks_between(start, end)
+    if not weeks:
+        raise ValueError(f"Invalid range. Got {start=} and {end=}.")
+    if (date.fromisocalendar(*end, 1) - date.today()).days // 7 > MAX_WEEKS_FROM_NOW:
+        raise ValueError(f"Only schedules {MAX_WEEKS_FROM_NOW} weeks ahead can be queried.")
+    stored = set(conn_w.execute(
+        """SELECT DISTINCT year, week 
+           FROM assignments 
+           WHERE year_week BETWEEN ? AND ?""",
+        (start[0] * 100 + start[1], end[0] * 100 + end[1]),
+    ).fetchall())
+    missing = [yw for yw in weeks if yw not in stored]
+    if not missing:
+        return 0
+    inserted = 0
+    conn_w.begin()
+    try:
+        generations = plan_weeks(conn_w, missing)
+        for i in range(0, len(missing), BACKFILL_BATCH_WEEKS):
+            batch = {yw: generations[yw] for yw in missing[i:i+BACKFILL_BATCH_WEEKS]}
+            inserted += sum(len(assignments) 
+                            for schedule in insert_assignments(conn_w, batch).values()
+                            for assignments in schedule.values())
+        conn_w.commit()
+    except BaseException:
+        conn_w.rollback()
+        raise
+    schedule_cache.invalidate_weeks(missing) # The stored weeks are unchanged
+    return inserted
 
 def mark_done(
     conn_w: DuckDBPyConnection,
@@ -231,18 +451,7 @@ def mark_done(
     Returns:
         bool: True if successful; False if nothing has changed.
     """
-    conn_w.execute(
-        """UPDATE assignments 
-           SET status = TRUE 
-           WHERE id = ?""",
-        (assignment_id, ),
-    )
-    row = conn_w.execute(
-        """SELECT 1 FROM assignments 
-           WHERE id = ? AND status = TRUE""",
-        (assignment_id, ),
-    ).fetchone()
-    return row is not None
+    return set_status(conn_w, [assignment_id], True)[assignment_id]
 
 def mark_not_done(
     conn_w: DuckDBPyConnection, 
@@ -252,14 +461,57 @@ def mark_not_done(
     Returns:
         bool: True if successful; False if nothing has changed.
     """
-    conn_w.execute("""UPDATE assignments 
-                    SET status = FALSE 
-                    WHERE id = ? """, (assignment_id, ))
-    row = conn_w.execute("""SELECT 1 
-                            FROM assignments 
-                            WHERE id = ?
-                                AND status = FALSE""", (assignment_id, )).fetchone()
-    return row is not None
+    return set_status(conn_w, [assignment_id], False)[assignment_id]
+
+def set_status(
+    conn_w: DuckDBPyConnection,
+    assignment_ids: Iterable[int],
+    status: bool,
+) -> dict[int, bool]:
+    """Set the status of many assignments with one statement.
+
+    Returns:
+        dict[int, bool]: For every id, whether such an assignment exists
+            and now has `status`.
+    """
+    assignment_ids = list(dict.fromkeys(assignment_ids))
+    if not assignment_ids:
+        return {}
+    workload.record_statuses(conn_w, dict.fromkeys(assignment_ids, status))
+    rows = conn_w.execute(
+        f"""UPDATE assignments 
+            SET status = ? 
+            WHERE id IN ({", ".join(["?"] * len(assignment_ids))})
+            RETURNING id, assignee, chore_id, year_week""",
+        (status, *assignment_ids),
+    ).fetchall()
+    stats.refresh(conn_w, [change for _, *change in rows])
+    for assignment_id in assignment_ids:
+        schedule_cache.invalidate_assignment(assignment_id)
+    updated = {id for id, *_ in rows}
+    return {assignment_id: assignment_id in updated for assignment_id in assignment_ids}
+
+def set_chore_status(
+    conn_w: DuckDBPyConnection,
+    year: int,
+    week: int,
+    chore_name: str,
+    status: bool,
+) -> dict[int, bool]:
+    """Set the status of every assignment of a chore in a week with one 
+    statement. Returns the same as `set_status` for the ids found."""
+    workload.record_chore_status(conn_w, year, week, chore_name, status)
+    rows = conn_w.execute(
+        """UPDATE assignments 
+           SET status = ? 
+           WHERE year_week = ? 
+               AND chore_id = (SELECT id FROM chores WHERE name = ?)
+           RETURNING id, assignee, chore_id, year_week""",
+        (status, year * 100 + week, chore_name),
+    ).fetchall()
+    stats.refresh(conn_w, [change for _, *change in rows])
+    schedule_cache.invalidate_week(year, week)
+    return {id: True for id, *_ in rows}
 
 def remove_future_schedules(conn_w: DuckDBPyConnection) -> None:
     """Remove all schedules in the coming weeks but not the current week.
@@ -267,10 +519,41 @@ def remove_future_schedules(conn_w: DuckDBPyConnection) -> None:
     today = date.today()
     year, week, _ = today.isocalendar()
     # Delete any assignment in a later year, or same year with week >= current week
-    conn_w.execute(
-        "DELETE FROM assignments WHERE (year > ?) OR (year = ? AND week > ?)",
-        (year, year, week),
-    )
+    removed = conn_w.execute(
+        """DELETE FROM assignments WHERE year_week > ?
+           RETURNING assignee, chore_id, status, year_week""",
+        (year * 100 + week, ),
+    ).fetchall()
+    workload.record_removed(conn_w, [row[:3] for row in removed])
+    stats.refresh(conn_w, [(assignee, chore_id, year_week)
+                           for assignee, chore_id, _, year_week in removed])
+    schedule_cache.invalidate_after(year, week)
+
+def populated_week(
+    conn: DuckDBPyConnection, 
+    after: tuple[int, int] | None = None,
+    before: tuple[int, int] | None = None,
+    latest: bool = False,
+) -> tuple[int, int] | None:
+    """Find the earliest (or the `latest`) week with at least one assignment 
+    strictly between `after` and `before` with one query. Either bound may 
+    be omitted."""
+    conditions, params = [], []
+    if after is not None:
+        conditions.append("year_week > ?")
+        params.append(after[0] * 100 + after[1])
+    if before is not None:
+        conditions.append("year_week < ?")
+        params.append(before[0] * 100 + before[1])
+    row = conn.execute(
+        f"""SELECT {"max" if latest else "min"}(year_week)
+            FROM assignments
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}""",
+        params,
+    ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return divmod(row[0], 100)
 
 def next_week(conn: DuckDBPyConnection, year: int, week: int) -> tuple[int, int] | None:
     """
@@ -280,11 +563,10 @@ def next_week(conn: DuckDBPyConnection, year: int, week: int) -> tuple[int, int]
     - If the provided year/week is before the current ISO week:
         Search forward from the provided week up to the current week (inclusive)
         and return the first week that has at least one assignment in the DB.
-        If none found, return the current week.
+        If none found, return the week after the current week.
     - If the provided year/week is the current week or a future week:
-        Search forward from the next week and return the first week that has at
-        least one assignment, up to MAX_WEEKS_FROM_NOW ahead. If no such week
-        exists within the allowed window, return None.
+        Return the next week, unless it is more than MAX_WEEKS_FROM_NOW
+        ahead, in which case return None.
 
     Returns (year, week) or None when beyond MAX_WEEKS_FROM_NOW for future searches.
     """
@@ -293,31 +575,21 @@ def next_week(conn: DuckDBPyConnection, year: int, week: int) -> tuple[int, int]
         ny, nw, _ = d.isocalendar()
         return ny, nw
 
-    # helper to check DB for any assignment in the week
-    def has_assignment(y: int, w: int) -> bool:
-        row = conn.execute(
-            "SELECT 1 FROM assignments WHERE year = ? AND week = ? LIMIT 1",
-            (y, w),
-        ).fetchone()
-        return row is not None
-
     today = date.today()
     cur_y, cur_w, _ = today.isocalendar()
 
     y, w = next_yw(year, week)
-    # search forward up to current week inclusive
-    while (y, w) <= (cur_y, cur_w):
-        if has_assignment(y, w):
-            return (y, w)
-        y, w = next_yw(y, w)
+    if (y, w) <= (cur_y, cur_w):
+        # Anything populated from the next week up to current week inclusive
+        found = populated_week(conn, after=(year, week), before=next_yw(cur_y, cur_w))
+        if found is not None:
+            return found
+        y, w = next_yw(cur_y, cur_w)
 
-    # current or future: search forward starting from next week up to MAX_WEEKS_FROM_NOW
-    while True:
-        # compute weeks ahead relative to today
-        weeks_ahead = (date.fromisocalendar(y, w, 1) - today).days // 7
-        if weeks_ahead > MAX_WEEKS_FROM_NOW:
-            return None
-        return (y, w)
+    weeks_ahead = (date.fromisocalendar(y, w, 1) - today).days // 7
+    if weeks_ahead > MAX_WEEKS_FROM_NOW:
+        return None
+    return (y, w)
 
 
 def last_week(conn: DuckDBPyConnection, year: int, week: int) -> tuple[int, int] | None:
@@ -326,26 +598,13 @@ def last_week(conn: DuckDBPyConnection, year: int, week: int) -> tuple[int, int]
 
     Behavior:
     - If the provided year/week is after the current ISO week:
-        Search backward from the provided week down to the current week (inclusive)
-        and return the first week (closest to the provided week going backwards)
-        that has at least one assignment in the DB. If none found, return the current week.
+        Return the previous week.
     - If the provided year/week is the current week or a past week:
-        Search backward from the previous week and return the first week that has at
-        least one assignment, up to MAX_WEEKS_FROM_NOW weeks in the past. If no such
-        week exists within the allowed window, return None.
+        Return the closest earlier week that has at least one assignment,
+        or None if there is no such week.
 
-    Returns (year, week) or None when beyond MAX_WEEKS_FROM_NOW for past searches.
+    Returns (year, week) or None.
     """
-    def earliest_yw(conn: DuckDBPyConnection) -> tuple[int, int]:
-        row = conn.execute(
-            """SELECT year, week
-                FROM assignments
-                ORDER BY year ASC, week ASC
-                LIMIT 1""").fetchone()
-        if row is None: # No assignment at all
-            return tuple(date.today().isocalendar()[:2])
-        else:
-            return (row[0], row[1])
     def prev_yw(y: int, w: int) -> tuple[int, int]:
         d = date.fromisocalendar(y, w, 1) - timedelta(days=7)
         py, pw, _ = d.isocalendar()
@@ -354,22 +613,8 @@ def last_week(conn: DuckDBPyConnection, year: int, week: int) -> tuple[int, int]
     today = date.today()
     cur_y, cur_w, _ = today.isocalendar()
 
-    def has_assignment(y: int, w: int) -> bool:
-        row = conn.execute(
-            "SELECT 1 FROM assignments WHERE year = ? AND week = ? LIMIT 1",
-            (y, w),
-        ).fetchone()
-        return row is not None
-
     # If the requested week is in the future (strictly after current)
     if (year, week) > (cur_y, cur_w):
         return prev_yw(year, week)
 
-    # current or past: search backward starting from previous week up to MAX_WEEKS_FROM_NOW weeks ago
-    y, w = prev_yw(year, week)
-    earliest = earliest_yw(conn)
-    while (y, w) >= earliest:
-        if has_assignment(y, w):
-            return (y, w)
-        y, w = prev_yw(y, w)
-    return None
+    return populated_week(conn, before=(year, week), latest=True)
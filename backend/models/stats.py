@@ -0,0 +1,237 @@
+"""
+Per person and chore statistics, materialized in the `person_stats` table.
+
+Whenever assignments are written, the (assignee, chore_id, year_week) of
+each of them is passed to `refresh`. The runs before the earliest changed
+week are kept as stored, so only the assignments from that week on are
+read again, or from the start of the current run if the change falls
+inside it. Only changes to weeks before the current run replay the whole
+history of their pair. `rebuild` recomputes everything.
+
+Streaks count done assignments in a row, ordered by week, and every
+assignment that is not done ends one. The stored current streak is the
+run ending at the last done assignment; `get_stats` resets it if an
+assignment after that was missed, so only the still open current week
+does not break it.
+"""
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from typing import TypedDict
+from duckdb import DuckDBPyConnection
+
+from .people import NameNoFoundError
+
+Pair = tuple[str, int] # (assignee, chore_id)
+Change = tuple[str, int, int] # (assignee, chore_id, year_week)
+
+class ChoreStats(TypedDict):
+    assigned: int
+    done: int
+    completion_rate: float | None
+    last_done: dict[str, int] | None # {"year": ..., "week": ...}
+    current_streak: int
+    longest_streak: int
+
+class PersonStats(ChoreStats):
+    chores: dict[str, ChoreStats]
+
+@dataclass(slots=True)
+class _Runs:
+    """The stored runs of a pair, advanced one assignment at a time."""
+    last_done: int | None = None
+    current_streak: int = 0 # The run ending at `last_done`
+    run_start: int | None = None # First done week of that run
+    longest_before: int = 0 # Longest run before that one
+    next_miss: int | None = None # First week not done after `last_done`
+
+    def add(self, year_week: int, status: bool) -> None:
+        if not status:
+            if self.next_miss is None:
+                self.next_miss = year_week
+            return
+        if self.next_miss is not None:
+            self.longest_before = max(self.longest_before, self.current_streak)
+            self.current_streak = 0
+            self.next_miss = None
+        if not self.current_streak:
+            self.run_start = year_week
+        self.current_streak += 1
+        self.last_done = year_week
+
+def _summary_query(condition: str = "") -> str:
+    """Rows of `person_stats` for every pair whose assignments match
+    `condition`. Each miss starts a new run, so the done assignments
+    between two misses are one streak."""
+    return f"""
+        SELECT assignee, chore_id,
+               sum(total), sum(run_length), max(run_last),
+               coalesce(arg_max(run_length, run_last), 0),
+               coalesce(max(run_length), 0),
+               arg_max(run_first, run_last),
+               coalesce(max(run_length) FILTER (WHERE misses < current_run), 0),
+               min(first_week) FILTER (WHERE misses > coalesce(current_run, 0))
+        FROM (SELECT *, arg_max(misses, run_last) OVER (
+                            PARTITION BY assignee, chore_id) AS current_run
+              FROM (SELECT assignee, chore_id, misses,
+                           count(*) AS total,
+                           count(*) FILTER (WHERE status) AS run_length,
+                           min(year_week) AS first_week,
+                           min(year_week) FILTER (WHERE status) AS run_first,
+                           max(year_week) FILTER (WHERE status) AS run_last
+                    FROM (SELECT assignee, chore_id, year_week, status,
+                                 count(*) FILTER (WHERE NOT status) OVER (
+                                     PARTITION BY assignee, chore_id
+                                     ORDER BY year_week, id
+                                     ROWS UNBOUNDED PRECEDING) AS misses
+                          FROM assignments
+                          {condition})
+                    GROUP BY assignee, chore_id, misses))
+        GROUP BY assignee, chore_id"""
+
+def refresh(conn_w: DuckDBPyConnection, changes: Iterable[Change]) -> None:
+    """Update the statistics of the pairs of the written (assignee,
+    chore_id, year_week) assignments, reading their assignments from the
+    earliest changed week on. Run it in the transaction that wrote them,
+    after `workload` counted the same writes."""
+    starts: dict[Pair, int] = {}
+    for assignee, chore_id, year_week in changes:
+        pair = (assignee, chore_id)
+        starts[pair] = min(year_week, starts.get(pair, year_week))
+    if not starts:
+        return
+    changed = f"(VALUES {", ".join(["(?, ?)"] * len(starts))})"
+    pair_params = [value for pair in starts for value in pair]
+    stored = {(assignee, chore_id): _Runs(*runs)
+              for assignee, chore_id, *runs in conn_w.execute(
+                  f"""SELECT assignee, chore_id, last_done, current_streak,
+                             run_start, longest_before, next_miss
+                      FROM person_stats
+                      WHERE (assignee, chore_id) IN {changed}""",
+                  pair_params,
+              ).fetchall()}
+    runs: dict[Pair, _Runs] = {}
+    replayed: set[Pair] = set()
+    for pair, week in starts.items():
+        old = stored.get(pair, _Runs())
+        if old.last_done is None or week > old.last_done:
+            # Nothing from `week` on was done, so the runs before it stay
+            if old.next_miss is not None and old.next_miss >= week:
+                old.next_miss = None
+            runs[pair] = old
+        elif week >= old.run_start:
+            # Replay the current run; the ones before it stay
+            runs[pair] = _Runs(longest_before=old.longest_before)
+            starts[pair] = old.run_start
+            replayed.add(pair)
+    if runs:
+        for assignee, chore_id, year_week, status in conn_w.execute(
+            f"""SELECT assignee, chore_id, year_week, status
+                FROM assignments
+                WHERE year_week >= ? AND (assignee, chore_id) IN {changed}
+                ORDER BY year_week, id""",
+            [min(starts[pair] for pair in runs), *pair_params],
+        ).fetchall():
+            pair = (assignee, chore_id)
+            if pair in runs and year_week >= starts[pair]:
+                runs[pair].add(year_week, status)
+    # A replay that undid every done assignment of the current run needs
+    # the runs before it, so those pairs and the ones changed before
+    # their current run are summarized from their whole history
+    full = [pair for pair in starts if pair not in runs]
+    for pair in replayed:
+        if runs[pair].last_done is None:
+            del runs[pair]
+            full.append(pair)
+    counters = {(assignee, chore_id): (assigned, done)
+                for assignee, chore_id, assigned, done in conn_w.execute(
+                    f"""SELECT assignee, chore_id, assigned, done
+                        FROM workload
+                        WHERE assigned > 0 AND (assignee, chore_id) IN {changed}""",
+                    pair_params,
+                ).fetchall()}
+    rows = [(*pair, *counters[pair], pair_runs.last_done, pair_runs.current_streak,
+             max(pair_runs.longest_before, pair_runs.current_streak),
+             pair_runs.run_start, pair_runs.longest_before, pair_runs.next_miss)
+            for pair, pair_runs in runs.items() if pair in counters]
+    conn_w.execute(
+        f"""DELETE FROM person_stats USING {changed} AS changed(assignee, chore_id)
+            WHERE person_stats.assignee = changed.assignee
+                AND person_stats.chore_id = changed.chore_id""",
+        pair_params,
+    )
+    if rows:
+        conn_w.execute(
+            f"""INSERT INTO person_stats
+                VALUES {", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(rows))}""",
+            [value for row in rows for value in row],
+        )
+    if full:
+        assignees = sorted({assignee for assignee, _ in full})
+        # The assignee filter can use its index, the pair filter keeps the
+        # window over other chores of the same people out
+        conn_w.execute(
+            f"""INSERT INTO person_stats {_summary_query(
+                    f"WHERE assignee IN ({', '.join(['?'] * len(assignees))}) "
+                    f"AND (assignee, chore_id) IN (VALUES {', '.join(['(?, ?)'] * len(full))})"
+                )}""",
+            [*assignees, *(value for pair in full for value in pair)],
+        )
+
+def rebuild(conn_w: DuckDBPyConnection) -> None:
+    """Recompute the statistics of everyone from `assignments`."""
+    conn_w.execute("DELETE FROM person_stats")
+    conn_w.execute(f"INSERT INTO person_stats {_summary_query()}")
+
+def _chore_stats(
+    assigned: int,
+    done: int,
+    last_done: int | None,
+    current_streak: int,
+    longest_streak: int,
+) -> ChoreStats:
+    return ChoreStats(
+        assigned=assigned,
+        done=done,
+        completion_rate=done / assigned if assigned else None,
+        last_done=(None if last_done is None
+                   else dict(zip(("year", "week"), divmod(last_done, 100)))),
+        current_streak=current_streak,
+        longest_streak=longest_streak,
+    )
+
+def get_stats(conn: DuckDBPyConnection, name: str | None = None) -> dict[str, PersonStats]:
+    """Statistics of everyone, or only of `name`, read from `person_stats`.
+    The totals of a person sum up their chores; their streaks are the
+    largest of any chore.
+
+    Raises:
+        NameNoFoundError: If `name` is given but has no statistics.
+    """
+    year, week, _ = date.today().isocalendar()
+    # Only a miss in the current week, which is still open, keeps the streak
+    rows = conn.execute(
+        f"""SELECT person_stats.assignee, chores.name, assigned, done, last_done,
+                   CASE WHEN next_miss < ? THEN 0 ELSE current_streak END,
+                   longest_streak
+            FROM person_stats JOIN chores ON (person_stats.chore_id = chores.id)
+            {"WHERE person_stats.assignee = ?" if name is not None else ""}
+            ORDER BY person_stats.assignee, chores.name""",
+        [year * 100 + week] + ([] if name is None else [name]),
+    ).fetchall()
+    if name is not None and not rows:
+        raise NameNoFoundError(name)
+    totals: dict[str, list] = {}
+    chores: dict[str, dict[str, ChoreStats]] = {}
+    for assignee, chore_name, *values in rows:
+        chores.setdefault(assignee, {})[chore_name] = _chore_stats(*values)
+        assigned, done, last_done, current_streak, longest_streak = values
+        total = totals.setdefault(assignee, [0, 0, None, 0, 0])
+        total[0] += assigned
+        total[1] += done
+        if last_done is not None and (total[2] is None or last_done > total[2]):
+            total[2] = last_done
+        total[3] = max(total[3], current_streak)
+        total[4] = max(total[4], longest_streak)
+    return {assignee: PersonStats(**_chore_stats(*total), chores=chores[assignee])
+            for assignee, total in totals.items()}
@@ -0,0 +1,99 @@
+"""
+Per person and chore counters of assigned and done assignments, kept in
+the `workload` table.
+
+Every write to `assignments` updates the counters in the same transaction
+through the functions below, so the balancing solver never needs to
+aggregate the whole history. `rebuild` recomputes them from scratch,
+e.g. after assignments were written by hand.
+"""
+from collections.abc import Iterable, Mapping
+from duckdb import DuckDBPyConnection
+
+Key = tuple[str, int] # (assignee, chore_id)
+
+def apply(conn_w: DuckDBPyConnection, deltas: Mapping[Key, tuple[int, int]]) -> None:
+    """Add (assigned, done) to the counters of every (assignee, chore_id)."""
+    rows = [(assignee, chore_id, assigned, done)
+            for (assignee, chore_id), (assigned, done) in deltas.items()
+            if assigned or done]
+    if not rows:
+        return
+    conn_w.execute(
+        f"""INSERT INTO workload (assignee, chore_id, assigned, done)
+            VALUES {", ".join(["(?, ?, ?, ?)"] * len(rows))}
+            ON CONFLICT (assignee, chore_id) DO UPDATE
+            SET assigned = workload.assigned + excluded.assigned,
+                done = workload.done + excluded.done""",
+        [value for row in rows for value in row],
+    )
+
+def _deltas(rows: Iterable[tuple[str, int, bool]], sign: int) -> dict[Key, tuple[int, int]]:
+    out: dict[Key, tuple[int, int]] = {}
+    for assignee, chore_id, status in rows:
+        assigned, done = out.get((assignee, chore_id), (0, 0))
+        out[(assignee, chore_id)] = (assigned + sign, done + sign * status)
+    return out
+
+def record_inserted(conn_w: DuckDBPyConnection, rows: Iterable[tuple[str, int, bool]]) -> None:
+    """Count newly inserted (assignee, chore_id, status) rows."""
+    apply(conn_w, _deltas(rows, 1))
+
+def record_removed(conn_w: DuckDBPyConnection, rows: Iterable[tuple[str, int, bool]]) -> None:
+    """Uncount deleted (assignee, chore_id, status) rows."""
+    apply(conn_w, _deltas(rows, -1))
+
+def record_statuses(conn_w: DuckDBPyConnection, statuses: Mapping[int, bool]) -> None:
+    """Count the status changes about to be written. Must run before the
+    UPDATE, as only assignments whose status differs are counted."""
+    if not statuses:
+        return
+    conn_w.execute(
+        f"""INSERT INTO workload (assignee, chore_id, done)
+            SELECT assignments.assignee,
+                   assignments.chore_id,
+                   sum(CASE WHEN pending.status THEN 1 ELSE -1 END)
+            FROM assignments
+            JOIN (VALUES {", ".join(["(?, ?)"] * len(statuses))}) AS pending(id, status)
+                ON assignments.id = pending.id
+            WHERE assignments.status != pending.status
+            GROUP BY assignments.assignee, assignments.chore_id
+            ON CONFLICT (assignee, chore_id) DO UPDATE
+            SET done = workload.done + excluded.done""",
+        [value for item in statuses.items() for value in item],
+    )
+
+def record_chore_status(
+    conn_w: DuckDBPyConnection,
+    year: int,
+    week: int,
+    chore_name: str,
+    status: bool,
+) -> None:
+    """`record_statuses` for every assignment of a chore in a week."""
+    conn_w.execute(
+        """INSERT INTO workload (assignee, chore_id, done)
+           SELECT assignee, chore_id, count(*) * (CASE WHEN ? THEN 1 ELSE -1 END)
+           FROM assignments
+           WHERE year_week = ? AND status != ?
+               AND chore_id = (SELECT id FROM chores WHERE name = ?)
+           GROUP BY assignee, chore_id
+           ON CONFLICT (assignee, chore_id) DO UPDATE
+           SET done = workload.done + excluded.done""",
+        (status, year * 100 + week, status, chore_name),
+    )
+
+def rebuild(conn_w: DuckDBPyConnection) -> None:
+    """Recompute every counter from `assignments`."""
+    conn_w.execute("DELETE FROM workload")
+    conn_w.execute("""INSERT INTO workload (assignee, chore_id, assigned, done)
+                      SELECT assignee, chore_id, count(*), count(*) FILTER (WHERE status)
+                      FROM assignments
+                      GROUP BY assignee, chore_id""")
+
+def get_counters(conn: DuckDBPyConnection) -> dict[Key, tuple[int, int]]:
+    """Map (assignee, chore_id) to (assigned, done)."""
+    return {(assignee, chore_id): (assigned, done)
+            for assignee, chore_id, assigned, done in conn.execute(
+                "SELECT assignee, chore_id, assigned, done FROM workload"
+            ).fetchall()}
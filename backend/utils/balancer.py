@@ -0,0 +1,112 @@
+"""
+History-balanced alternative to the hash rotation in `schedules.rotate`.
+
+Every person's load is the weighted number of assignments they ever got,
+read from the `workload` counters. Week by week, the heaviest chores are
+handed out first, each to the `assignee_count` available people with the
+lowest load. The load grows with every pick, so later chores and weeks
+see it. Ties go to whoever has fewer chores in the same week, then to
+whoever has done fewer, so people who already did extra work are picked
+last, and finally to the order of `shuffled_group`, so a plan is
+reproducible.
+
+People who were away or joined late would otherwise be far below
+everyone else and get every chore until they caught up. Their load is
+therefore treated as at least the group average minus MAX_LAG.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from heapq import nsmallest
+from typing import TYPE_CHECKING
+
+from backend.models import schedules
+from backend.models.people import InvalidGroupError
+from backend.utils.shuffled_group import shuffled_group
+
+if TYPE_CHECKING:
+    from backend.models.chores import Chore
+    from backend.models.workload import Key
+
+DEFAULT_WEIGHT: float = 1.0
+WEIGHTS: dict[str, float] = {} # Chore name -> weight, DEFAULT_WEIGHT if missing
+MAX_LAG: float = 2.0 # Load a returning person may make up, in weights
+
+def weight(chore: Chore) -> float:
+    return WEIGHTS.get(chore["name"], DEFAULT_WEIGHT)
+
+def loads(
+    chores: Iterable[Chore],
+    counters: Mapping[Key, tuple[int, int]],
+) -> tuple[dict[str, float], dict[str, int]]:
+    """
+    Returns:
+        tuple[dict[str, float], dict[str, int]]: The weighted number of
+            assignments and the number of done assignments per person.
+    """
+    weights = {chore["id"]: weight(chore) for chore in chores}
+    load: dict[str, float] = {}
+    done: dict[str, int] = {}
+    for (assignee, chore_id), (assigned_count, done_count) in counters.items():
+        load[assignee] = (load.get(assignee, 0.0) 
+                          + assigned_count * weights.get(chore_id, DEFAULT_WEIGHT))
+        done[assignee] = done.get(assignee, 0) + done_count
+    return load, done
+
+def plan_weeks(
+    chores: list[Chore],
+    groups: dict[str, list[str]],
+    weeks: Iterable[tuple[int, int]],
+    load: dict[str, float],
+    done: dict[str, int],
+) -> dict[tuple[int, int], list[tuple[Chore, list[str]]]]:
+    """Plan `weeks` in order. Same output as `plan_week` for each week.
+    `load` is updated with the picks.
+
+    Raises:
+        InvalidGroupError: If a chore refers to an unknown group.
+    """
+    for chore in chores:
+        if chore["people_group"] not in groups:
+            raise InvalidGroupError(chore["people_group"])
+    frequencies = {chore["id"]: schedules.Frequency.from_str(chore["frequency"])
+                   for chore in chores}
+    # Heaviest first, so they are the ones spread most evenly
+    order = sorted(range(len(chores)),
+                   key=lambda i: (-weight(chores[i]), -chores[i]["assignee_count"]))
+    ranks = {chore["id"]: {name: n for n, name in enumerate(
+                 shuffled_group(groups[chore["people_group"]], chore["name"]))}
+             for chore in chores}
+    out = {}
+    for year, week in weeks:
+        busy: dict[str, int] = {}
+        picked: dict[int, list[str]] = {}
+        floors: dict[str, float] = {}
+        for i in order:
+            chore = chores[i]
+            try:
+                frequencies[chore["id"]].nth_turn(year, week)
+            except ValueError: # Not due
+                continue
+            group = groups[chore["people_group"]]
+            if not group:
+                continue
+            floor = floors.get(chore["people_group"])
+            if floor is None:
+                floor = (sum(load.get(name, 0.0) for name in group) / len(group)
+                         - MAX_LAG)
+                floors[chore["people_group"]] = floor
+            rank = ranks[chore["id"]]
+            assignees = nsmallest(
+                chore["assignee_count"], group,
+                key=lambda name: (max(load.get(name, 0.0), floor),
+                                  busy.get(name, 0),
+                                  done.get(name, 0),
+                                  rank[name]),
+            )
+            for name in assignees:
+                load[name] = max(load.get(name, 0.0), floor) + weight(chore)
+                busy[name] = busy.get(name, 0) + 1
+            picked[i] = assignees
+        out[(year, week)] = [(chores[i], picked[i]) for i in sorted(picked)]
+    return out
@@ -0,0 +1,23 @@
+"""
+Write-only file object that collects what is written to it until drained.
+Lets writers that expect a file, such as zipfile or Arrow IPC, feed a
+streamed response chunk by chunk.
+"""
+from io import RawIOBase
+
+class ChunkSink(RawIOBase):
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        """Everything written since the last call."""
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
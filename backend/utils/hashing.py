@@ -0,0 +1,110 @@
+"""
+Password hashing on a bounded worker pool, kept away from the database lock.
+
+`check_password_hash`/`generate_password_hash` are deliberately slow, so
+callers verify credentials here first and only take the lock for the
+short reads and writes around it. hashlib releases the GIL while
+hashing, so threads are enough to use several cores.
+
+A global cap on pending jobs and a per-account cap keep a burst of
+logins from queueing without limit; callers get `HashingBusyError`
+instead and can answer with a retryable error.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Callable, TypeVar, override
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from backend.utils import scope
+
+WORKERS: int = 2
+MAX_PENDING: int = 16 # Queued and running jobs over all accounts
+MAX_PENDING_PER_ACCOUNT: int = 2
+
+T = TypeVar("T")
+
+class HashingBusyError(Exception):
+    @override
+    def __init__(self, account: str | None = None, *args):
+        if account is None:
+            super().__init__("Too many password checks in progress. Try again later.")
+        else:
+            super().__init__(f"Too many password checks in progress for {account}. "
+                             "Try again later.")
+        self.account = account
+
+class HashingPool:
+    def __init__(self, workers: int = WORKERS):
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="hashing")
+        self._lock = Lock()
+        self._pending = 0
+        self._per_account: dict[str, int] = {}
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _reserve(self, account: str) -> None:
+        with self._lock:
+            if self._pending >= MAX_PENDING:
+                self.rejected += 1
+                raise HashingBusyError()
+            if self._per_account.get(account, 0) >= MAX_PENDING_PER_ACCOUNT:
+                self.rejected += 1
+                raise HashingBusyError(account)
+            self._pending += 1
+            self._per_account[account] = self._per_account.get(account, 0) + 1
+
+    def _release(self, account: str, seconds: float) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._per_account[account] <= 1:
+                del self._per_account[account]
+            else:
+                self._per_account[account] -= 1
+            self.completed += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def run(self, account: str, fn: Callable[..., T], *args) -> T:
+        """Run `fn(*args)` on the pool and wait for it.
+
+        Raises:
+            HashingBusyError: If the global or the per-account cap is reached.
+        """
+        self._reserve(account)
+        def timed() -> tuple[T, float]:
+            start = perf_counter()
+            return fn(*args), perf_counter() - start
+        seconds = 0.0
+        try:
+            result, seconds = self._executor.submit(timed).result()
+        finally:
+            self._release(account, seconds)
+        return result
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            return {"pending": self._pending,
+                    "completed": self.completed,
+                    "rejected": self.rejected,
+                    "latency_avg_ms": (1000 * self.total_seconds / self.completed
+                                       if self.completed else 0.0),
+                    "latency_max_ms": 1000 * self.max_seconds}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+hashing_pool = HashingPool()
+
+def _account(name: str) -> str:
+    # People of different households may share a name
+    household = scope.name()
+    return f"{household}/{name}" if household is not None else name
+
+def check(account: str, pw_hash: str, password: str) -> bool:
+    return hashing_pool.run(_account(account), check_password_hash, pw_hash, password)
+
+def generate(account: str, password: str) -> str:
+    return hashing_pool.run(_account(account), generate_password_hash, password)
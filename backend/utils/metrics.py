@@ -0,0 +1,195 @@
+"""
+In-process metrics in the Prometheus text format, served at /api/metrics.
+
+Recorded:
+- request latency per route template, method and status;
+- time spent waiting for `db.lock` and holding it, per `connect_r`/`connect_w`;
+- time to check a cursor out of the pool ("connection open time");
+- time and count per query, through `InstrumentedConnection`. Queries are
+  labelled with their SQL with whitespace collapsed, quoted strings and
+  names and every number (also inside names like read_snapshot_3)
+  replaced with ?, and repeated VALUES tuples and IN lists shortened, so
+  the labels stay few;
+- writes the write-behind queue dropped, per kind.
+
+Each observation is two `perf_counter` calls and a short critical
+section, cheap enough to leave on. A histogram keeps at most MAX_SERIES
+label sets; observations for any further ones are counted under labels
+that are all "other". Set ENABLED to False to skip all of
+it; /api/metrics then answers 404. In worker mode (see serve.py) every
+process keeps its own metrics.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from re import compile
+from threading import Lock
+from time import perf_counter
+from typing import Any
+
+ENABLED: bool = True
+PREFIX: str = "house"
+QUERY_LABEL_LENGTH: int = 160
+MAX_SERIES: int = 500 # Label sets per histogram
+BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                              0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+WHITESPACE = compile(r"\s+")
+STRING = compile(r"'(?:[^']|'')*'")
+QUOTED_NAME = compile(r'"(?:[^"]|"")*"')
+NUMBER = compile(r"\d+(?:\.\d+)?")
+VALUES_LIST = compile(r"\((?:\s*\?\s*,)*\s*\?\s*\)(?:\s*,\s*\((?:\s*\?\s*,)*\s*\?\s*\))+")
+IN_LIST = compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+Labels = tuple[tuple[str, str], ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = BUCKETS):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.buckets = buckets
+        self._lock = Lock()
+        # Labels -> [count per bucket (last one is +Inf), sum]
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key = tuple(labels.items())
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= MAX_SERIES:
+                    key = tuple((name, "other") for name in labels)
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, (total,))
+                      in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield (f"{self.name}_bucket"
+                       f"{_format_labels(labels, f'le="{bound}"')} {cumulative}")
+            yield f"{self.name}_sum{_format_labels(labels)} {total}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = f"{PREFIX}_{name}_total"
+        self.help = help
+        self._lock = Lock()
+        self._series: dict[Labels, int] = {}
+
+    def inc(self, amount: int = 1, **labels: str) -> None:
+        key = tuple(labels.items())
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            series = list(self._series.items())
+        for labels, value in series:
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+request_seconds = Histogram("request_seconds", "Request latency per route.")
+lock_wait_seconds = Histogram("db_lock_wait_seconds", "Time waiting for the database lock.")
+lock_hold_seconds = Histogram("db_lock_hold_seconds", "Time holding the database lock.")
+connection_open_seconds = Histogram("db_connection_open_seconds",
+                                    "Time to check a cursor out of the pool.")
+query_seconds = Histogram("db_query_seconds", "Time to execute a query, without fetching.")
+HISTOGRAMS: tuple[Histogram, ...] = (request_seconds, lock_wait_seconds, lock_hold_seconds,
+                                     connection_open_seconds, query_seconds)
+write_behind_dropped = Counter("write_behind_dropped",
+                               "Queued writes that failed every attempt and were lost.")
+COUNTERS: tuple[Counter, ...] = (write_behind_dropped, )
+
+# Name -> (help, callable returning {labels: value}) rendered as gauges
+_gauges: dict[str, tuple[str, Callable[[], dict[Labels, float]]]] = {}
+
+def register_gauge(name: str, help: str, collect: Callable[[], dict[Labels, float]]) -> None:
+    """Render the values `collect` returns at every scrape."""
+    _gauges[f"{PREFIX}_{name}"] = (help, collect)
+
+@lru_cache(maxsize=1024)
+def query_label(query: str) -> str:
+    query = WHITESPACE.sub(" ", query).strip()
+    query = STRING.sub("'?'", query)
+    query = QUOTED_NAME.sub('"?"', query)
+    query = NUMBER.sub("?", query)
+    query = VALUES_LIST.sub("(...), ...", query)
+    query = IN_LIST.sub("(...)", query)
+    return query[:QUERY_LABEL_LENGTH]
+
+class InstrumentedConnection:
+    """Wraps a DuckDB connection and times every `execute`. Everything
+    else is passed through."""
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: Any):
+        self._conn = conn
+
+    def execute(self, query: str, parameters: Any = None) -> InstrumentedConnection:
+        start = perf_counter()
+        try:
+            if parameters is None:
+                self._conn.execute(query)
+            else:
+                self._conn.execute(query, parameters)
+        finally:
+            query_seconds.observe(perf_counter() - start, query=query_label(query))
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+def uninstrumented(conn: Any) -> Any:
+    """The connection `conn` wraps if it is instrumented, else `conn`."""
+    return conn._conn if isinstance(conn, InstrumentedConnection) else conn
+
+def render() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for counter in COUNTERS:
+        lines.extend(counter.render())
+    for name, (help, collect) in _gauges.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in collect().items():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+def clear() -> None:
+    for histogram in HISTOGRAMS:
+        histogram.clear()
+    for counter in COUNTERS:
+        counter.clear()
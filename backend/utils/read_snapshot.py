@@ -0,0 +1,176 @@
+"""
+Optional in-memory read snapshot of the read-mostly tables.
+
+A background thread copies SNAPSHOT_TABLES into a fresh in-memory
+database attached to the main DuckDB instance, then swaps it in. The
+copy is read in one transaction, which only takes the database lock to
+start. It
+refreshes shortly after writes (`mark_stale`, called when a `connect_w`
+block ends) and at least every REFRESH_INTERVAL seconds. Readers use a
+pooled cursor switched to the current snapshot and never take the
+database lock, so they do not wait behind schedule generation or other
+writers. Each snapshot has a version number, which increases with every
+refresh, and the APIs return it in the X-Snapshot-Version header.
+
+Reads can lag behind writes by one refresh, so this is disabled unless
+ENABLED is set; `connect` then falls back to `connect_r`. In worker mode
+(see backend/writer.py) reads are already lock-free, so it falls back too.
+Snapshots only cover `db.DB_FILE`; households (see backend/households.py)
+are read directly.
+"""
+import atexit
+from collections.abc import Generator
+from contextlib import contextmanager
+from threading import Event, Lock, Thread
+
+import duckdb
+
+from backend import db
+from backend.utils import scope
+
+ENABLED: bool = False
+REFRESH_INTERVAL: float = 30.0 # Seconds between refreshes without writes
+REFRESH_DELAY: float = 0.05 # Seconds to gather writes before refreshing
+SNAPSHOT_TABLES: tuple[str, ...] = ("chores", "people", "assignments", "changelog",
+                                   "person_stats")
+
+class ReadSnapshot:
+    def __init__(self):
+        self.version = 0
+        self.refreshes = 0
+        self._guard = Lock()
+        self._refresh_lock = Lock()
+        self._readers: dict[int, int] = {} # Version -> readers using it
+        self._stale = Event()
+        self._stop = Event()
+        self._thread: Thread | None = None
+        self._pool: db.ConnectionPool | None = None # Pool the snapshots live in
+
+    def _catalog(self, version: int) -> str:
+        return f"read_snapshot_{version}"
+
+    def refresh(self) -> int:
+        """Copy SNAPSHOT_TABLES into a new snapshot and make it current.
+        Returns the new version."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        self._stale.clear()
+        pool = db.get_pool()
+        if pool is not self._pool: # Reopened, older snapshots are gone
+            with self._guard:
+                self._pool = pool
+                self._readers = {version: count for version, count in self._readers.items()
+                                 if count > 0}
+        version = self.version + 1
+        catalog = self._catalog(version)
+        # Not instrumented, the catalog name is new for every snapshot
+        with pool.cursor() as conn:
+            database, = conn.execute("SELECT current_database()").fetchone()
+            conn.execute(f"ATTACH ':memory:' AS {catalog}")
+            try:
+                # Copied in one transaction that only takes the lock to start,
+                # so writers are not held up by the size of the history
+                db.begin_consistent(conn)
+                try:
+                    for table in SNAPSHOT_TABLES:
+                        conn.execute(f"""CREATE TABLE {catalog}.{table} AS
+                                         SELECT * FROM "{database}".main.{table}""")
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                for name, (table, column) in db.INDEXES.items():
+                    if table in SNAPSHOT_TABLES:
+                        conn.execute(f"CREATE INDEX {name} ON {catalog}.{table} ({column})")
+            except BaseException:
+                conn.execute(f"DETACH {catalog}")
+                raise
+        with self._guard:
+            previous, self.version = self.version, version
+            self._readers[version] = 0
+            self.refreshes += 1
+        self._release(previous)
+        return version
+
+    def _release(self, version: int) -> None:
+        """Detach `version` if it is neither current nor in use."""
+        with self._guard:
+            if version == self.version or self._readers.get(version, 0) > 0:
+                return
+            self._readers.pop(version, None)
+        if version:
+            with db.get_pool().cursor() as conn:
+                conn.execute(f"DETACH DATABASE IF EXISTS {self._catalog(version)}")
+
+    def mark_stale(self) -> None:
+        self._stale.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._stale.wait(REFRESH_INTERVAL)
+            if self._stop.wait(REFRESH_DELAY):
+                return
+            try:
+                self.refresh()
+            except duckdb.Error as e:
+                print(f"READ SNAPSHOT REFRESH FAILED due to {e}")
+
+    def start(self) -> None:
+        if self._pool is not db.get_pool():
+            with self._refresh_lock:
+                if self._pool is not db.get_pool():
+                    self._refresh()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name="read-snapshot", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._stale.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @contextmanager
+    def connect(self) -> Generator[tuple[duckdb.DuckDBPyConnection, int], None, None]:
+        """Yield a cursor reading the current snapshot, and its version."""
+        self.start()
+        with self._guard:
+            version = self.version
+            self._readers[version] += 1
+        try:
+            with db.get_pool().cursor() as conn:
+                database, = conn.execute("SELECT current_database()").fetchone()
+                conn.execute(f"USE {self._catalog(version)}")
+                try:
+                    yield db.instrument(conn), version
+                finally:
+                    conn.execute(f'USE "{database}"')
+        finally:
+            with self._guard:
+                self._readers[version] -= 1
+            self._release(version)
+
+    def stats(self) -> dict[str, int]:
+        with self._guard:
+            return {"version": self.version,
+                    "refreshes": self.refreshes,
+                    "readers": sum(self._readers.values())}
+
+read_snapshot = ReadSnapshot()
+db.write_hooks.append(read_snapshot.mark_stale)
+atexit.register(read_snapshot.close)
+
+@contextmanager
+def connect() -> Generator[tuple[duckdb.DuckDBPyConnection, int | None], None, None]:
+    """Yield a read connection and the snapshot version it reads, which is
+    None when reads go to the database itself."""
+    if not ENABLED or db.WRITER_ADDRESS is not None or scope.current.get() is not None:
+        with db.connect_r() as conn:
+            yield conn, None
+        return
+    with read_snapshot.connect() as (conn, version):
+        yield conn, version
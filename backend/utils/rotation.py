@@ -0,0 +1,104 @@
+"""
+Array version of `backend.models.schedules.rotate` for many weeks at once.
+
+For one chore, the turn of every requested week is computed with NumPy
+arithmetic on the Monday ordinals, and the assignees are gathered from
+the shuffled roster with a single modular index matrix. The result is
+identical to calling `rotate` week by week.
+"""
+from __future__ import annotations
+
+import numpy as np
+from collections.abc import Iterable
+from datetime import date
+from typing import TYPE_CHECKING
+
+from backend.models import schedules
+from backend.models.people import InvalidGroupError
+from backend.utils.shuffled_group import shuffled_group
+
+if TYPE_CHECKING:
+    from backend.models.chores import Chore
+
+EPOCH_ORDINAL: int = date(1970, 1, 1).toordinal()
+
+def monday_ordinals(years: np.ndarray, weeks: np.ndarray) -> np.ndarray:
+    """`date.fromisocalendar(year, week, 1).toordinal()` for every pair."""
+    jan4 = ((years - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+            .astype(np.int64) + 3)
+    # 1970-01-01 is a Thursday, so (days + 3) % 7 is 0 on Mondays
+    first_monday = jan4 - (jan4 + 3) % 7
+    return first_monday + (weeks - 1) * 7 + EPOCH_ORDINAL
+
+def turns(
+    frequency: str,
+    years: np.ndarray,
+    weeks: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns:
+        tuple[np.ndarray, np.ndarray]: A boolean mask of the weeks in which
+            the chore is due and `nth_turn` of every week (only meaningful
+            where the mask is set).
+    """
+    freq = schedules.Frequency.from_str(frequency)
+    if isinstance(freq, schedules.FreqPeriodical):
+        n, remainder = np.divmod(monday_ordinals(years, weeks) // 7 + freq.offset,
+                                 freq.interval)
+        return remainder == 0, n
+    if isinstance(freq, schedules.FreqSpecific):
+        # Like FreqSpecific.nth_turn, only the week number is looked at
+        week_no = np.array(sorted(freq.week_no), dtype=np.int64)
+        n = np.searchsorted(week_no, weeks)
+        due = np.isin(weeks, week_no)
+        return due, n
+    raise ValueError(f"Invalid frequency. Got {repr(frequency)}.")
+
+def assignee_matrix(
+    chore: Chore,
+    roster: list[str],
+    years: np.ndarray,
+    weeks: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Args:
+        roster: Available people of the chore's group, in any order.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The due mask and a
+            (len(weeks), assignee_count) array of assignee names.
+    Raises:
+        ZeroDivisionError: If the chore is due but nobody is available,
+            as `rotate` does.
+    """
+    due, n = turns(chore["frequency"], years, weeks)
+    count = chore["assignee_count"]
+    group = np.array(shuffled_group(roster, chore["name"]), dtype=object)
+    if len(group) == 0:
+        if due.any():
+            raise ZeroDivisionError(f"Nobody is available for {repr(chore['name'])}.")
+        return due, np.empty((len(weeks), count), dtype=object)
+    start = n * count % len(group)
+    indices = (start[:, None] + np.arange(count)[None, :]) % len(group)
+    return due, group[indices]
+
+def plan_weeks(
+    chores: list[Chore],
+    groups: dict[str, list[str]],
+    year_weeks: Iterable[tuple[int, int]],
+) -> dict[tuple[int, int], list[tuple[Chore, list[str]]]]:
+    """The output of `schedules.plan_week` for every week in `year_weeks`."""
+    year_weeks = list(year_weeks)
+    out = {yw: [] for yw in year_weeks}
+    if not year_weeks:
+        return out
+    years, weeks = np.array(year_weeks, dtype=np.int64).T
+    for chore in chores:
+        roster = groups.get(chore["people_group"])
+        if roster is None:
+            raise InvalidGroupError(chore["people_group"])
+        if chore["assignee_count"] <= 0:
+            continue # `rotate` gives an empty list, which is skipped
+        due, matrix = assignee_matrix(chore, roster, years, weeks)
+        for i in np.flatnonzero(due):
+            out[year_weeks[i]].append((chore, matrix[i].tolist()))
+    return out
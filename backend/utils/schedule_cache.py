@@ -0,0 +1,118 @@
+"""
+In-process cache of the weekly schedule payload served by
+`GET /api/schedules/`, so that a week which has not changed is answered
+without touching DuckDB or the global lock.
+
+Readers take `epoch()` before they query the database and hand it back to
+`put()`. Every invalidation bumps the epoch, so a payload read before a
+concurrent write is dropped instead of being cached stale.
+
+Entries belong to the household of the caller (see `scope`), and
+invalidations only touch that household.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from backend.utils import scope
+
+Key = tuple[str | None, int, int] # (household, year, week)
+
+CACHE_SIZE: int = 128 # Weeks
+
+class ScheduleCache:
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._epoch = 0
+        self._entries: OrderedDict[Key, dict[str, Any]] = OrderedDict()
+        self._owners: dict[tuple[str | None, int], Key] = {} # (household, assignment id) -> key
+        self._lock = Lock()
+
+    def epoch(self) -> int:
+        with self._lock:
+            return self._epoch
+
+    def get(self, year: int, week: int) -> dict[str, Any] | None:
+        key = (scope.name(), year, week)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, year: int, week: int, payload: dict[str, Any], epoch: int) -> None:
+        """`payload` must hold "schedule" and "due_days" and must not be
+        mutated afterwards."""
+        key = (scope.name(), year, week)
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._drop(key)
+            self._entries[key] = payload
+            for assignments in payload["schedule"].values():
+                for assignment_id in assignments:
+                    self._owners[(key[0], assignment_id)] = key
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: Key) -> None:
+        payload = self._entries.pop(key, None)
+        if payload is None:
+            return
+        for assignments in payload["schedule"].values():
+            for assignment_id in assignments:
+                self._owners.pop((key[0], assignment_id), None)
+
+    def invalidate_week(self, year: int, week: int) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._drop((scope.name(), year, week))
+
+    def invalidate_weeks(self, weeks: list[tuple[int, int]]) -> None:
+        """Like `invalidate_week` for each of `weeks`, as one invalidation."""
+        household = scope.name()
+        with self._lock:
+            self._epoch += 1
+            for year, week in weeks:
+                self._drop((household, year, week))
+
+    def invalidate_assignment(self, assignment_id: int) -> None:
+        with self._lock:
+            self._epoch += 1
+            key = self._owners.get((scope.name(), assignment_id))
+            if key is not None:
+                self._drop(key)
+
+    def invalidate_after(self, year: int, week: int) -> None:
+        """Forget every week strictly after the given one."""
+        household = scope.name()
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._entries
+                        if key[0] == household and key[1:] > (year, week)]:
+                self._drop(key)
+
+    def clear(self) -> None:
+        """Forget every week of the current household."""
+        household = scope.name()
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._entries if key[0] == household]:
+                self._drop(key)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "size": len(self._entries),
+                    "max_size": self.size}
+
+schedule_cache = ScheduleCache()
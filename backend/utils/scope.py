@@ -0,0 +1,15 @@
+"""
+The household the current request works on, see backend/households.py.
+None means the default database, `db.DB_FILE`.
+
+Kept apart from `households` so that the caches can key their entries by
+household without importing the database layer.
+"""
+from contextvars import ContextVar
+from typing import Any
+
+current: ContextVar[Any] = ContextVar("household", default=None) # households.Household | None
+
+def name() -> str | None:
+    household = current.get()
+    return household.name if household is not None else None
@@ -0,0 +1,85 @@
+"""
+In-process cache of session token -> (user id, name), so that a valid
+session cookie is resolved without touching DuckDB.
+
+Entries expire after `TTL` seconds. Like `schedule_cache`, every
+invalidation bumps an epoch and `put()` ignores lookups that started
+before it, so a token removed by a concurrent logout is never cached.
+Tokens are looked up within the household of the caller, see `scope`.
+"""
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from backend.utils import scope
+
+CACHE_SIZE: int = 1024
+TTL: float = 300.0 # Seconds
+
+class SessionCache:
+    def __init__(self, size: int = CACHE_SIZE, ttl: float = TTL):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._epoch = 0
+        # (household, token) -> ((user id, name), expiry)
+        self._entries: OrderedDict[tuple[str | None, str], tuple[tuple[int, str], float]] = OrderedDict()
+        self._lock = Lock()
+
+    def epoch(self) -> int:
+        with self._lock:
+            return self._epoch
+
+    def get(self, token: str) -> tuple[int, str] | None:
+        key = (scope.name(), token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, token: str, person: tuple[int, str], epoch: int) -> None:
+        key = (scope.name(), token)
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[key] = (tuple(person), monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard_token(self, token: str) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop((scope.name(), token), None)
+
+    def discard_person(self, *, id: int | None = None, name: str | None = None) -> None:
+        """Forget every session of the person with the given id or name."""
+        household = scope.name()
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key, ((user_id, username), _) in self._entries.items()
+                        if key[0] == household and (user_id == id or username == name)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Forget every session of the current household."""
+        household = scope.name()
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._entries if key[0] == household]:
+                del self._entries[key]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "size": len(self._entries),
+                    "max_size": self.size}
+
+session_cache = SessionCache()
@@ -1,12 +1,50 @@
-from hashlib import md5
+from hashlib import md5, blake2b
+from collections import OrderedDict
 from collections.abc import Iterable
+from functools import lru_cache
 from operator import itemgetter
+from threading import Lock
+from typing import Literal
 
-def shuffled_group(set_of_people: Iterable[str], 
-                   chore_name: str) -> list[str]:
-    hashed_chore_name = int.from_bytes(md5(chore_name.encode()).digest())
-    hashes_n_names = [(hashed_chore_name 
-                        ^ int.from_bytes(md5(name.encode()).digest()), 
-                       name)
+# "md5" keeps every existing rotation. "blake2b" is faster but reorders
+# everyone, so only switch it on for a new household or with a reset.
+HASH_MODE: Literal["md5", "blake2b"] = "md5"
+CACHE_SIZE: int = 1024
+
+# Keyed by the roster itself, so a changed group is a different key and no
+# write ever needs to invalidate an ordering; old rosters age out of the LRU.
+_orderings: OrderedDict[tuple[str, str, frozenset[str]], tuple[str, ...]] = OrderedDict()
+_orderings_lock = Lock()
+
+@lru_cache(maxsize=4096)
+def digest(text: str, mode: Literal["md5", "blake2b"] = "md5") -> int:
+    if mode == "md5":
+        return int.from_bytes(md5(text.encode()).digest())
+    if mode == "blake2b":
+        return int.from_bytes(blake2b(text.encode(), digest_size=16).digest())
+    raise ValueError(f"Invalid hash mode. Got {repr(mode)}.")
+
+def _shuffle(set_of_people: Iterable[str], chore_name: str, mode: str) -> list[str]:
+    hashed_chore_name = digest(chore_name, mode)
+    hashes_n_names = [(hashed_chore_name ^ digest(name, mode), name)
                       for name in set_of_people]
     return list(map(itemgetter(1), sorted(hashes_n_names)))
+
+def shuffled_group(set_of_people: Iterable[str],
+                   chore_name: str) -> list[str]:
+    people = list(set_of_people)
+    roster = frozenset(people)
+    if len(roster) != len(people): # Duplicated names can't be keyed by a set
+        return _shuffle(people, chore_name, HASH_MODE)
+    key = (HASH_MODE, chore_name, roster)
+    with _orderings_lock:
+        ordering = _orderings.get(key)
+        if ordering is not None:
+            _orderings.move_to_end(key)
+            return list(ordering)
+    ordering = tuple(_shuffle(people, chore_name, HASH_MODE))
+    with _orderings_lock:
+        _orderings[key] = ordering
+        if len(_orderings) > CACHE_SIZE:
+            _orderings.popitem(last=False)
+    return list(ordering)
@@ -0,0 +1,138 @@
+"""
+Serving of the built frontend in `frontend/dist`.
+
+Vite names the files under `assets/` after a hash of their content, so
+they never change: they are sent with an immutable, year-long cache
+policy. Compressible files are precompressed with gzip, and brotli if
+the `brotli` package is installed, when the app starts. The variant the
+client accepts is sent with `Vary: Accept-Encoding`.
+
+`index.html` is kept in memory with its compressed variants and an ETag,
+and revalidated on every navigation. It is reloaded when the file on
+disk changes. Paths without a file extension are frontend routes and get
+`index.html`; missing files get a 404.
+
+Other files, such as the chore pictures, are sent by werkzeug with
+conditional requests and Range support, revalidated on every use.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from hashlib import sha256
+from threading import Lock
+
+from flask import Request, Response, abort, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASHED_ASSET = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8,}\.\w+$")
+COMPRESSIBLE: tuple[str, ...] = (".js", ".mjs", ".css", ".html", ".svg", ".json",
+                                 ".map", ".txt", ".xml", ".wasm")
+MIN_COMPRESS_SIZE: int = 1024 # Smaller files are not worth it
+IMMUTABLE: str = "public, max-age=31536000, immutable"
+REVALIDATE: str = "no-cache"
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS: dict[str, str] = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _accepted(request: Request, available) -> str | None:
+    """The preferred encoding of `available` that the client accepts."""
+    for encoding in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+class StaticFiles:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = Lock()
+        self._index: tuple[float, str, dict[str, bytes]] | None = None # (mtime, etag, body per encoding)
+
+    def precompress(self) -> int:
+        """Write the compressed variants of every compressible file next to
+        it, unless they are already newer. Returns the number written."""
+        written = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(COMPRESSIBLE):
+                    continue
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                if stat.st_size < MIN_COMPRESS_SIZE:
+                    continue
+                data = None
+                for encoding, suffix in ENCODINGS.items():
+                    target = path + suffix
+                    if os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+                        continue
+                    if data is None:
+                        with open(path, 'rb') as file:
+                            data = file.read()
+                    tmp = f"{target}.{os.getpid()}.tmp" # Workers may start together
+                    with open(tmp, 'wb') as file:
+                        file.write(_compress(data, encoding))
+                    os.replace(tmp, target)
+                    written += 1
+        return written
+
+    def _load_index(self) -> tuple[str, dict[str, bytes]]:
+        path = os.path.join(self.root, "index.html")
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            abort(404)
+        index = self._index
+        if index is not None and index[0] == mtime:
+            return index[1], index[2]
+        with self._lock:
+            with open(path, 'rb') as file:
+                data = file.read()
+            bodies = {"identity": data}
+            for encoding in ENCODINGS:
+                bodies[encoding] = _compress(data, encoding)
+            etag = sha256(data).hexdigest()[:32]
+            self._index = (mtime, etag, bodies)
+        return etag, bodies
+
+    def index(self, request: Request) -> Response:
+        etag, bodies = self._load_index()
+        encoding = _accepted(request, bodies)
+        response = Response(bodies[encoding or "identity"], mimetype="text/html")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = REVALIDATE
+        # The ETag names the content; the encoding is part of the representation
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+        return response.make_conditional(request)
+
+    def serve(self, request: Request, path: str) -> Response:
+        """Respond to GET `path`, relative to the root."""
+        if path in ("", "index.html"):
+            return self.index(request)
+        full = safe_join(self.root, path)
+        if full is None or not os.path.isfile(full):
+            if "." in os.path.basename(path):
+                abort(404)
+            return self.index(request) # A frontend route
+        mimetype = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        available = {encoding for encoding, suffix in ENCODINGS.items()
+                     if os.path.isfile(full + suffix)} if full.endswith(COMPRESSIBLE) else set()
+        encoding = _accepted(request, available)
+        response = send_file(full + ENCODINGS[encoding] if encoding else full,
+                             mimetype=mimetype, conditional=True, max_age=None)
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        if full.endswith(COMPRESSIBLE):
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE if HASHED_ASSET.search(path) else REVALIDATE
+        return response
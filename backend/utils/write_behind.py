@@ -0,0 +1,229 @@
+"""
+Optional write-behind queue for changelog entries and assignment status
+toggles.
+
+Instead of one INSERT/UPDATE per request under the write lock, writes are
+queued and a background thread commits them in groups, every
+FLUSH_INTERVAL seconds or as soon as BATCH_SIZE writes are waiting,
+whichever comes first. Within a group, only the last status of each
+assignment is written, so the order of toggles per assignment is kept.
+Changelog entries keep the time at which they were queued.
+
+When the queue holds MAX_QUEUE writes, `submit` blocks for up to
+SUBMIT_TIMEOUT seconds and then raises `WriteBehindFullError`. `close()`,
+which also runs at exit, flushes everything still queued.
+
+A group that fails is retried up to MAX_RETRIES times, then written one
+write at a time so that a bad write cannot hold up the rest. Writes that
+still fail are dropped: they are logged as errors through the app logger,
+counted in `stats()["dropped"]` and in the
+`house_write_behind_dropped_total` metric per kind of write.
+While closing, failed groups go straight to writing one at a time.
+
+Disabled unless ENABLED is set; the APIs then write synchronously as before.
+The queue writes to `db.DB_FILE`, so households (see backend/households.py)
+always write synchronously; check `active()`.
+"""
+import atexit
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from threading import Condition, Thread
+from time import monotonic
+from typing import override
+
+from backend.db import connect_w
+from backend.models import changelog, workload, stats
+from backend.utils import metrics, scope
+from backend.utils.schedule_cache import schedule_cache
+
+ENABLED: bool = False
+FLUSH_INTERVAL: float = 0.05 # Seconds
+BATCH_SIZE: int = 256
+MAX_QUEUE: int = 4096
+SUBMIT_TIMEOUT: float = 2.0 # Seconds
+FLUSH_TIMEOUT: float = 2.0 # Seconds `flush` waits for the queue to drain
+MAX_RETRIES: int = 3 # Attempts per group before writing one at a time
+
+# A child of `app.logger` (which Flask names after backend.app), so its
+# records go wherever the app's own do
+logger = logging.getLogger("backend.app.write_behind")
+
+# ("changelog", description, created_at) or ("status", assignment_id, status)
+Write = tuple[str, str | int, datetime | bool]
+
+class WriteBehindFullError(Exception):
+    @override
+    def __init__(self, *args):
+        super().__init__("Too many pending writes. Try again later.")
+
+class WriteBehindTimeoutError(Exception):
+    @override
+    def __init__(self, *args):
+        super().__init__("Pending writes are taking too long. Try again later.")
+
+class WriteBehind:
+    def __init__(self):
+        self._queue: deque[Write] = deque()
+        self._cond = Condition()
+        self._thread: Thread | None = None
+        self._closing = False
+        self._in_flight = False
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, write: Write) -> None:
+        """
+        Raises:
+            WriteBehindFullError: If the queue stays full for SUBMIT_TIMEOUT.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._queue) < MAX_QUEUE,
+                                       SUBMIT_TIMEOUT):
+                raise WriteBehindFullError()
+            self._queue.append(write)
+            if self._thread is None or not self._thread.is_alive():
+                self._closing = False
+                self._thread = Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def add_changelog(self, description: str) -> None:
+        description = description.strip()
+        if not description:
+            raise ValueError("description must be a non-empty string")
+        self.submit(("changelog", description, datetime.now(timezone.utc)))
+
+    def set_status(self, assignment_id: int, status: bool) -> None:
+        self.submit(("status", assignment_id, status))
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closing)
+                if not self._queue:
+                    return
+                deadline = monotonic() + FLUSH_INTERVAL
+                while (len(self._queue) < BATCH_SIZE and not self._closing
+                       and (remaining := deadline - monotonic()) > 0):
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft()
+                         for _ in range(min(BATCH_SIZE, len(self._queue)))]
+                self._in_flight = True
+            try:
+                self._flush(batch)
+            except Exception as e:
+                logger.warning("Write-behind flush of %d writes failed: %s", len(batch), e)
+                failures += 1
+                with self._cond:
+                    retry = failures < MAX_RETRIES and not self._closing
+                    if retry:
+                        self._queue.extendleft(reversed(batch))
+                        self._in_flight = False
+                        self._cond.wait(FLUSH_INTERVAL)
+                if retry:
+                    continue
+                self._flush_each(batch)
+            failures = 0
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all() # Wake up blocked submitters and `flush`
+
+    def _flush_each(self, batch: list[Write]) -> None:
+        for write in batch:
+            try:
+                self._flush([write])
+            except Exception as e:
+                logger.error("Write-behind dropped %r: %s", write, e)
+                metrics.write_behind_dropped.inc(kind=write[0])
+                with self._cond:
+                    self.dropped += 1
+
+    def _flush(self, batch: list[Write]) -> None:
+        entries = [(description, created_at)
+                   for kind, description, created_at in batch if kind == "changelog"]
+        statuses: dict[int, bool] = {}
+        for kind, assignment_id, status in batch:
+            if kind == "status":
+                statuses[assignment_id] = status
+        with connect_w() as conn_w:
+            conn_w.begin()
+            try:
+                if entries:
+                    conn_w.execute(
+                        f"""INSERT INTO changelog (description, created_at)
+                            VALUES {", ".join(["(?, ?)"] * len(entries))}""",
+                        [value for entry in entries for value in entry],
+                    )
+                if statuses:
+                    workload.record_statuses(conn_w, statuses)
+                    changed = conn_w.execute(
+                        f"""UPDATE assignments
+                            SET status = pending.status
+                            FROM (VALUES {", ".join(["(?, ?)"] * len(statuses))})
+                                AS pending(id, status)
+                            WHERE assignments.id = pending.id
+                            RETURNING assignments.assignee, assignments.chore_id,
+                                assignments.year_week""",
+                        [value for item in statuses.items() for value in item],
+                    ).fetchall()
+                    stats.refresh(conn_w, changed)
+                conn_w.commit()
+            except BaseException:
+                conn_w.rollback()
+                raise
+        for assignment_id in statuses:
+            schedule_cache.invalidate_assignment(assignment_id)
+        self.flushes += 1
+        self.written += len(batch)
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> None:
+        """Block until everything queued so far is committed.
+
+        Raises:
+            WriteBehindTimeoutError: If that takes longer than `timeout` seconds.
+        """
+        with self._cond:
+            self._cond.notify_all()
+            if not self._cond.wait_for(lambda: not self._queue and not self._in_flight,
+                                       timeout):
+                raise WriteBehindTimeoutError()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self._thread = None
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {"queued": len(self._queue),
+                    "flushes": self.flushes,
+                    "written": self.written,
+                    "dropped": self.dropped}
+
+write_behind = WriteBehind()
+atexit.register(write_behind.close)
+
+def active() -> bool:
+    """Whether writes of the current request go through the queue."""
+    return ENABLED and scope.current.get() is None
+
+def log_change(description: str) -> None:
+    """Queue a changelog entry if `active()`, otherwise insert it. Call it
+    outside of `connect_w`: a full queue blocks, and the queue needs the
+    lock to drain.
+
+    Raises:
+        WriteBehindFullError: If queued and the queue stays full.
+    """
+    if active():
+        write_behind.add_changelog(description)
+    else:
+        with connect_w() as conn_w:
+            changelog.add_changelog(conn_w, description)
@@ -0,0 +1,192 @@
+"""
+Single-writer database daemon.
+
+The writer is the only process that opens DB_FILE read-write. Worker
+processes (see serve.py) set `db.WRITER_ADDRESS` and then:
+- run every `connect_w` block as a session here over a Unix socket. A
+  session holds this process' write lock from "open" to "close", so
+  check-then-act code such as `get_schedule` stays atomic;
+- serve `connect_r` from the latest snapshot, a read-only copy of the
+  database that the writer publishes in SNAPSHOT_DIR after writes.
+
+If the writer is down, workers keep serving reads from the last snapshot,
+and writes fail with `WriterUnavailableError` (503).
+
+The socket runs any SQL it receives, so it is only accessible to the
+user running the writer, and connections must prove the key in
+AUTHKEY_ENV. serve.py generates a new key for every run.
+
+Run it with `HOUSE_WRITER_AUTHKEY=<hex key> python -m backend.writer [socket path]`.
+"""
+import os
+import shutil
+import sys
+from contextlib import ExitStack
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, Listener
+from threading import Event, Lock, Thread
+from time import time
+
+import duckdb
+
+from backend import db
+
+ADDRESS: str = os.path.join(os.path.dirname(__file__), "writer.sock")
+SESSION_TIMEOUT: float = 10.0 # Seconds a worker may idle inside a session
+SNAPSHOT_INTERVAL: float = 0.5 # Seconds between snapshots while writes happen
+KEEP_SNAPSHOTS: int = 3
+READ_ONLY_STATEMENTS = frozenset({"SELECT", "WITH", "EXPLAIN", "DESCRIBE", "SHOW"})
+AUTHKEY_ENV: str = "HOUSE_WRITER_AUTHKEY" # Hex encoded key shared with the workers
+SOCKET_MODE: int = 0o600
+
+_dirty = Event()
+_publish_lock = Lock()
+
+def publish_snapshot() -> str:
+    """Checkpoint the database, copy the file into SNAPSHOT_DIR and point 
+    CURRENT at the copy. Returns the snapshot file name."""
+    os.makedirs(db.SNAPSHOT_DIR, exist_ok=True)
+    with _publish_lock:
+        name = f"snapshot-{int(time() * 1000)}.db"
+        path = os.path.join(db.SNAPSHOT_DIR, name)
+        with db.connect_w() as conn:
+            # Holding the write lock, nothing changes the file while it is copied
+            _dirty.clear()
+            conn.execute("CHECKPOINT")
+            shutil.copyfile(db.DB_FILE, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        current = os.path.join(db.SNAPSHOT_DIR, "CURRENT")
+        with open(current + ".tmp", 'w') as file:
+            file.write(name)
+        os.replace(current + ".tmp", current)
+        # Workers may still read old snapshots; unlinking keeps them readable
+        old = sorted(f for f in os.listdir(db.SNAPSHOT_DIR)
+                     if f.startswith("snapshot-") and f.endswith(".db"))
+        for f in old[:-KEEP_SNAPSHOTS]:
+            os.remove(os.path.join(db.SNAPSHOT_DIR, f))
+        return name
+
+def _publisher(stop: Event) -> None:
+    while not stop.is_set():
+        if _dirty.wait(SNAPSHOT_INTERVAL) and not stop.is_set():
+            try:
+                publish_snapshot()
+            except (duckdb.Error, OSError) as e:
+                print(f"SNAPSHOT FAILED due to {e}")
+            stop.wait(SNAPSHOT_INTERVAL)
+
+def _error(e: Exception) -> tuple[str, tuple[str, str]]:
+    return ("error", (type(e).__name__, str(e)))
+
+def handle(conn: Connection) -> None:
+    """Serve one worker connection until it closes its session."""
+    session: ExitStack | None = None
+    cursor = None
+    in_transaction = False
+    wrote = False
+    try:
+        while True:
+            if session is not None and not conn.poll(SESSION_TIMEOUT):
+                print("WRITER SESSION TIMED OUT")
+                break
+            command, *args = conn.recv()
+            try:
+                if command == "open":
+                    session = ExitStack()
+                    cursor = session.enter_context(db.connect_w())
+                    result = None
+                elif command == "execute":
+                    query, params = args
+                    statement = query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+                    wrote |= statement not in READ_ONLY_STATEMENTS
+                    result = cursor.execute(query, params)
+                    try:
+                        result = result.fetchall()
+                    except duckdb.InvalidInputError: # Statement without a result
+                        result = []
+                elif command == "begin":
+                    cursor.begin()
+                    in_transaction, result = True, None
+                elif command in ("commit", "rollback"):
+                    getattr(cursor, command)()
+                    in_transaction, result = False, None
+                elif command in ("close", "abort"):
+                    if in_transaction:
+                        cursor.rollback()
+                        in_transaction = False
+                    session.close()
+                    session = None
+                    conn.send(("ok", None))
+                    return
+                else:
+                    raise ValueError(f"Unknown command {repr(command)}")
+            except Exception as e:
+                conn.send(_error(e))
+                continue
+            conn.send(("ok", result))
+    except (EOFError, OSError):
+        pass # The worker went away
+    finally:
+        if session is not None:
+            if in_transaction:
+                try:
+                    cursor.rollback()
+                except duckdb.Error:
+                    pass
+            session.close()
+        if wrote:
+            _dirty.set()
+        conn.close()
+
+def authkey_from_env() -> bytes:
+    """
+    Raises:
+        ValueError: If AUTHKEY_ENV is not set to a hex encoded key.
+    """
+    key = os.environ.get(AUTHKEY_ENV)
+    if not key:
+        raise ValueError(f"{AUTHKEY_ENV} is not set")
+    return bytes.fromhex(key)
+
+def serve(address: str = ADDRESS, authkey: bytes | None = None) -> None:
+    """
+    Raises:
+        ValueError: If `authkey` is None and AUTHKEY_ENV is not set.
+    """
+    if authkey is None:
+        authkey = authkey_from_env()
+    db.WRITER_ADDRESS = None # This process owns the file
+    db.create_tables()
+    db.migrate()
+    publish_snapshot()
+    if os.path.exists(address):
+        os.remove(address)
+    stop = Event()
+    Thread(target=_publisher, args=(stop,), name="snapshot-publisher", daemon=True).start()
+    # Created without access for others, rather than restricted after binding
+    umask = os.umask(0o777 & ~SOCKET_MODE)
+    try:
+        listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+    os.chmod(address, SOCKET_MODE)
+    with listener:
+        print(f"WRITER LISTENING ON {address}")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    print(f"WRITER REJECTED A CONNECTION due to {e}")
+                    continue
+                Thread(target=handle, args=(conn,), daemon=True).start()
+        finally:
+            stop.set()
+            if _dirty.is_set():
+                publish_snapshot()
+
+if __name__ == "__main__":
+    try:
+        serve(sys.argv[1] if len(sys.argv) > 1 else ADDRESS)
+    except ValueError as e:
+        sys.exit(f"WRITER NOT STARTED due to {e}")
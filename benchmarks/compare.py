@@ -0,0 +1,50 @@
+"""
+Compare two result files of benchmarks/run.py.
+
+    python -m benchmarks.compare before.json after.json [--threshold 1.2]
+
+Prints the p50 and p90 of every case both files have, with the ratio
+after / before, and exits with 1 if any p50 got slower than `threshold`.
+"""
+import argparse
+import json
+import sys
+
+THRESHOLD: float = 1.2 # Slowdown of the p50 counted as a regression
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+    with open(args.before, 'r') as file:
+        before = json.load(file)
+    with open(args.after, 'r') as file:
+        after = json.load(file)
+    print(f"before: {before['meta']['commit']}  after: {after['meta']['commit']}")
+
+    regressions = []
+    for scale, results in after["scales"].items():
+        old = before["scales"].get(scale)
+        if old is None:
+            continue
+        print(f"\n{scale}")
+        for case, new in results["cases"].items():
+            previous = old["cases"].get(case)
+            if previous is None:
+                continue
+            ratio = new["p50_ms"] / previous["p50_ms"] if previous["p50_ms"] else float("inf")
+            flag = ""
+            if ratio > args.threshold:
+                flag = "  REGRESSION"
+                regressions.append((scale, case))
+            print(f"  {case:40} p50 {previous['p50_ms']:9.3f} -> {new['p50_ms']:9.3f} ms"
+                  f"  p90 {previous['p90_ms']:9.3f} -> {new['p90_ms']:9.3f} ms"
+                  f"  x{ratio:5.2f}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than x{args.threshold}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
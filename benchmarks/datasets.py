@@ -0,0 +1,124 @@
+"""
+Synthetic households for the benchmarks.
+
+A dataset is built in a fresh DuckDB file through `db.create_tables()`,
+then filled with set-based INSERTs so that even the largest scale is
+ready in seconds:
+- people spread over the four groups, all available and sharing one
+  password hash;
+- chores with a mix of weekly, biweekly and monthly frequencies;
+- `years` of assignment history up to the current week, with about
+  PASSRATE of it done;
+- a few changelog entries per week of history.
+The derived tables (workload, person_stats) are then rebuilt, and
+`migrate()` runs as it would at startup.
+
+Everything is seeded, so the same scale always gives the same data.
+"""
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from backend import db
+from backend.models import stats, workload
+
+PASSWORD: str = "benchmark"
+PASSRATE: float = 0.8
+CHANGELOG_PER_WEEK: int = 3
+FREQUENCIES: tuple[str, ...] = (
+    "Once per week",
+    "Once per week on Sunday with offset 0",
+    "Once per 2 weeks with offset 1",
+    "Once per 2 weeks on Monday with offset 0",
+    "Once per 4 weeks with offset 2",
+)
+GROUPS: tuple[str, ...] = ("everyone", "main_gate", "stairs", "upstairs")
+
+@dataclass(frozen=True, slots=True)
+class Scale:
+    name: str
+    people: int
+    chores: int
+    years: int
+
+SCALES: dict[str, Scale] = {scale.name: scale for scale in (
+    Scale("tiny", 10, 10, 1),
+    Scale("small", 50, 20, 2),
+    Scale("medium", 500, 50, 5),
+    Scale("large", 2000, 200, 10),
+    Scale("huge", 5000, 500, 20),
+)}
+
+def build(scale: Scale, directory: str) -> str:
+    """Create the database of `scale` in `directory` and point `db` at it.
+    Returns the path of the database file."""
+    path = os.path.join(directory, f"{scale.name}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    db.close_pool()
+    db.DB_FILE = path
+    db.create_tables()
+    today = date.today()
+    this_monday = today - timedelta(days=today.weekday())
+    weeks = 52 * scale.years
+    first_monday = this_monday - timedelta(weeks=weeks - 1)
+    with db.connect_w() as conn:
+        conn.begin()
+        conn.execute(
+            """INSERT INTO people (name, password_hash, main_gate, stairs, upstairs)
+               SELECT 'Person ' || i, ?, i % 4 = 1, i % 4 = 2, i % 4 = 3
+               FROM range(?) AS r(i)""",
+            (generate_password_hash(PASSWORD), scale.people),
+        )
+        conn.execute(
+            f"""INSERT INTO chores (name, description, image_path, frequency,
+                                    people_group, assignee_count)
+                SELECT 'Chore ' || i, 'Synthetic chore ' || i, NULL,
+                       list_extract(?, i % {len(FREQUENCIES)} + 1),
+                       list_extract(?, i % {len(GROUPS)} + 1),
+                       1 + i % 3
+                FROM range(?) AS r(i)""",
+            (list(FREQUENCIES), list(GROUPS), scale.chores),
+        )
+        # Every chore every week; frequencies only matter for new weeks.
+        # Assignees are drawn from people whose index matches the group
+        conn.execute(
+            """INSERT INTO assignments (chore_id, week, year, year_week, assignee, status)
+                SELECT chores.id,
+                       week(monday),
+                       isoyear(monday),
+                       isoyear(monday) * 100 + week(monday),
+                       'Person ' || ((hash(chores.id, monday, slot) % (? // 4)) * 4
+                                     + list_position(?, chores.people_group) - 1),
+                       hash(chores.id, monday, slot, 'done') % 1000 < ? * 1000
+                FROM chores,
+                     (SELECT ?::DATE + INTERVAL (7 * n) DAY AS monday FROM range(?) AS r(n)),
+                     range(3) AS s(slot)
+                WHERE slot < chores.assignee_count""",
+            (scale.people, list(GROUPS), PASSRATE, first_monday, weeks),
+        )
+        conn.execute(
+            """INSERT INTO changelog (description, created_at)
+               SELECT 'Synthetic change ' || n,
+                      ?::TIMESTAMPTZ + to_seconds(n * (604800 // ?))
+               FROM range(?) AS r(n)""",
+            (first_monday, CHANGELOG_PER_WEEK, weeks * CHANGELOG_PER_WEEK),
+        )
+        workload.rebuild(conn)
+        stats.rebuild(conn)
+        conn.commit()
+        conn.execute("CHECKPOINT")
+    db.migrate()
+    return path
+
+def sizes() -> dict[str, int]:
+    """Row counts of the current database."""
+    with db.connect_r() as conn:
+        return {table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+                for table in ("people", "chores", "assignments", "changelog")}
+
+def past_week(weeks_ago: int) -> tuple[int, int]:
+    year, week, _ = (date.today() - timedelta(weeks=weeks_ago)).isocalendar()
+    return year, week
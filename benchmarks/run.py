@@ -0,0 +1,185 @@
+"""
+Time the model functions and the API routes on synthetic households.
+
+    python -m benchmarks.run                    # tiny, small and medium
+    python -m benchmarks.run --scales large huge --out results/after.json
+    python -m benchmarks.compare results/before.json results/after.json
+
+Every case is warmed up, then run `--repeat` times. The JSON output keeps
+the percentiles per scale and case along with the commit and the
+versions it ran with, so runs can be compared with benchmarks/compare.py.
+API routes go through the Flask test client and include its caches, as
+users would see them; the model cases do not.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+from math import ceil
+from statistics import mean
+from time import perf_counter
+
+import duckdb
+
+from backend import db
+from backend.models import changelog, people, schedules
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
+from benchmarks import datasets
+
+DEFAULT_SCALES: tuple[str, ...] = ("tiny", "small", "medium")
+REPEAT: int = 30
+WARMUP: int = 3
+PERCENTILES: tuple[int, ...] = (50, 90, 99)
+
+def percentile(sorted_values: list[float], p: int) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(0, ceil(p / 100 * len(sorted_values)) - 1)]
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        times.append((perf_counter() - start) * 1000)
+    times.sort()
+    return {"n": repeat,
+            "mean_ms": mean(times),
+            "min_ms": times[0],
+            "max_ms": times[-1],
+            **{f"p{p}_ms": percentile(times, p) for p in PERCENTILES}}
+
+def model_cases() -> dict[str, Callable[[], object]]:
+    year, week, _ = date.today().isocalendar()
+    past = datasets.past_week(26)
+    next_y, next_w, _ = (date.today() + timedelta(weeks=1)).isocalendar()
+    month_ago = datetime.now(timezone.utc) - timedelta(days=30)
+
+    def read(fn: Callable[[duckdb.DuckDBPyConnection], object]) -> Callable[[], object]:
+        def run():
+            with db.connect_r() as conn:
+                return fn(conn)
+        return run
+
+    def write(fn: Callable[[duckdb.DuckDBPyConnection], object]) -> Callable[[], object]:
+        def run():
+            with db.connect_w() as conn:
+                return fn(conn)
+        return run
+
+    return {
+        "get_schedule (stored week)": write(lambda c: schedules.get_schedule(c, year, week)),
+        "generate (next week)": read(lambda c: schedules.generate(c, next_y, next_w)),
+        "next_week (from half a year ago)": read(lambda c: schedules.next_week(c, *past)),
+        "last_week (from this week)": read(lambda c: schedules.last_week(c, year, week)),
+        "get_changelog (30 days)": read(lambda c: changelog.get_changelog(c, month_ago)),
+        "get_all_people": read(people.get_all_people),
+    }
+
+def api_cases(client) -> dict[str, Callable[[], object]]:
+    year, week, _ = date.today().isocalendar()
+    past_y, past_w = datasets.past_week(26)
+    two_years_ago = "{}-{:02d}".format(*datasets.past_week(104))
+
+    def get(url: str, *, uncached: bool = False, accept: str | None = None) -> Callable[[], object]:
+        def run():
+            if uncached:
+                schedule_cache.clear()
+            response = client.get(url, headers={"Accept": accept} if accept else {})
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} answered {response.status_code}")
+            return response
+        return run
+
+    login = client.post("/api/auth/login",
+                        json={"name": "Person 0", "password": datasets.PASSWORD})
+    if login.status_code != 200:
+        raise RuntimeError(f"Login answered {login.status_code}")
+    return {
+        "GET /api/schedules/ (cached)": get(f"/api/schedules/?year={year}&week={week}"),
+        "GET /api/schedules/ (uncached)": get(f"/api/schedules/?year={year}&week={week}",
+                                              uncached=True),
+        "GET /api/schedules/next-week": get(f"/api/schedules/next-week?year={past_y}&week={past_w}"),
+        "GET /api/schedules/last-week": get(f"/api/schedules/last-week?year={year}&week={week}"),
+        "GET /api/schedules/range (two years)": get(f"/api/schedules/range?from={two_years_ago}",
+                                                    uncached=True),
+        "GET /api/schedules/range (columnar)": get(f"/api/schedules/range?from={two_years_ago}",
+                                                   accept="application/vnd.house.columnar+json"),
+        "GET /api/schedules/history (columnar)": get("/api/schedules/history"),
+        "GET /api/changelog/": get("/api/changelog/?limit=50"),
+        "GET /api/people/": get("/api/people/"),
+        "GET /api/people/stats": get("/api/people/stats"),
+        "GET /api/chores": get("/api/chores"),
+        "GET /api/auth/me": get("/api/auth/me"),
+    }
+
+def environment() -> dict[str, str | None]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "duckdb": duckdb.__version__,
+            "machine": platform.platform()}
+
+def run_scale(scale: datasets.Scale, directory: str, repeat: int, warmup: int) -> dict:
+    start = perf_counter()
+    datasets.build(scale, directory)
+    build_seconds = perf_counter() - start
+    schedule_cache.clear()
+    session_cache.clear()
+    print(f"BUILT {scale.name} in {build_seconds:.1f}s: {datasets.sizes()}")
+
+    results = {}
+    for name, fn in model_cases().items():
+        results[name] = measure(fn, repeat, warmup)
+        print(f"  {name:40} p50 {results[name]['p50_ms']:9.3f} ms")
+    from backend.app import app
+    client = app.test_client()
+    for name, fn in api_cases(client).items():
+        results[name] = measure(fn, repeat, warmup)
+        print(f"  {name:40} p50 {results[name]['p50_ms']:9.3f} ms")
+    return {"people": scale.people,
+            "chores": scale.chores,
+            "years": scale.years,
+            "rows": datasets.sizes(),
+            "build_seconds": build_seconds,
+            "cases": results}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=list(DEFAULT_SCALES),
+                        choices=list(datasets.SCALES))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--out", default=None,
+                        help="JSON file to write, benchmarks/results/<commit>.json by default")
+    parser.add_argument("--keep", action="store_true",
+                        help="Keep the generated databases in benchmarks/data")
+    args = parser.parse_args()
+
+    here = os.path.dirname(__file__)
+    meta = environment()
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(here, "data") if args.keep else tmp
+        os.makedirs(directory, exist_ok=True)
+        scales = {name: run_scale(datasets.SCALES[name], directory, args.repeat, args.warmup)
+                  for name in args.scales}
+        db.close_pool()
+    out = args.out or os.path.join(here, "results", f"{meta['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as file:
+        json.dump({"meta": meta, "scales": scales}, file, indent=2)
+    print(f"WROTE {out}")
+
+if __name__ == "__main__":
+    main()
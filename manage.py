@@ -0,0 +1,119 @@
+"""
+Maintenance commands. They open the database directly, so stop the
+writer (see serve.py) before running them against a live deployment.
+
+    python manage.py rebuild-stats
+    python manage.py export backups/2025-06 --format parquet
+    python manage.py import backups/2025-06 --mode upsert
+    python manage.py create-household maple --chores chores.json --person ICE27182
+    python manage.py --household maple rebuild-stats
+    python manage.py list-households
+
+`--household` runs a command on that household instead of the default
+database, see backend/households.py.
+"""
+import argparse
+import getpass
+import os
+import sys
+
+from backend import db, households
+from backend.models import backup, stats, workload
+
+def rebuild_stats(args: argparse.Namespace) -> None:
+    with db.connect_w() as conn_w:
+        conn_w.begin()
+        try:
+            workload.rebuild(conn_w)
+            stats.rebuild(conn_w)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
+        rows, = conn_w.execute("SELECT count(*) FROM person_stats").fetchone()
+    print(f"REBUILT statistics of {rows} person and chore pairs")
+
+def export_backup(args: argparse.Namespace) -> None:
+    os.makedirs(args.directory, exist_ok=True)
+    with db.connect_consistent() as conn_r:
+        paths = backup.export_tables(conn_r, args.directory, args.format, args.tables)
+    for table, path in paths.items():
+        print(f"EXPORTED {table} to {path}")
+
+def import_backup(args: argparse.Namespace) -> None:
+    with db.connect_w() as conn_w:
+        conn_w.begin()
+        try:
+            rows = backup.import_tables(conn_w, args.directory, args.mode)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
+    for table, count in rows.items():
+        print(f"IMPORTED {table}, {count} rows now")
+
+def create_household(args: argparse.Namespace) -> None:
+    password = getpass.getpass(f"Password of {args.person}: ") if args.person else None
+    try:
+        path = households.create(args.name, args.chores, args.person, password)
+    except (households.InvalidHouseholdNameError, households.HouseholdExistsError) as e:
+        sys.exit(f"CREATE FAILED due to {e}")
+    print(f"CREATED household {args.name} in {path}")
+
+def list_households(args: argparse.Namespace) -> None:
+    for name in households.list_households():
+        print(name)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="House cleaning schedule maintenance")
+    parser.add_argument("--household", help="Run the command on this household")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "rebuild-stats", 
+        help="Recompute the workload counters and person statistics from assignments",
+    ).set_defaults(run=rebuild_stats)
+    export = commands.add_parser(
+        "export",
+        help="Write the tables to a directory as Parquet or CSV files",
+    )
+    export.add_argument("directory")
+    export.add_argument("--format", choices=list(backup.FORMATS), default="parquet")
+    export.add_argument("--tables", nargs="+", choices=list(backup.TABLES),
+                        default=list(backup.TABLES))
+    export.set_defaults(run=export_backup)
+    import_ = commands.add_parser(
+        "import",
+        help="Load the tables exported to a directory, replacing or merging into the current ones",
+    )
+    import_.add_argument("directory")
+    import_.add_argument("--mode", choices=list(backup.MODES), default="replace")
+    import_.set_defaults(run=import_backup)
+    create = commands.add_parser(
+        "create-household",
+        help="Create a household with empty tables and optionally its chores and first person",
+    )
+    create.add_argument("name")
+    create.add_argument("--chores", help="Legacy chores.json to start from")
+    create.add_argument("--person", help="First person, asked for a password")
+    create.set_defaults(run=create_household, database=False)
+    commands.add_parser(
+        "list-households",
+        help="List the households",
+    ).set_defaults(run=list_households, database=False)
+    args = parser.parse_args()
+    if not getattr(args, "database", True):
+        args.run(args)
+        return
+    if args.household is None:
+        db.migrate()
+        args.run(args)
+        return
+    try:
+        with households.use(args.household):
+            db.migrate()
+            args.run(args)
+    except households.UnknownHouseholdError as e:
+        sys.exit(f"{args.command.upper()} FAILED due to {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 
 
 from backend.app import app
-from backend.db import reset
+from backend.db import reset, migrate, check_indexes
 print(str(app.url_map._rules_by_endpoint).replace("],", "],\n"))
 # reset()
+migrate()
+for description in check_indexes():
+    print(f"NOT INDEXED: {description}")
 app.run(host="0.0.0.0", debug=False, port=80)
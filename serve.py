@@ -0,0 +1,96 @@
+"""
+Run the app with several worker processes and one database writer.
+
+DuckDB lets only one process open the database for writing, so the
+writer (backend/writer.py) owns it and the workers forward writes to it
+and read from its snapshots. Reads can lag behind writes by about
+writer.SNAPSHOT_INTERVAL. The writer is restarted if it exits; until
+then, workers keep serving reads and answer writes with 503.
+
+For a single process, run.py is still the simplest way to serve.
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import socket
+import subprocess
+import sys
+from time import sleep
+
+from backend import db, writer
+
+STARTUP_TIMEOUT: float = 30.0 # Seconds to wait for the first snapshot
+
+def start_writer(address: str, authkey: bytes) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "backend.writer", address],
+                            env={**os.environ, writer.AUTHKEY_ENV: authkey.hex()})
+
+def wait_for_writer(process: subprocess.Popen, address: str) -> None:
+    waited = 0.0
+    while not (os.path.exists(address) and db.current_snapshot()):
+        if process.poll() is not None:
+            sys.exit(f"WRITER EXITED with code {process.returncode}")
+        if waited > STARTUP_TIMEOUT:
+            sys.exit("WRITER DID NOT START in time")
+        sleep(0.1)
+        waited += 0.1
+
+def run_worker(fd: int, host: str, port: int, address: str) -> None:
+    from werkzeug.serving import make_server
+    db.WRITER_ADDRESS = address
+    from backend.app import app
+    make_server(host, port, app, threaded=True, fd=fd).serve_forever()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=80)
+    parser.add_argument("--address", default=writer.ADDRESS,
+                        help="Unix socket of the writer")
+    args = parser.parse_args()
+
+    # A stale CURRENT would let workers start before the writer is ready
+    if os.path.exists(current := os.path.join(db.SNAPSHOT_DIR, "CURRENT")):
+        os.remove(current)
+    # A new key every run; the forked workers inherit it
+    db.WRITER_AUTHKEY = secrets.token_bytes(32)
+    process = start_writer(args.address, db.WRITER_AUTHKEY)
+    wait_for_writer(process, args.address)
+
+    sock = socket.create_server((args.host, args.port), reuse_port=False)
+    sock.set_inheritable(True)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=run_worker,
+                               args=(sock.fileno(), args.host, args.port, args.address),
+                               daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    print(f"SERVING on {args.host}:{args.port} with {args.workers} workers")
+
+    try:
+        while True:
+            sleep(1)
+            if process.poll() is not None:
+                print(f"WRITER EXITED with code {process.returncode}, restarting")
+                process = start_writer(args.address, db.WRITER_AUTHKEY)
+            for i, worker in enumerate(workers):
+                if not worker.is_alive():
+                    print(f"WORKER EXITED with code {worker.exitcode}, restarting")
+                    workers[i] = context.Process(
+                        target=run_worker,
+                        args=(sock.fileno(), args.host, args.port, args.address),
+                        daemon=True)
+                    workers[i].start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        process.terminate()
+        process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Every test gets its own database in a temporary directory, with the
+chores of chores.json, the fallback person ICE27182 (password "P") and
+PEOPLE more people spread over the groups. backend/chores.db and
+backend/households/ are never touched.
+"""
+import os
+
+import pytest
+
+from backend import db, households
+from backend.models import people
+from backend.utils.schedule_cache import schedule_cache
+from backend.utils.session_cache import session_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GROUPS: tuple[str, ...] = ("everyone", "main_gate", "stairs", "upstairs")
+PEOPLE: int = 23
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT) # fill_data reads chores.json
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "chores.db"))
+    monkeypatch.setattr(households, "DIRECTORY", str(tmp_path / "households"))
+    db.create_tables()
+    db.fill_data()
+    with db.connect_w() as conn_w:
+        for i in range(PEOPLE):
+            people.add_person(conn_w, f"P{i:02d}", GROUPS[i % len(GROUPS)])
+        people.enable_person(conn_w, "ICE27182")
+    yield db.DB_FILE
+    households.households.close()
+    db.close_pool()
+    schedule_cache.clear()
+    session_cache.clear()
+
+@pytest.fixture
+def client(database):
+    from backend.app import app
+    return app.test_client()
+
+def dump(conn, tables=("people", "chores", "assignments", "changelog", "workload",
+                       "person_stats")) -> dict[str, list[tuple]]:
+    return {table: conn.execute(f"SELECT * FROM {table} ORDER BY ALL").fetchall()
+            for table in tables}
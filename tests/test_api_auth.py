@@ -0,0 +1,8 @@
+import pytest
+
+@pytest.mark.parametrize("path", ["/api/schedules/cache-stats", "/api/auth/hash-stats"])
+def test_internal_stats_need_a_session(client, path):
+    assert client.get(path).status_code == 401
+    client.post("/api/auth/login", json={"name": "ICE27182", "password": "P"})
+    response = client.get(path)
+    assert response.status_code == 200
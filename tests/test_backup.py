@@ -0,0 +1,116 @@
+import os
+
+import duckdb
+import pytest
+
+from backend import db
+from backend.models import backup, schedules
+from tests.conftest import dump
+
+@pytest.fixture
+def exported(database, tmp_path):
+    with db.connect_w() as conn_w:
+        schedules.backfill(conn_w, (2025, 10), (2025, 20))
+        ids = [row[0] for row in conn_w.execute(
+            "SELECT id FROM assignments WHERE id % 3 = 0").fetchall()]
+        schedules.set_status(conn_w, ids, True)
+    def export(format: str, tables=backup.TABLES) -> str:
+        directory = tmp_path / f"backup-{format}"
+        directory.mkdir()
+        with db.connect_consistent() as conn_r:
+            backup.export_tables(conn_r, str(directory), format, tables)
+        return str(directory)
+    return export
+
+def import_tables(directory: str, mode: backup.Mode) -> dict[str, int]:
+    with db.connect_w() as conn_w:
+        conn_w.begin()
+        try:
+            rows = backup.import_tables(conn_w, directory, mode)
+            conn_w.commit()
+        except BaseException:
+            conn_w.rollback()
+            raise
+    return rows
+
+def current() -> dict[str, list[tuple]]:
+    with db.connect_r() as conn:
+        return dump(conn)
+
+@pytest.mark.parametrize("format", backup.FORMATS)
+def test_replace_round_trip(exported, format):
+    before = current()
+    directory = exported(format)
+    with db.connect_w() as conn_w:
+        conn_w.execute("DELETE FROM changelog")
+        conn_w.execute("UPDATE people SET is_available = NOT is_available")
+    import_tables(directory, "replace")
+    assert current() == before
+    # The sequences continue after the imported ids
+    with db.connect_w() as conn_w:
+        new_id, = conn_w.execute("INSERT INTO changelog (description) VALUES ('after') "
+                                 "RETURNING id").fetchone()
+    assert new_id > max(row[0] for row in before["changelog"])
+
+@pytest.mark.parametrize("format", backup.FORMATS)
+def test_upsert_of_the_same_backup_changes_nothing(exported, format):
+    before = current()
+    import_tables(exported(format), "upsert")
+    assert current() == before
+
+def test_upsert_merges_by_name(exported, tmp_path):
+    directory = exported("parquet", ["people", "chores", "assignments"])
+    other = duckdb.connect()
+    people = os.path.join(directory, "people.parquet")
+    merged = str(tmp_path / "people.parquet")
+    # Another household's copy: new credentials, one person more, one renamed chore
+    other.execute(f"""COPY (SELECT * REPLACE ('elsewhere' AS password_hash,
+                                              'token' AS session_cookie_token)
+                            FROM '{people}'
+                            UNION ALL
+                            SELECT * REPLACE (1000 AS id, 'Newcomer' AS name,
+                                              'elsewhere' AS password_hash,
+                                              'token' AS session_cookie_token)
+                            FROM '{people}' WHERE name = 'P00')
+                      TO '{merged}' (FORMAT parquet)""")
+    os.replace(merged, people)
+    chores = os.path.join(directory, "chores.parquet")
+    merged = str(tmp_path / "chores.parquet")
+    other.execute(f"""COPY (SELECT * REPLACE (id + 1000 AS id, name || ' B' AS name)
+                            FROM '{chores}')
+                      TO '{merged}' (FORMAT parquet)""")
+    os.replace(merged, chores)
+    assignments = os.path.join(directory, "assignments.parquet")
+    merged = str(tmp_path / "assignments.parquet")
+    other.execute(f"""COPY (SELECT * REPLACE (id + 1000 AS id, chore_id + 1000 AS chore_id)
+                            FROM '{assignments}')
+                      TO '{merged}' (FORMAT parquet)""")
+    os.replace(merged, assignments)
+    before = current()
+    import_tables(directory, "upsert")
+    after = current()
+    assert len(after["chores"]) == 2 * len(before["chores"])
+    assert len(after["assignments"]) == 2 * len(before["assignments"])
+    assert len(after["people"]) == len(before["people"]) + 1
+    with db.connect_r() as conn:
+        assert conn.execute("""SELECT count(*) FROM people
+                               WHERE password_hash = 'elsewhere'
+                                  OR session_cookie_token = 'token'""").fetchone() == (0, )
+        assert conn.execute("""SELECT password_hash, session_cookie_token FROM people
+                               WHERE name = 'Newcomer'""").fetchone() == (None, None)
+        assert conn.execute("""SELECT password_hash FROM people
+                               WHERE name = 'ICE27182'""").fetchone()[0] is not None
+    # Importing it again matches every row
+    import_tables(directory, "upsert")
+    assert current() == after
+
+def test_empty_backup(database, tmp_path):
+    with pytest.raises(backup.EmptyBackupError):
+        import_tables(str(tmp_path), "replace")
+
+def test_unknown_format_and_table(database, tmp_path):
+    with db.connect_r() as conn:
+        with pytest.raises(backup.UnknownFormatError):
+            backup.export_tables(conn, str(tmp_path), "xml")
+        with pytest.raises(backup.UnknownTableError):
+            backup.export_tables(conn, str(tmp_path), "csv", ["nope"])
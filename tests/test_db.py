@@ -0,0 +1,49 @@
+import json
+
+from backend import db
+from backend.models import schedules
+
+def scan_types(conn, query: str, params: tuple) -> dict[str, str]:
+    plan = conn.execute(f"EXPLAIN (ANALYZE, FORMAT json) {query}", params).fetchall()
+    return {scan["Table"]: scan["Type"] for scan in db._scans(json.loads(plan[0][1]))}
+
+def test_week_lookups_use_the_index(database):
+    with db.connect_w() as conn_w:
+        # 20 years of 16 assignments a week
+        conn_w.execute(
+            """INSERT INTO assignments (chore_id, week, year, year_week, assignee)
+               SELECT (SELECT min(id) FROM chores), week(monday), isoyear(monday),
+                      isoyear(monday) * 100 + week(monday), 'P' || slot
+               FROM (SELECT DATE '2004-01-05' + INTERVAL (7 * n) DAY AS monday
+                     FROM range(1040) AS r(n)),
+                    range(16) AS s(slot)""")
+    assert db.check_indexes() == []
+    with db.connect_r() as conn:
+        for description, table, query, _ in db.HOT_QUERIES:
+            if description == "assignments by week":
+                assert scan_types(conn, query, (201510,))[table] == "Index Scan"
+    with db.connect_w() as conn_w:
+        assert len(schedules.get_schedule(conn_w, 2015, 10)) == 1
+
+def test_migrate_adds_the_week_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "old.db"))
+    with db.connect_w() as conn_w:
+        conn_w.execute("CREATE TABLE chores (id INTEGER PRIMARY KEY, name TEXT)")
+        conn_w.execute("""CREATE TABLE assignments (
+                              id INTEGER PRIMARY KEY, chore_id INTEGER REFERENCES chores(id),
+                              week INTEGER, year INTEGER, assignee TEXT, status BOOLEAN)""")
+        conn_w.execute("CREATE INDEX idx_assignments_year ON assignments(year)")
+        conn_w.execute("INSERT INTO chores VALUES (1, 'Kitchen Cleaning')")
+        conn_w.execute("INSERT INTO assignments VALUES (1, 1, 52, 2024, 'P00', true), "
+                       "(2, 1, 1, 2025, 'P01', false)")
+    try:
+        db.migrate()
+        db.migrate()
+        with db.connect_r() as conn:
+            assert conn.execute("SELECT id, year_week FROM assignments ORDER BY id"
+                                ).fetchall() == [(1, 202452), (2, 202501)]
+            assert {name for name, in conn.execute(
+                "SELECT index_name FROM duckdb_indexes()").fetchall()} == {
+                    "idx_assignments_year_week", "idx_assignments_assignee"}
+    finally:
+        db.close_pool()
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from backend import db, households
+from backend.models import changelog, people, schedules
+from backend.utils.schedule_cache import schedule_cache
+from tests.conftest import GROUPS
+
+WEEK = (2025, 10)
+
+@pytest.fixture
+def maple_and_oak(database):
+    for name, prefix in (("maple", "M"), ("oak", "O")):
+        households.create(name, "chores.json", "alice", "PW")
+        with households.use(name):
+            with db.connect_w() as conn_w:
+                for i in range(8):
+                    people.add_person(conn_w, f"{prefix}{i}", GROUPS[i % len(GROUPS)])
+    return "maple", "oak"
+
+def assignees(year: int, week: int) -> set[str]:
+    with db.connect_w() as conn_w:
+        schedule = schedules.get_schedule(conn_w, year, week)
+    return {assignee for assignments in schedule.values()
+            for assignee, _ in assignments.values()}
+
+def test_create(maple_and_oak):
+    assert households.list_households() == ["maple", "oak"]
+    assert os.path.isfile(households.path_of("maple"))
+    with pytest.raises(households.HouseholdExistsError):
+        households.create("oak")
+    with pytest.raises(households.InvalidHouseholdNameError):
+        households.create("auth")
+    with pytest.raises(households.UnknownHouseholdError):
+        with households.use("elm"):
+            pass
+
+def test_schedules_stay_apart(maple_and_oak):
+    with households.use("maple"):
+        maple = assignees(*WEEK)
+    with households.use("oak"):
+        oak = assignees(*WEEK)
+    default = assignees(*WEEK)
+    # alice is the first member of both
+    assert maple and all(name[0] in "Ma" for name in maple)
+    assert oak and all(name[0] in "Oa" for name in oak)
+    assert default.isdisjoint(maple | oak)
+    with households.use("maple"):
+        with db.connect_r() as conn:
+            assert conn.execute("SELECT count(DISTINCT week) FROM assignments").fetchone() == (1, )
+
+def test_writes_stay_apart(maple_and_oak):
+    with households.use("oak"):
+        with db.connect_w() as conn_w:
+            changelog.add_changelog(conn_w, "only in oak")
+    def logged() -> int:
+        with db.connect_r() as conn:
+            return conn.execute("SELECT count(*) FROM changelog "
+                                "WHERE description = 'only in oak'").fetchone()[0]
+    with households.use("oak"):
+        assert logged() == 1
+    with households.use("maple"):
+        assert logged() == 0
+    assert logged() == 0
+
+def test_cache_entries_stay_apart(maple_and_oak):
+    payload = {"schedule": {}, "due_days": {}}
+    with households.use("maple"):
+        schedule_cache.put(*WEEK, payload, schedule_cache.epoch())
+        assert schedule_cache.get(*WEEK) is payload
+    with households.use("oak"):
+        assert schedule_cache.get(*WEEK) is None
+        schedule_cache.clear()
+    assert schedule_cache.get(*WEEK) is None
+    with households.use("maple"):
+        assert schedule_cache.get(*WEEK) is payload
+
+def test_sessions_stay_apart(maple_and_oak, client):
+    response = client.post("/api/maple/auth/login", json={"name": "alice", "password": "PW"})
+    assert response.status_code == 200
+    assert client.get("/api/maple/auth/me").status_code == 200
+    assert client.get("/api/oak/auth/me").status_code == 401
+    assert client.get("/api/auth/me").status_code == 401
+    assert client.post("/api/auth/login",
+                       json={"name": "alice", "password": "PW"}).status_code == 401
+    assert client.get("/api/elm/schedules/").status_code == 404
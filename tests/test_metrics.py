@@ -0,0 +1,39 @@
+from backend import db
+from backend.models import backup
+from backend.utils import metrics, read_snapshot
+
+def query_labels() -> set[str]:
+    return {dict(labels)["query"] for labels in metrics.query_seconds._series}
+
+def test_query_label_replaces_names_paths_and_literals():
+    assert metrics.query_label("CREATE TABLE read_snapshot_12.people AS "
+                               'SELECT * FROM "/tmp/x 1.db".main.people') == (
+        'CREATE TABLE read_snapshot_?.people AS SELECT * FROM "?".main.people')
+    assert metrics.query_label("COPY people TO '/tmp/a''b/people.parquet' "
+                               "WHERE id IN (1, 2, 3) AND week = 4") == (
+        "COPY people TO '?' WHERE id IN (...) AND week = ?")
+
+def test_histogram_series_are_capped(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_SERIES", 3)
+    histogram = metrics.Histogram("test_seconds", "Test.")
+    for index in range(10):
+        histogram.observe(0.1, query=str(index))
+    assert list(histogram._series) == [(("query", "0"), ), (("query", "1"), ),
+                                       (("query", "2"), ), (("query", "other"), )]
+    assert sum(histogram._series[(("query", "other"), )][0]) == 7
+
+def test_backup_is_not_instrumented(database, tmp_path):
+    metrics.clear()
+    with db.connect_consistent() as conn_r:
+        backup.export_tables(conn_r, str(tmp_path))
+    with db.connect_w() as conn_w:
+        conn_w.begin()
+        backup.import_tables(conn_w, str(tmp_path))
+        conn_w.commit()
+    assert not any(str(tmp_path) in label or "COPY" in label for label in query_labels())
+
+def test_snapshot_refresh_is_not_instrumented(database):
+    metrics.clear()
+    read_snapshot.read_snapshot.refresh()
+    read_snapshot.read_snapshot.refresh()
+    assert not any("read_snapshot" in label for label in query_labels())
@@ -0,0 +1,54 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backend import db
+from backend.models import schedules
+from backend.models.chores import get_all_chores
+from backend.models.people import InvalidGroupError, get_all_people
+from backend.utils import rotation
+
+# Across years with 52 and 53 weeks (2020 and 2026 have a week 53)
+WEEKS = schedules.weeks_between((2019, 40), (2027, 10))
+
+@pytest.fixture
+def chores_and_groups(database):
+    with db.connect_r() as conn:
+        chores = get_all_chores(conn)
+        groups = schedules.available_people(get_all_people(conn))
+    chores.append({**chores[0], "name": "Specific", "frequency": "Weeks in 2026: 1 5 53"})
+    chores.append({**chores[0], "name": "Triple", "assignee_count": 3,
+                   "frequency": "Once per 3 weeks with offset 1"})
+    return chores, groups
+
+def test_monday_ordinals():
+    years, weeks = np.array(WEEKS, dtype=np.int64).T
+    expected = [date.fromisocalendar(year, week, 1).toordinal() for year, week in WEEKS]
+    assert rotation.monday_ordinals(years, weeks).tolist() == expected
+
+def test_plan_weeks_matches_rotate(chores_and_groups):
+    chores, groups = chores_and_groups
+    planned = rotation.plan_weeks(chores, groups, WEEKS)
+    assert list(planned) == WEEKS
+    for year, week in WEEKS:
+        assert planned[(year, week)] == schedules.plan_week(chores, groups, year, week)
+
+def test_plan_weeks_without_weeks(chores_and_groups):
+    assert rotation.plan_weeks(*chores_and_groups, []) == {}
+
+def test_plan_weeks_with_nobody_available(chores_and_groups):
+    chores, groups = chores_and_groups
+    groups = {group: [] for group in groups}
+    with pytest.raises(ZeroDivisionError):
+        schedules.plan_week(chores, groups, *WEEKS[0])
+    with pytest.raises(ZeroDivisionError):
+        rotation.plan_weeks(chores, groups, WEEKS)
+
+def test_plan_weeks_with_an_unknown_group(chores_and_groups):
+    chores, groups = chores_and_groups
+    del groups[chores[0]["people_group"]]
+    with pytest.raises(InvalidGroupError):
+        schedules.plan_week(chores, groups, *WEEKS[0])
+    with pytest.raises(InvalidGroupError):
+        rotation.plan_weeks(chores, groups, WEEKS)
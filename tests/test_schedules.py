@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from backend import db
+from backend.models import schedules
+
+def week_of(days: int) -> tuple[int, int]:
+    return tuple((date.today() + timedelta(days=days)).isocalendar()[:2])
+
+def stored_weeks(conn) -> set[tuple[int, int]]:
+    return set(conn.execute("SELECT DISTINCT year, week FROM assignments").fetchall())
+
+def test_get_schedules_only_generates_from_the_current_week(database):
+    start, past, current, end = week_of(-70), week_of(-35), week_of(0), week_of(21)
+    with db.connect_w() as conn_w:
+        schedules.backfill(conn_w, past, past)
+        weeks = schedules.get_schedules(conn_w, start, end)
+        stored = stored_weeks(conn_w)
+    assert [(year, week) for year, week, _, _ in weeks] == schedules.weeks_between(start, end)
+    for year, week, schedule, _ in weeks:
+        if (year, week) == past or (year, week) >= current:
+            assert schedule and (year, week) in stored
+        else:
+            assert not schedule and (year, week) not in stored
+
+def test_range_leaves_missing_past_weeks_to_get_schedule(client):
+    client.post("/api/auth/login", json={"name": "ICE27182", "password": "P"})
+    year, week = week_of(-14)
+    response = client.get(f"/api/schedules/range?from={year}-{week:02d}&to={year}-{week:02d}")
+    assert response.json["weeks"][0]["schedule"] == {}
+    # Not cached as empty: the week endpoint still generates it
+    response = client.get(f"/api/schedules/?year={year}&week={week}")
+    assert response.json["schedule"]
+
+def test_columnar_range_only_generates_from_the_current_week(client):
+    client.post("/api/auth/login", json={"name": "ICE27182", "password": "P"})
+    start, end = week_of(-14), week_of(7)
+    response = client.get(f"/api/schedules/range?from={start[0]}-{start[1]:02d}"
+                          f"&to={end[0]}-{end[1]:02d}&format=columnar")
+    assert response.status_code == 200
+    with db.connect_r() as conn:
+        assert min(stored_weeks(conn)) == week_of(0)
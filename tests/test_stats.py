@@ -0,0 +1,108 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from backend import db
+from backend.models import chores, schedules, stats, workload
+from tests.conftest import dump
+
+@pytest.fixture
+def conn_w(database):
+    with db.connect_w() as conn_w:
+        schedules.backfill(conn_w, (2025, 30), (2025, 45))
+        yield conn_w
+
+def assert_refreshed(conn_w):
+    refreshed = dump(conn_w, ("person_stats", ))
+    stats.rebuild(conn_w)
+    assert dump(conn_w, ("person_stats", )) == refreshed
+
+def assignment_ids(conn_w, assignee: str) -> list[int]:
+    return [row[0] for row in conn_w.execute(
+        "SELECT id FROM assignments WHERE assignee = ? ORDER BY year, week",
+        (assignee, )).fetchall()]
+
+def test_after_inserting(conn_w):
+    assert_refreshed(conn_w)
+    schedules.backfill(conn_w, (2025, 1), (2025, 29))
+    assert_refreshed(conn_w)
+
+def test_after_set_status(conn_w):
+    ids = assignment_ids(conn_w, "P03")
+    # Done, done, done, not done, done, done: streaks of 3 and 2
+    schedules.set_status(conn_w, ids[:3] + ids[4:6], True)
+    assert_refreshed(conn_w)
+    schedules.set_status(conn_w, ids[1:2], False)
+    assert_refreshed(conn_w)
+
+def test_after_set_chore_status(conn_w):
+    schedules.set_chore_status(conn_w, 2025, 40, "Kitchen Cleaning", True)
+    assert_refreshed(conn_w)
+
+def test_after_removing_future_schedules(conn_w):
+    schedules.set_status(conn_w, assignment_ids(conn_w, "P07"), True)
+    schedules.remove_future_schedules(conn_w)
+    assert_refreshed(conn_w)
+
+def test_refresh_only_touches_the_given_pairs(conn_w):
+    ids = assignment_ids(conn_w, "P03")
+    stale = dump(conn_w, ("person_stats", ))["person_stats"]
+    workload.record_statuses(conn_w, dict.fromkeys(ids, True))
+    changes = conn_w.execute("UPDATE assignments SET status = true WHERE id = ANY(?) "
+                             "RETURNING assignee, chore_id, year_week", (ids, )).fetchall()
+    stats.refresh(conn_w, changes)
+    refreshed = dump(conn_w, ("person_stats", ))["person_stats"]
+    changed = {row for row in refreshed if row not in stale}
+    assert changed and all(row[0] == "P03" for row in changed)
+    assert_refreshed(conn_w)
+
+def test_refresh_matches_rebuild_for_any_order(conn_w):
+    ids = assignment_ids(conn_w, "P05") + assignment_ids(conn_w, "P11")
+    order = random.Random(4).choices(ids, k=60)
+    for index, assignment_id in enumerate(order):
+        schedules.set_status(conn_w, [assignment_id], index % 3 != 0)
+        assert_refreshed(conn_w)
+
+@pytest.fixture
+def weekly(database):
+    """Insert one chore of P03 for each of the last `len(statuses)` weeks
+    before the current one, then the open current week. Returns the id
+    of the current week."""
+    def insert(statuses: list[bool]) -> int:
+        with db.connect_w() as conn_w:
+            chore = chores.get_all_chores(conn_w)[0]
+            weeks = [tuple((date.today() - timedelta(weeks=ago)).isocalendar()[:2])
+                     for ago in range(len(statuses), -1, -1)]
+            inserted = schedules.insert_assignments(
+                conn_w, {week: [(chore, ["P03"])] for week in weeks})
+            ids = [id for week in weeks for id in inserted[week][chore["name"]]]
+            schedules.set_status(conn_w, [id for id, status in zip(ids, statuses) if status], True)
+            assert_refreshed(conn_w)
+        return ids[-1]
+    return insert
+
+def test_missed_week_resets_current_streak(weekly):
+    weekly([True] * 5 + [False] * 15)
+    with db.connect_w() as conn_w:
+        p03 = stats.get_stats(conn_w, "P03")["P03"]
+    assert (p03["current_streak"], p03["longest_streak"]) == (0, 5)
+
+def test_open_current_week_keeps_current_streak(weekly):
+    current = weekly([False] + [True] * 4)
+    with db.connect_w() as conn_w:
+        assert stats.get_stats(conn_w, "P03")["P03"]["current_streak"] == 4
+        schedules.set_status(conn_w, [current], True)
+        assert_refreshed(conn_w)
+        assert stats.get_stats(conn_w, "P03")["P03"]["current_streak"] == 5
+
+def test_migrate_rebuilds_person_stats_without_runs(conn_w):
+    conn_w.execute("DROP TABLE person_stats")
+    conn_w.execute("""CREATE TABLE person_stats (
+                          assignee TEXT, chore_id INTEGER, assigned INTEGER, done INTEGER,
+                          last_done INTEGER, current_streak INTEGER, longest_streak INTEGER)""")
+    db.close_pool()
+    db.migrate()
+    with db.connect_w() as conn_w:
+        assert conn_w.execute("SELECT count(next_miss) FROM person_stats").fetchone()[0]
+        assert_refreshed(conn_w)
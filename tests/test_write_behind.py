@@ -0,0 +1,115 @@
+import logging
+from datetime import datetime, timezone
+from threading import Event, Thread
+from time import sleep
+
+import pytest
+
+from backend import db
+from backend.models import schedules, stats, workload
+from backend.utils import metrics, write_behind
+from tests.conftest import dump
+
+@pytest.fixture
+def queue(database, monkeypatch):
+    monkeypatch.setattr(write_behind, "FLUSH_INTERVAL", 0.01)
+    queue = write_behind.WriteBehind()
+    yield queue
+    queue.close()
+
+def descriptions() -> list[str]:
+    with db.connect_r() as conn:
+        return [row[0] for row in conn.execute(
+            "SELECT description FROM changelog ORDER BY id").fetchall()]
+
+def test_flush_writes_in_order(queue):
+    for i in range(10):
+        queue.add_changelog(f"entry {i}")
+    queue.flush()
+    assert descriptions()[-10:] == [f"entry {i}" for i in range(10)]
+    assert queue.stats() == {"queued": 0, "flushes": queue.flushes, "written": 10, "dropped": 0}
+
+def test_status_toggles_keep_the_last_one(queue):
+    with db.connect_w() as conn_w:
+        schedule = schedules.get_schedule(conn_w, 2025, 10)
+    assignment_id = next(iter(next(iter(schedule.values()))))
+    for status in (True, False, True):
+        queue.set_status(assignment_id, status)
+    queue.flush()
+    with db.connect_w() as conn_w:
+        assert conn_w.execute("SELECT status FROM assignments WHERE id = ?",
+                              (assignment_id, )).fetchone() == (True, )
+        refreshed = dump(conn_w, ("workload", "person_stats"))
+        workload.rebuild(conn_w)
+        stats.rebuild(conn_w)
+        assert dump(conn_w, ("workload", "person_stats")) == refreshed
+
+def test_a_failing_write_is_dropped_alone(queue, caplog, client):
+    metrics.clear()
+    queue.add_changelog("before")
+    queue.submit(("changelog", None, datetime.now(timezone.utc))) # NOT NULL
+    queue.add_changelog("after")
+    with caplog.at_level(logging.WARNING, logger="backend.app"):
+        queue.flush()
+    assert descriptions()[-2:] == ["before", "after"]
+    assert queue.stats()["dropped"] == 1
+    levels = [record.levelno for record in caplog.records
+              if record.name == "backend.app.write_behind"]
+    assert levels == [logging.WARNING] * write_behind.MAX_RETRIES + [logging.ERROR]
+    assert 'house_write_behind_dropped_total{kind="changelog"} 1' in client.get(
+        "/api/metrics").get_data(as_text=True)
+
+def test_close_flushes_what_is_queued(queue):
+    queue.submit(("changelog", None, datetime.now(timezone.utc)))
+    queue.add_changelog("at close")
+    queue.close()
+    assert descriptions()[-1] == "at close"
+    assert queue.stats()["queued"] == 0
+    assert queue.stats()["dropped"] == 1
+
+def test_flush_times_out_while_the_lock_is_held(queue):
+    held, release = Event(), Event()
+    def hold():
+        with db.lock:
+            held.set()
+            release.wait(5)
+    holder = Thread(target=hold)
+    holder.start()
+    held.wait()
+    try:
+        queue.add_changelog("late")
+        with pytest.raises(write_behind.WriteBehindTimeoutError):
+            queue.flush(timeout=0.1)
+    finally:
+        release.set()
+        holder.join()
+    queue.flush()
+    assert descriptions()[-1] == "late"
+
+def test_submit_raises_when_full(queue, monkeypatch):
+    monkeypatch.setattr(write_behind, "MAX_QUEUE", 1)
+    monkeypatch.setattr(write_behind, "SUBMIT_TIMEOUT", 0.05)
+    with db.lock: # The worker takes the first one and then waits
+        queue.add_changelog("first")
+        while queue.stats()["queued"]:
+            sleep(0.001)
+        queue.add_changelog("second")
+        with pytest.raises(write_behind.WriteBehindFullError):
+            queue.add_changelog("third")
+    queue.flush()
+    assert descriptions()[-2:] == ["first", "second"]
+
+def test_log_change_writes_synchronously_when_disabled(database):
+    assert not write_behind.active()
+    write_behind.log_change("direct")
+    assert descriptions()[-1] == "direct"
+
+def test_the_app_answers_503_when_full(client, monkeypatch):
+    client.post("/api/auth/login", json={"name": "ICE27182", "password": "P"})
+    monkeypatch.setattr(write_behind, "ENABLED", True)
+    def full(*args):
+        raise write_behind.WriteBehindFullError()
+    monkeypatch.setattr(write_behind.write_behind, "submit", full)
+    response = client.post("/api/people/add/", json={"person": "Zed", "group": "everyone"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"